@@ -0,0 +1 @@
+"""Offline benchmarks for the research graphs (run from the backend directory)."""
@@ -0,0 +1,152 @@
+"""Micro-benchmark of the citation engine in utils.py.
+
+Builds synthetic grounded responses (text, grounding chunks and supports) with
+thousands of supports at realistic text sizes and times cite_grounded_response()
+against the original pipeline of resolve_urls(), get_citations() and
+insert_citation_markers(). The equivalence of both on random responses,
+including the awkward cases the API can produce, is checked by
+tests/unit_tests/test_citations.py, which reuses the builders of this module.
+
+Usage (from the backend directory):
+    python -m benchmarks.citation_benchmark --supports 500 2000 8000 --text-chars 200000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from types import SimpleNamespace
+from typing import Any, Dict, List, Tuple
+
+from agent.utils import cite_grounded_response, get_citations, insert_citation_markers, resolve_urls
+
+_WORDS = ["市場", "規模", "は", "前年比", "で", "成長", "した。", "market", "growth", "of", "12%", "in", "2024."]
+
+
+def legacy_cite(response: Any, id: Any) -> Tuple[str, List[Dict[str, Any]]]:
+    """The citation code of grounded_search() before cite_grounded_response()."""
+    resolved_urls = resolve_urls(response.candidates[0].grounding_metadata.grounding_chunks, id)
+    citations = get_citations(response, resolved_urls)
+    modified_text = insert_citation_markers(response.text, citations) if citations else (response.text or "")
+    sources_gathered = []
+    for citation in citations:
+        if citation and "segments" in citation and citation["segments"]:
+            sources_gathered.extend(citation["segments"])
+    return modified_text, sources_gathered
+
+
+def synthetic_response(
+    rng: random.Random,
+    text_chars: int,
+    supports: int,
+    chunks: int,
+    overflow: float = 0.0,
+    messy: bool = False,
+) -> Any:
+    """A grounded response shaped like the google-genai objects grounded_search() reads.
+
+    overflow is the fraction of supports whose end offset lies past the end of the
+    text (the API reports UTF-8 byte offsets, which exceed the character length of
+    Japanese text). messy adds malformed supports and chunks.
+    """
+    words = []
+    length = 0
+    while length < text_chars:
+        words.append(rng.choice(_WORDS))
+        length += len(words[-1]) + 1
+    text = " ".join(words)[:text_chars]
+
+    grounding_chunks = []
+    for i in range(chunks):
+        # Duplicate urls exercise the first-occurrence short url of resolve_urls()
+        uri = f"https://vertexaisearch.cloud.google.com/grounding-api-redirect/{rng.randrange(max(1, chunks * 3 // 4))}"
+        title = f"source{i}.example.com" if not (messy and rng.random() < 0.1) else f"nodot{i}"
+        grounding_chunks.append(SimpleNamespace(web=SimpleNamespace(uri=uri, title=title)))
+
+    grounding_supports = []
+    for _ in range(supports):
+        if rng.random() < overflow:
+            end_index = len(text) + rng.randrange(1, 3 * max(1, len(text) // 4))
+        else:
+            end_index = rng.randrange(0, len(text) + 1)
+        start_index = rng.randrange(0, end_index + 1) if rng.random() < 0.9 else None
+        indices = [rng.randrange(chunks) for _ in range(rng.randint(1, 3))] if chunks else []
+        if messy:
+            roll = rng.random()
+            if roll < 0.05:
+                grounding_supports.append(SimpleNamespace(segment=None, grounding_chunk_indices=indices))
+                continue
+            if roll < 0.1:
+                end_index = None
+            elif roll < 0.15:
+                indices = indices + [chunks + 5]  # out of range chunk index
+            elif roll < 0.2:
+                indices = []
+        segment = SimpleNamespace(start_index=start_index, end_index=end_index)
+        grounding_supports.append(SimpleNamespace(segment=segment, grounding_chunk_indices=indices))
+
+    metadata = SimpleNamespace(grounding_chunks=grounding_chunks, grounding_supports=grounding_supports)
+    return SimpleNamespace(text=text, candidates=[SimpleNamespace(grounding_metadata=metadata)])
+
+
+def time_call(fn: Any, response: Any, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(response, 0)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the single-pass citation engine")
+    parser.add_argument("--supports", nargs="+", type=int, default=[500, 2000, 8000])
+    parser.add_argument("--text-chars", type=int, default=100_000, help="Length of the response text")
+    parser.add_argument("--chunks", type=int, default=200, help="Grounding chunks per response")
+    parser.add_argument("--overflow", type=float, default=0.0, help="Fraction of supports ending past the text")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per size (best is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    for supports in args.supports:
+        response = synthetic_response(rng, args.text_chars, supports, args.chunks, overflow=args.overflow)
+        if cite_grounded_response(response, 0) != legacy_cite(response, 0):
+            raise AssertionError(f"outputs differ for {supports} supports")
+        legacy_s = time_call(legacy_cite, response, args.repeat)
+        single_pass_s = time_call(cite_grounded_response, response, args.repeat)
+        results.append({
+            "supports": supports,
+            "text_chars": args.text_chars,
+            "legacy_ms": round(legacy_s * 1000, 3),
+            "single_pass_ms": round(single_pass_s * 1000, 3),
+            "speedup": round(legacy_s / single_pass_s, 1) if single_pass_s else None,
+        })
+
+    header = f"{'supports':>9}{'text chars':>12}{'legacy ms':>12}{'1-pass ms':>12}{'speedup':>9}"
+    print(header, file=sys.stderr)
+    print("-" * len(header), file=sys.stderr)
+    for r in results:
+        print(
+            f"{r['supports']:>9}{r['text_chars']:>12}{r['legacy_ms']:>12.2f}{r['single_pass_ms']:>12.2f}{r['speedup']:>8}x",
+            file=sys.stderr,
+        )
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
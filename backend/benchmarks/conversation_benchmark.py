@@ -0,0 +1,148 @@
+"""Prompt tokens per turn of a multi-turn thread, with and without the bounded conversation context.
+
+Runs a thread of follow-up questions against the fake Gemini backend with a
+checkpointer, once with the default conversation window (recent turns in full,
+earlier turns replaced by a rolling summary) and once with an unbounded window
+(every previous report in every prompt, as get_research_topic() did). Reports
+per turn the input tokens of the entry node (the planner, whose prompt is the
+conversation context, plus the summary call it makes once the window
+overflows) and of all chat model calls of the turn. The all-calls total also
+grows with the research results the thread accumulates from turn to turn, which
+the conversation window does not cover.
+
+Usage (from the backend directory):
+    python -m benchmarks.conversation_benchmark --turns 6 --report-chars 8000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+# agent.graph refuses to import without an API key; the fake backend never uses it
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.pop("CHECKPOINT_DB_PATH", None)
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+from langgraph.checkpoint.memory import MemorySaver  # noqa: E402
+
+from agent.history import SearchHistoryManager  # noqa: E402
+from agent.tracing import add_span_processor  # noqa: E402
+from benchmarks.fake_gemini import FakeBackendConfig, LatencyDistribution, install  # noqa: E402
+from benchmarks.graph_benchmark import QUESTION, SpanCollector, graph_module  # noqa: E402
+from benchmarks.prompt_tokens_benchmark import input_tokens_per_node  # noqa: E402
+
+GRAPHS = ("enhanced", "simple")
+ENTRY_NODES = {"enhanced": "enhanced_planner", "simple": "create_research_plan"}
+FOLLOW_UPS = [
+    "太陽光発電に絞って、地域別の導入状況を詳しく教えてください",
+    "洋上風力の主要プロジェクトと事業者を比較してください",
+    "FIP制度への移行が事業収益に与える影響は？",
+    "系統制約と出力抑制の現状を整理してください",
+    "2030年目標の達成見通しについて結論をまとめてください",
+]
+UNBOUNDED_TOKENS = 10**9
+
+
+def run_thread(graph_name: str, bounded: bool, args: argparse.Namespace, collector: SpanCollector) -> List[Dict[str, Any]]:
+    builder = getattr(graph_module, f"{graph_name}_builder")
+    graph = builder.compile(checkpointer=MemorySaver())
+    configurable: Dict[str, Any] = {"thread_id": f"{graph_name}-{bounded}", "critique_skip_threshold": 1.1}
+    if not bounded:
+        configurable["conversation_window_tokens"] = UNBOUNDED_TOKENS
+        configurable["conversation_summary_tokens"] = UNBOUNDED_TOKENS
+    turns = []
+    for turn, question in enumerate(([QUESTION] + FOLLOW_UPS * args.turns)[: args.turns]):
+        collector.drain()
+        started = time.perf_counter()
+        graph.invoke(
+            {
+                "messages": [HumanMessage(content=question)],
+                "initial_search_query_count": args.fan_out,
+                "max_research_loops": args.loops,
+            },
+            {"configurable": configurable},
+        )
+        elapsed = time.perf_counter() - started
+        per_node = input_tokens_per_node(collector.drain())
+        turns.append({
+            "turn": turn + 1,
+            # The entry node makes the planning call and, from the turn the window overflows, the summary call
+            "entry_tokens": per_node.get(ENTRY_NODES[graph_name], 0),
+            "total_tokens": sum(per_node.values()),
+            "seconds": round(elapsed, 3),
+        })
+    return turns
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure prompt tokens per turn of a multi-turn thread")
+    parser.add_argument("--graphs", nargs="+", choices=GRAPHS, default=list(GRAPHS))
+    parser.add_argument("--turns", type=int, default=6)
+    parser.add_argument("--report-chars", type=int, default=8000, help="Size of each generated report")
+    parser.add_argument("--fan-out", type=int, default=2, help="Sub-topics / queries per plan")
+    parser.add_argument("--loops", type=int, default=1, help="max_research_loops")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    if os.getenv("CONVERSATION_WINDOW_TOKENS") or os.getenv("CONVERSATION_SUMMARY_TOKENS"):
+        parser.error("unset CONVERSATION_WINDOW_TOKENS and CONVERSATION_SUMMARY_TOKENS; they override the settings this benchmark varies")
+
+    backend = FakeBackendConfig(
+        seed=args.seed,
+        llm_latency=LatencyDistribution("fixed", [0.0]),
+        search_latency=LatencyDistribution("fixed", [0.0]),
+        response_chars=args.report_chars,
+        fan_out=args.fan_out,
+    )
+    install(graph_module, backend)
+    collector = SpanCollector()
+    add_span_processor(collector)
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        graph_module.history_manager = SearchHistoryManager(os.path.join(tmp, "search_history.json"))
+        for graph_name in args.graphs:
+            unbounded = run_thread(graph_name, False, args, collector)
+            bounded = run_thread(graph_name, True, args, collector)
+            for before, after in zip(unbounded, bounded):
+                results.append({
+                    "graph": graph_name,
+                    "turn": before["turn"],
+                    "entry_tokens_unbounded": before["entry_tokens"],
+                    "entry_tokens_bounded": after["entry_tokens"],
+                    "total_tokens_unbounded": before["total_tokens"],
+                    "total_tokens_bounded": after["total_tokens"],
+                    "seconds_unbounded": before["seconds"],
+                    "seconds_bounded": after["seconds"],
+                })
+
+    header = f"{'graph':<10}{'turn':>5}{'entry unbounded':>17}{'entry bounded':>15}{'total unbounded':>17}{'total bounded':>15}"
+    print(header, file=sys.stderr)
+    print("-" * len(header), file=sys.stderr)
+    for r in results:
+        print(
+            f"{r['graph']:<10}{r['turn']:>5}{r['entry_tokens_unbounded']:>17}{r['entry_tokens_bounded']:>15}"
+            f"{r['total_tokens_unbounded']:>17}{r['total_tokens_bounded']:>15}",
+            file=sys.stderr,
+        )
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
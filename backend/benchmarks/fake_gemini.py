@@ -0,0 +1,279 @@
+"""Deterministic stand-ins for the Gemini chat model and the google-genai client.
+
+The fakes answer every call the graphs make (structured outputs, plain text,
+batches and Google Search grounded generations) with synthetic content of a
+configurable size after a simulated latency. Latencies and texts are derived
+from a hash of the prompt and the seed, so a run is reproducible no matter in
+which order parallel branches call the backend.
+
+Latency specs:
+- ``fixed:MS``
+- ``uniform:LOW_MS:HIGH_MS``
+- ``lognormal:MEDIAN_MS:SIGMA``
+"""
+
+import base64
+import hashlib
+import json
+import math
+import random
+import re
+import time
+import types
+import typing
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, get_args, get_origin
+
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage
+from langchain_core.output_parsers import PydanticOutputParser
+from pydantic import BaseModel
+
+from agent.conversation import estimate_tokens
+from agent.tracing import end_span, start_span
+
+
+@dataclass
+class LatencyDistribution:
+    """Simulated call latency in milliseconds."""
+
+    kind: str = "fixed"
+    params: List[float] = field(default_factory=lambda: [0.0])
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        kind, _, rest = spec.partition(":")
+        params = [float(p) for p in rest.split(":")] if rest else []
+        expected = {"fixed": 1, "uniform": 2, "lognormal": 2}
+        if kind not in expected or len(params) != expected[kind]:
+            raise ValueError(
+                f"Invalid latency spec '{spec}'. Use fixed:MS, uniform:LOW_MS:HIGH_MS or lognormal:MEDIAN_MS:SIGMA"
+            )
+        return cls(kind, params)
+
+    def sample(self, rng: random.Random) -> float:
+        """Return a latency in seconds."""
+        if self.kind == "fixed":
+            ms = self.params[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(self.params[0], self.params[1])
+        else:
+            ms = self.params[0] * math.exp(rng.gauss(0.0, self.params[1]))
+        return max(0.0, ms) / 1000
+
+
+@dataclass
+class FakeBackendConfig:
+    """Shape of the synthetic workload."""
+
+    seed: int = 0
+    llm_latency: LatencyDistribution = field(default_factory=lambda: LatencyDistribution("fixed", [50.0]))
+    search_latency: LatencyDistribution = field(default_factory=lambda: LatencyDistribution("fixed", [100.0]))
+    # Characters of generated free text (report drafts, search answers, long string fields)
+    response_chars: int = 2000
+    search_response_chars: int = 1500
+    # Number of sub-topics, search queries and follow-up queries the fake planner returns
+    fan_out: int = 3
+    queries_per_sub_topic: int = 2
+    sources_per_search: int = 3
+    # Whether critique/review ask for a revision (drives the revision loops)
+    request_revisions: bool = False
+    # Share of structured outputs returned as malformed JSON (see _malformed_json)
+    malformed_output_rate: float = 0.0
+
+
+_FILLER = "これはベンチマーク用に生成された合成テキストです。市場規模、主要企業、規制動向について述べます。"
+_QUERY_TERMS = [
+    "太陽光", "洋上風力", "地熱", "バイオマス", "水素", "蓄電池", "系統", "出力抑制", "FIT", "FIP",
+    "市場規模", "導入量", "発電コスト", "政策", "補助金", "規制", "投資", "事業者", "地域", "雇用",
+    "2023年", "2024年", "2030年", "見通し", "課題", "統計", "比較", "海外", "技術", "価格",
+]
+# Citations in a prompt (markdown links or citation tokens); generated reports reuse them
+_PROMPT_CITATION_RE = re.compile(r"\[[^\]\n]+\]\(https?://[^)\s]+\)|\[S[0-9][0-9-]*\]")
+
+
+def _rng(config: FakeBackendConfig, prompt: Any) -> random.Random:
+    digest = hashlib.sha256(f"{config.seed}:{prompt}".encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+def _text(rng: random.Random, chars: int) -> str:
+    offset = rng.randrange(len(_FILLER))
+    repeated = (_FILLER * (chars // len(_FILLER) + 2))[offset:offset + chars]
+    return repeated
+
+
+class FakeChatModel:
+    """Drop-in replacement for ChatGoogleGenerativeAI as used by agent.graph."""
+
+    def __init__(self, config: FakeBackendConfig, schema: Optional[type] = None, **kwargs: Any):
+        self.config = config
+        self.schema = schema
+        self.model = kwargs.get("model", "fake-gemini")
+        self.include_raw = kwargs.get("include_raw", False)
+        self._calls = 0
+
+    def with_structured_output(self, schema: type, include_raw: bool = False, **kwargs: Any) -> "FakeChatModel":
+        return FakeChatModel(self.config, schema, model=self.model, include_raw=include_raw)
+
+    def invoke(self, prompt: Any, *args: Any, **kwargs: Any) -> Any:
+        rng = _rng(self.config, prompt)
+        started = start_span("llm.call", model=self.model)
+        time.sleep(self.config.llm_latency.sample(rng))
+        if self.schema is not None:
+            result: Any = self._structured(self.schema, rng)
+            output = result.model_dump_json()
+            # Each retry of a prompt draws again, like a sampled model would
+            malformed_rng = _rng(self.config, f"malformed:{self._calls}:{prompt}")
+            self._calls += 1
+            if malformed_rng.random() < self.config.malformed_output_rate:
+                output = _malformed_json(malformed_rng, result)
+        else:
+            result = AIMessage(content=self._report(rng, str(prompt)))
+            output = result.content
+        if started is not None:
+            started.attributes.update(input_tokens=estimate_tokens(prompt), output_tokens=estimate_tokens(output))
+        end_span(started)
+        if self.schema is None:
+            return result
+        # Parse like ChatGoogleGenerativeAI.with_structured_output() does
+        raw = AIMessage(content=output)
+        try:
+            parsed, error = PydanticOutputParser(pydantic_object=self.schema).parse(output), None
+        except OutputParserException as e:
+            if not self.include_raw:
+                raise
+            parsed, error = None, e
+        return {"raw": raw, "parsed": parsed, "parsing_error": error} if self.include_raw else parsed
+
+    def batch(self, prompts: List[Any], *args: Any, **kwargs: Any) -> List[Any]:
+        return [self.invoke(prompt) for prompt in prompts]
+
+    def _report(self, rng: random.Random, prompt: str) -> str:
+        sections = max(1, self.config.fan_out)
+        body_chars = max(1, self.config.response_chars // sections)
+        # Like the real model, cite with the citations found in the research texts
+        citations = _PROMPT_CITATION_RE.findall(prompt)
+        parts = [f"# ベンチマークレポート\n\n{_text(rng, 200)}\n"]
+        for i in range(sections):
+            if citations:
+                cited = " ".join(citations[(i * 3 + j) % len(citations)] for j in range(3))
+            else:
+                cited = f"[site{i}](https://vertexaisearch.cloud.google.com/id/{i}-0)"
+            parts.append(f"## サブトピック{i + 1}\n\n{_text(rng, body_chars)} {cited}\n")
+        return "\n".join(parts)
+
+    def _structured(self, schema: type, rng: random.Random) -> BaseModel:
+        values = {}
+        for name, model_field in schema.model_fields.items():
+            values[name] = self._field_value(name, model_field.annotation, rng)
+        return schema(**values)
+
+    def _field_value(self, name: str, annotation: Any, rng: random.Random) -> Any:
+        config = self.config
+        if name in ("should_revise", "revision_needed"):
+            return config.request_revisions
+        if name == "is_sufficient":
+            # Keep reflecting until max_research_loops so loop count drives the workload
+            return False
+        if annotation is bool:
+            return False
+        if annotation is int:
+            return 1
+        if annotation is str:
+            if name in ("overall_quality", "estimated_depth"):
+                return "medium"
+            return _text(rng, min(config.response_chars, 400))
+        origin = get_origin(annotation)
+        if origin in (list, typing.List):
+            (item_type,) = get_args(annotation)
+            if name == "search_queries":
+                count = config.queries_per_sub_topic
+            elif name in ("sub_topics", "sections", "query", "follow_up_queries"):
+                count = config.fan_out
+            else:
+                count = 3
+            if isinstance(item_type, type) and issubclass(item_type, BaseModel):
+                items = [self._structured(item_type, rng) for _ in range(count)]
+                if name == "sub_topics":
+                    for i, item in enumerate(items):
+                        item.topic_name = f"サブトピック{i + 1}"
+                return items
+            if name in ("search_queries", "query", "follow_up_queries"):
+                # Distinct queries, so the follow-up deduplication only drops real repeats
+                return [" ".join(rng.sample(_QUERY_TERMS, 3)) for _ in range(count)]
+            return [f"{name} {i + 1}: {_text(rng, 40)}" for i in range(count)]
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            return self._structured(annotation, rng)
+        return None
+
+
+def _malformed_json(rng: random.Random, result: BaseModel) -> str:
+    """JSON of result with one of the defects real models produce now and then."""
+    data = result.model_dump()
+    kind = rng.choice(["trailing_comma", "missing_field", "python_literal", "prose", "string_list", "not_json"])
+    if kind == "trailing_comma":
+        return json.dumps(data, ensure_ascii=False)[:-1] + ",}"
+    if kind == "missing_field":
+        data.pop(next(iter(data)))
+        return json.dumps(data, ensure_ascii=False)
+    if kind == "python_literal":
+        return repr(data)
+    if kind == "prose":
+        return f"以下が結果です。\n{json.dumps(data, ensure_ascii=False)}\nご確認ください。"
+    if kind == "string_list":
+        for key, value in data.items():
+            if isinstance(value, list) and all(isinstance(item, str) for item in value):
+                data[key] = "\n".join(f"- {item}" for item in value)
+        return json.dumps(data, ensure_ascii=False)
+    return "申し訳ありませんが、この形式では回答できません。"
+
+
+def _ns(**kwargs: Any) -> types.SimpleNamespace:
+    return types.SimpleNamespace(**kwargs)
+
+
+def _redirect_uri(rng: random.Random) -> str:
+    token = base64.urlsafe_b64encode(rng.getrandbits(8 * 150).to_bytes(150, "big")).decode("ascii").rstrip("=")
+    return f"https://vertexaisearch.cloud.google.com/grounding-api-redirect/{token}"
+
+
+class _FakeModels:
+    def __init__(self, config: FakeBackendConfig):
+        self.config = config
+
+    def generate_content(self, model: str, contents: Any, config: Any = None) -> Any:
+        backend = self.config
+        rng = _rng(backend, contents)
+        time.sleep(backend.search_latency.sample(rng))
+        text = _text(rng, backend.search_response_chars)
+        sources = max(1, backend.sources_per_search)
+        # Grounding chunk uris are long redirect urls, like the real API returns
+        chunks = [
+            _ns(web=_ns(uri=_redirect_uri(rng), title=f"site{i}.com"))
+            for i in range(sources)
+        ]
+        step = max(1, len(text) // sources)
+        supports = [
+            _ns(segment=_ns(start_index=i * step, end_index=min(len(text), (i + 1) * step)), grounding_chunk_indices=[i])
+            for i in range(sources)
+        ]
+        usage = _ns(prompt_token_count=estimate_tokens(contents), candidates_token_count=estimate_tokens(text))
+        return _ns(
+            text=text,
+            usage_metadata=usage,
+            candidates=[_ns(grounding_metadata=_ns(grounding_chunks=chunks, grounding_supports=supports))],
+        )
+
+
+class FakeGenaiClient:
+    """Drop-in replacement for google.genai.Client as used by agent.graph."""
+
+    def __init__(self, config: FakeBackendConfig):
+        self.models = _FakeModels(config)
+
+
+def install(graph_module: Any, config: FakeBackendConfig) -> None:
+    """Point agent.graph at the fake backend."""
+    graph_module.ChatGoogleGenerativeAI = lambda **kwargs: FakeChatModel(config, **kwargs)
+    graph_module.genai_client = FakeGenaiClient(config)
@@ -0,0 +1,232 @@
+"""End-to-end benchmark of the research graphs against a fake Gemini backend.
+
+Runs enhanced_graph, simple_graph and academic_graph over a grid of fan-out
+(sub-topics / queries) and max_research_loops values and reports, per run:
+wall time, critical-path time, time per node, LLM/search call counts, peak
+Python memory and the size of the final state. Results are printed as a table
+and can be written as JSON to track regressions over time.
+
+Usage (from the backend directory):
+    python -m benchmarks.graph_benchmark --fan-out 2 4 8 --loops 1 3 --output bench.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from typing import Any, Dict, List
+
+# agent.graph refuses to import without an API key; the fake backend never uses it
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.pop("CHECKPOINT_DB_PATH", None)
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from agent.history import SearchHistoryManager  # noqa: E402
+from agent.metrics import structured_outputs_total  # noqa: E402
+from agent.tracing import Span, SpanProcessor, add_span_processor  # noqa: E402
+from benchmarks.fake_gemini import FakeBackendConfig, LatencyDistribution, install  # noqa: E402
+
+# agent/__init__.py re-exports the compiled graph as agent.graph, so fetch the module itself
+graph_module = importlib.import_module("agent.graph")
+
+GRAPHS = ("enhanced", "simple", "academic")
+QUESTION = "日本の再生可能エネルギー市場の現状と今後5年間の成長見通しを分析してください"
+
+
+class SpanCollector(SpanProcessor):
+    """Keeps the finished spans of the current run."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.spans: List[Span] = []
+
+    def on_end(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def drain(self) -> List[Span]:
+        with self._lock:
+            spans, self.spans = self.spans, []
+        return spans
+
+
+def critical_path_seconds(node_spans: List[Span]) -> float:
+    """Length of the longest chain of node spans that ran one after another.
+
+    Parallel branches overlap in time, so only the slowest branch of each fan-out
+    ends up on the path; this is the floor on wall time no concurrency can beat.
+    """
+    ordered = sorted(node_spans, key=lambda s: s.end_time)
+    best: List[float] = []
+    for i, current in enumerate(ordered):
+        duration = current.end_time - current.start_time
+        predecessor = max(
+            (best[j] for j in range(i) if ordered[j].end_time <= current.start_time),
+            default=0.0,
+        )
+        best.append(predecessor + duration)
+    return max(best, default=0.0)
+
+
+def summarize_spans(spans: List[Span]) -> Dict[str, Any]:
+    node_spans = [s for s in spans if s.name.startswith("node.")]
+    per_node: Dict[str, Dict[str, float]] = defaultdict(lambda: {"calls": 0, "total_ms": 0.0, "max_ms": 0.0})
+    for node_span in node_spans:
+        stats = per_node[node_span.attributes.get("node", node_span.name)]
+        stats["calls"] += 1
+        stats["total_ms"] += node_span.duration_ms
+        stats["max_ms"] = max(stats["max_ms"], node_span.duration_ms)
+    for stats in per_node.values():
+        stats["total_ms"] = round(stats["total_ms"], 2)
+        stats["max_ms"] = round(stats["max_ms"], 2)
+    return {
+        "critical_path_ms": round(critical_path_seconds(node_spans) * 1000, 2),
+        "llm_calls": sum(1 for s in spans if s.name == "llm.call"),
+        "search_calls": sum(1 for s in spans if s.name == "search.grounded"),
+        "nodes": dict(sorted(per_node.items())),
+    }
+
+
+def state_size_bytes(state: Dict[str, Any]) -> int:
+    return len(json.dumps(state, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def run_once(
+    graph_name: str, fan_out: int, loops: int, collector: SpanCollector, min_loop_novelty: float = 0.0
+) -> Dict[str, Any]:
+    graph = getattr(graph_module, f"{graph_name}_graph")
+    inputs = {
+        "messages": [HumanMessage(content=QUESTION)],
+        "initial_search_query_count": fan_out,
+        "max_research_loops": loops,
+    }
+    collector.drain()
+    tracemalloc.start()
+    started = time.perf_counter()
+    final_state = graph.invoke(inputs, {"configurable": {"min_loop_novelty": min_loop_novelty}})
+    wall_seconds = time.perf_counter() - started
+    _, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        "graph": graph_name,
+        "fan_out": fan_out,
+        "max_research_loops": loops,
+        "wall_ms": round(wall_seconds * 1000, 2),
+        "peak_memory_bytes": peak_bytes,
+        "state_size_bytes": state_size_bytes(final_state),
+    }
+    result.update(summarize_spans(collector.drain()))
+    return result
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_table(results: List[Dict[str, Any]]) -> None:
+    header = f"{'graph':<10}{'fan-out':>8}{'loops':>6}{'wall ms':>10}{'crit ms':>10}{'llm':>6}{'search':>7}{'peak KiB':>10}{'state KiB':>10}"
+    print(header, file=sys.stderr)
+    print("-" * len(header), file=sys.stderr)
+    for r in results:
+        print(
+            f"{r['graph']:<10}{r['fan_out']:>8}{r['max_research_loops']:>6}{r['wall_ms']:>10.1f}"
+            f"{r['critical_path_ms']:>10.1f}{r['llm_calls']:>6}{r['search_calls']:>7}"
+            f"{r['peak_memory_bytes'] / 1024:>10.1f}{r['state_size_bytes'] / 1024:>10.1f}",
+            file=sys.stderr,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the research graphs against a fake Gemini backend")
+    parser.add_argument("--graphs", nargs="+", choices=GRAPHS, default=list(GRAPHS))
+    parser.add_argument("--fan-out", nargs="+", type=int, default=[3], help="Sub-topics / queries per plan")
+    parser.add_argument("--loops", nargs="+", type=int, default=[2], help="Values of max_research_loops")
+    parser.add_argument("--queries-per-sub-topic", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per configuration")
+    parser.add_argument("--llm-latency", default="lognormal:50:0.3", help="Latency spec of chat model calls")
+    parser.add_argument("--search-latency", default="lognormal:100:0.5", help="Latency spec of grounded searches")
+    parser.add_argument("--response-chars", type=int, default=2000, help="Size of generated report text")
+    parser.add_argument("--search-response-chars", type=int, default=1500, help="Size of each search answer")
+    parser.add_argument("--revisions", action="store_true", help="Make critique/review request revisions")
+    parser.add_argument(
+        "--min-loop-novelty",
+        type=float,
+        default=0.0,
+        help="Novelty below which research loops stop (the fake search texts repeat, so 0 lets --loops drive the workload)",
+    )
+    parser.add_argument(
+        "--malformed-output-rate", type=float, default=0.0, help="Share of structured outputs returned as malformed JSON"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    backend = FakeBackendConfig(
+        seed=args.seed,
+        llm_latency=LatencyDistribution.parse(args.llm_latency),
+        search_latency=LatencyDistribution.parse(args.search_latency),
+        response_chars=args.response_chars,
+        search_response_chars=args.search_response_chars,
+        queries_per_sub_topic=args.queries_per_sub_topic,
+        request_revisions=args.revisions,
+        malformed_output_rate=args.malformed_output_rate,
+    )
+    install(graph_module, backend)
+
+    collector = SpanCollector()
+    add_span_processor(collector)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Keep benchmark runs out of the real search history
+        graph_module.history_manager = SearchHistoryManager(os.path.join(tmp, "search_history.json"))
+        results = []
+        for graph_name in args.graphs:
+            for fan_out in args.fan_out:
+                backend.fan_out = fan_out
+                for loops in args.loops:
+                    for _ in range(args.repeat):
+                        results.append(run_once(graph_name, fan_out, loops, collector, args.min_loop_novelty))
+
+    print_table(results)
+    structured_outputs: Dict[str, Dict[str, int]] = defaultdict(dict)
+    for (schema, result), count in sorted(structured_outputs_total.snapshot().items()):
+        structured_outputs[schema][result] = int(count)
+    if args.malformed_output_rate:
+        print("\nstructured outputs (valid / repaired locally / retried / failed):", file=sys.stderr)
+        for schema, counts in structured_outputs.items():
+            print(
+                f"  {schema:<24}" + " / ".join(str(counts.get(r, 0)) for r in ("valid", "repaired", "retried", "failed")),
+                file=sys.stderr,
+            )
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+        "structured_outputs": structured_outputs,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""Local load test for the search history API in app.py.
+
+Seeds a temporary history file with synthetic entries, serves app.py with
+uvicorn on a local port and drives it with concurrent clients for a fixed
+duration. Reports throughput and latency percentiles per endpoint as a table
+and as JSON, so storage changes to SearchHistoryManager can be compared.
+
+Scenarios:
+- ``polling``: clients refresh the sidebar list (GET /api/history?limit=20)
+- ``search``: bursts of full-text searches (GET /api/history?search=...)
+- ``detail``: opening individual entries (GET /api/history/{id})
+- ``mixed``: list, search and detail reads plus DELETEs of single entries
+
+``--writes-per-second`` adds a background writer that saves new histories the
+way finished graph runs do, to measure reads while runs complete. Note that
+save_history() keeps only the newest 100 entries, so with a writer the seeded
+history shrinks to 100 entries after the first write.
+
+Usage (from the backend directory):
+    python -m benchmarks.history_load_test --scenario mixed --histories 100 --report-chars 20000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+# Importing the agent package compiles the graphs, which requires an API key; none is used here
+os.environ.setdefault("GEMINI_API_KEY", "load-test")
+os.environ.pop("CHECKPOINT_DB_PATH", None)
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+
+from agent.app import app  # noqa: E402
+from agent.history import history_manager  # noqa: E402
+
+SCENARIOS = ("polling", "search", "detail", "mixed")
+SEARCH_TERMS = ["市場", "競合", "AI", "戦略", "規制", "成長率", "存在しない語句"]
+_FILLER = "合成された調査レポートの本文です。市場規模、主要プレイヤー、成長要因、リスクについて述べます。"
+
+Request = Tuple[str, str, str]  # (label, method, path)
+
+
+def synthetic_history(index: int, report_chars: int, rng: random.Random) -> Dict[str, Any]:
+    topic = rng.choice(SEARCH_TERMS[:-1])
+    return {
+        "id": str(uuid.uuid4()),
+        "query": f"{topic}に関する調査 #{index}",
+        "timestamp": datetime.now().isoformat(),
+        "effort": rng.choice(["low", "medium", "high"]),
+        "model": "gemini-2.5-pro",
+        "result": (_FILLER * (report_chars // len(_FILLER) + 1))[:report_chars],
+        "search_queries": [f"{topic} クエリ{i}" for i in range(3)],
+        "sources_count": rng.randint(0, 30),
+        "duration_ms": rng.randint(10_000, 300_000),
+    }
+
+
+def seed_histories(count: int, report_chars: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    histories = [synthetic_history(i, report_chars, rng) for i in range(count)]
+    history_manager._write_histories(histories)
+    return [history["id"] for history in histories]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(port: int) -> uvicorn.Server:
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, name="history-api", daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def request_picker(scenario: str, ids: List[str], rng: random.Random) -> Callable[[], Request]:
+    def listing() -> Request:
+        return "GET /api/history", "GET", "/api/history?limit=20"
+
+    def search() -> Request:
+        return "GET /api/history?search", "GET", f"/api/history?search={rng.choice(SEARCH_TERMS)}"
+
+    def detail() -> Request:
+        return "GET /api/history/{id}", "GET", f"/api/history/{rng.choice(ids)}"
+
+    def delete() -> Request:
+        return "DELETE /api/history/{id}", "DELETE", f"/api/history/{rng.choice(ids)}"
+
+    if scenario == "polling":
+        return listing
+    if scenario == "search":
+        return search
+    if scenario == "detail":
+        return detail
+    mixed = [(listing, 0.6), (search, 0.15), (detail, 0.2), (delete, 0.05)]
+    return lambda: rng.choices([pick for pick, _ in mixed], [weight for _, weight in mixed])[0]()
+
+
+async def client_loop(
+    client: httpx.AsyncClient,
+    pick: Callable[[], Request],
+    stop_at: float,
+    think_time: float,
+    samples: Dict[str, List[float]],
+    errors: Dict[str, int],
+) -> None:
+    while time.perf_counter() < stop_at:
+        label, method, path = pick()
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, path)
+            failed = response.status_code >= 500
+        except httpx.HTTPError:
+            failed = True
+        samples.setdefault(label, []).append(time.perf_counter() - started)
+        if failed:
+            errors[label] = errors.get(label, 0) + 1
+        if think_time:
+            await asyncio.sleep(think_time)
+
+
+def writer_loop(rate: float, report_chars: int, stop: threading.Event, written: List[float]) -> None:
+    rng = random.Random(1)
+    interval = 1.0 / rate
+    while not stop.wait(interval):
+        entry = synthetic_history(len(written), report_chars, rng)
+        started = time.perf_counter()
+        history_manager.save_history(
+            query=entry["query"],
+            effort=entry["effort"],
+            model=entry["model"],
+            result=entry["result"],
+            search_queries=entry["search_queries"],
+            sources_count=entry["sources_count"],
+            duration_ms=entry["duration_ms"],
+        )
+        written.append(time.perf_counter() - started)
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def latency_stats(values: List[float], duration: float) -> Dict[str, float]:
+    ordered = sorted(values)
+    return {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / duration, 2),
+        "p50_ms": round(percentile(ordered, 0.50) * 1000, 2),
+        "p90_ms": round(percentile(ordered, 0.90) * 1000, 2),
+        "p99_ms": round(percentile(ordered, 0.99) * 1000, 2),
+        "max_ms": round(ordered[-1] * 1000, 2) if ordered else 0.0,
+    }
+
+
+async def run_load(args: argparse.Namespace, base_url: str, ids: List[str]) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    pick = request_picker(args.scenario, ids, rng)
+    samples: Dict[str, List[float]] = {}
+    errors: Dict[str, int] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        stop_at = started + args.duration
+        await asyncio.gather(*(
+            client_loop(client, pick, stop_at, args.think_time, samples, errors) for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+    endpoints = {label: latency_stats(values, elapsed) for label, values in sorted(samples.items())}
+    for label, stats in endpoints.items():
+        stats["errors"] = errors.get(label, 0)
+    every_sample = [value for values in samples.values() for value in values]
+    return {"duration_s": round(elapsed, 2), "overall": latency_stats(every_sample, elapsed), "endpoints": endpoints}
+
+
+def print_table(report: Dict[str, Any]) -> None:
+    header = f"{'endpoint':<28}{'requests':>9}{'rps':>9}{'p50 ms':>9}{'p90 ms':>9}{'p99 ms':>9}{'max ms':>9}{'errors':>7}"
+    print(header, file=sys.stderr)
+    print("-" * len(header), file=sys.stderr)
+    rows = list(report["endpoints"].items()) + [("overall", {**report["overall"], "errors": sum(
+        stats["errors"] for stats in report["endpoints"].values())})]
+    for label, stats in rows:
+        print(
+            f"{label:<28}{stats['requests']:>9}{stats['throughput_rps']:>9.1f}{stats['p50_ms']:>9.1f}"
+            f"{stats['p90_ms']:>9.1f}{stats['p99_ms']:>9.1f}{stats['max_ms']:>9.1f}{stats['errors']:>7}",
+            file=sys.stderr,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Load test the search history API")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="mixed")
+    parser.add_argument("--histories", type=int, default=100, help="Number of seeded history entries")
+    parser.add_argument("--report-chars", type=int, default=10000, help="Size of each seeded report")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Pause between a client's requests (s)")
+    parser.add_argument("--writes-per-second", type=float, default=0.0, help="Background save_history() rate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    original_file = history_manager.history_file
+    with tempfile.TemporaryDirectory() as tmp:
+        # Never load test against the real search history
+        history_manager.history_file = os.path.join(tmp, "search_history.json")
+        try:
+            ids = seed_histories(args.histories, args.report_chars, args.seed)
+            server = start_server(free_port())
+            stop_writer = threading.Event()
+            writes: List[float] = []
+            writer = None
+            if args.writes_per_second > 0:
+                writer = threading.Thread(
+                    target=writer_loop, args=(args.writes_per_second, args.report_chars, stop_writer, writes), daemon=True
+                )
+                writer.start()
+            try:
+                report = asyncio.run(run_load(args, f"http://127.0.0.1:{server.config.port}", ids))
+            finally:
+                stop_writer.set()
+                if writer is not None:
+                    writer.join()
+                server.should_exit = True
+        finally:
+            history_manager.history_file = original_file
+
+    if writes:
+        report["background_writes"] = latency_stats(writes, report["duration_s"])
+    report["settings"] = {key: value for key, value in vars(args).items() if key != "output"}
+    report["timestamp"] = time.strftime("%Y-%m-%dT%H:%M:%S%z")
+
+    print_table(report)
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
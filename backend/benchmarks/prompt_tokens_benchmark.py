@@ -0,0 +1,141 @@
+"""Prompt-token savings of compact citation tokens, per node.
+
+Runs the graphs against the fake Gemini backend twice, with markdown-link
+citations (compact_citations=False) and with citation tokens such as
+"[S3-0-12]" (compact_citations=True), and compares the input tokens of the
+chat model calls made by each node. The fake backend returns redirect urls of
+realistic length and its reports reuse the citations of their prompts, so
+drafts carry citations from node to node like real runs do. Tokens are
+estimated (about 4 ASCII characters or 1 CJK character per token).
+
+Usage (from the backend directory):
+    python -m benchmarks.prompt_tokens_benchmark --fan-out 4 --loops 2
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from typing import Any, Dict, List
+
+# agent.graph refuses to import without an API key; the fake backend never uses it
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.pop("CHECKPOINT_DB_PATH", None)
+
+from langchain_core.messages import HumanMessage  # noqa: E402
+
+from agent.history import SearchHistoryManager  # noqa: E402
+from agent.tracing import Span, add_span_processor  # noqa: E402
+from benchmarks.fake_gemini import FakeBackendConfig, LatencyDistribution, install  # noqa: E402
+from benchmarks.graph_benchmark import QUESTION, SpanCollector, graph_module  # noqa: E402
+
+# The academic graph keeps markdown links (its literature searches are not tracked as sources)
+GRAPHS = ("enhanced", "simple")
+
+
+def input_tokens_per_node(spans: List[Span]) -> Dict[str, int]:
+    """Sum the input tokens of llm.call spans under the node span they ran in."""
+    by_id = {s.span_id: s for s in spans}
+    tokens: Dict[str, int] = defaultdict(int)
+    for llm_span in (s for s in spans if s.name == "llm.call"):
+        parent = by_id.get(llm_span.parent_id)
+        while parent is not None and not parent.name.startswith("node."):
+            parent = by_id.get(parent.parent_id)
+        node = parent.attributes.get("node", parent.name) if parent is not None else "(outside nodes)"
+        tokens[node] += int(llm_span.attributes.get("input_tokens", 0))
+    return dict(tokens)
+
+
+def run_once(graph_name: str, compact: bool, args: argparse.Namespace, collector: SpanCollector) -> Dict[str, int]:
+    graph = getattr(graph_module, f"{graph_name}_graph")
+    inputs = {
+        "messages": [HumanMessage(content=QUESTION)],
+        "initial_search_query_count": args.fan_out,
+        "max_research_loops": args.loops,
+    }
+    config = {
+        "configurable": {
+            "compact_citations": compact,
+            "incremental_synthesis": args.incremental_synthesis,
+            # Always critique, so the critique and revision prompts are measured too
+            "critique_skip_threshold": 1.1,
+        }
+    }
+    collector.drain()
+    graph.invoke(inputs, config)
+    return input_tokens_per_node(collector.drain())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure prompt tokens saved by compact citation tokens")
+    parser.add_argument("--graphs", nargs="+", choices=GRAPHS, default=list(GRAPHS))
+    parser.add_argument("--fan-out", type=int, default=4, help="Sub-topics / queries per plan")
+    parser.add_argument("--loops", type=int, default=2, help="max_research_loops")
+    parser.add_argument("--sources-per-search", type=int, default=5)
+    parser.add_argument("--search-response-chars", type=int, default=1500, help="Size of each search answer")
+    parser.add_argument("--revisions", action="store_true", help="Make critique request a revision")
+    parser.add_argument("--incremental-synthesis", action="store_true", help="Draft sections in the researchers")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    if os.getenv("COMPACT_CITATIONS"):
+        parser.error("unset COMPACT_CITATIONS; it overrides the setting this benchmark varies")
+
+    backend = FakeBackendConfig(
+        seed=args.seed,
+        llm_latency=LatencyDistribution("fixed", [0.0]),
+        search_latency=LatencyDistribution("fixed", [0.0]),
+        search_response_chars=args.search_response_chars,
+        fan_out=args.fan_out,
+        sources_per_search=args.sources_per_search,
+        request_revisions=args.revisions,
+    )
+    install(graph_module, backend)
+    collector = SpanCollector()
+    add_span_processor(collector)
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        graph_module.history_manager = SearchHistoryManager(os.path.join(tmp, "search_history.json"))
+        for graph_name in args.graphs:
+            links = run_once(graph_name, False, args, collector)
+            tokens = run_once(graph_name, True, args, collector)
+            for node in sorted(set(links) | set(tokens)):
+                before, after = links.get(node, 0), tokens.get(node, 0)
+                results.append({
+                    "graph": graph_name,
+                    "node": node,
+                    "input_tokens_links": before,
+                    "input_tokens_compact": after,
+                    "saved_pct": round(100 * (before - after) / before, 1) if before else 0.0,
+                })
+
+    header = f"{'graph':<10}{'node':<30}{'links':>10}{'compact':>10}{'saved':>8}"
+    print(header, file=sys.stderr)
+    print("-" * len(header), file=sys.stderr)
+    for r in results:
+        print(
+            f"{r['graph']:<10}{r['node']:<30}{r['input_tokens_links']:>10}{r['input_tokens_compact']:>10}"
+            f"{r['saved_pct']:>7.1f}%",
+            file=sys.stderr,
+        )
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark of the short-url expansion done by finalize_answer().
+
+Builds a synthetic final answer citing a share of the accumulated sources with
+short urls, the way the reasoning model copies them from the research texts,
+and compares utils.expand_short_urls() with the previous per-source loop of
+`short_url in text` plus `text.replace(...)`. The expected output is built
+alongside the report, so both implementations are checked for correctness;
+the old loop can mangle ids that extend another id (".../id/0-1" inside
+".../id/0-12"), which is reported as legacy_mismatch.
+
+Usage (from the backend directory):
+    python -m benchmarks.url_expansion_benchmark --sources 100 500 2000 --report-chars 60000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Any, Dict, List, Tuple
+
+from agent.utils import SHORT_URL_PREFIX, expand_short_urls
+
+_FILLER = "再生可能エネルギー市場は2024年に前年比12%成長し、太陽光と洋上風力が牽引した。"
+
+
+def legacy_expand(text: str, sources: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """The loop finalize_answer() used before expand_short_urls()."""
+    unique_sources = []
+    for source in sources:
+        if source["short_url"] in text:
+            text = text.replace(source["short_url"], source["value"])
+            unique_sources.append(source)
+    return text, unique_sources
+
+
+def synthetic_case(
+    rng: random.Random, sources: int, report_chars: int, cited_fraction: float, branches: int
+) -> Tuple[str, List[Dict[str, Any]], str]:
+    """Returns (report with short urls, sources, expected expanded report)."""
+    per_branch = max(1, sources // branches)
+    source_list = []
+    for i in range(sources):
+        branch, idx = divmod(i, per_branch)
+        source_list.append({
+            "label": f"source{i}",
+            "short_url": f"{SHORT_URL_PREFIX}{branch}-{idx}",
+            "value": f"https://vertexaisearch.cloud.google.com/grounding-api-redirect/{rng.getrandbits(256):064x}",
+        })
+    rng.shuffle(source_list)  # Sources accumulate in completion order across loops
+    cited = rng.sample(source_list, max(1, int(len(source_list) * cited_fraction)))
+
+    parts: List[str] = []
+    expected: List[str] = []
+    length = 0
+    while length < report_chars:
+        source = rng.choice(cited)
+        sentence = _FILLER[: rng.randint(20, len(_FILLER))]
+        parts.append(f"{sentence} [{source['label']}]({source['short_url']})\n")
+        expected.append(f"{sentence} [{source['label']}]({source['value']})\n")
+        length += len(parts[-1])
+    return "".join(parts), source_list, "".join(expected)
+
+
+def time_call(fn: Any, text: str, sources: List[Dict[str, Any]], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(text, sources)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the one-pass short-url expansion")
+    parser.add_argument("--sources", nargs="+", type=int, default=[100, 500, 2000], help="Accumulated sources")
+    parser.add_argument("--report-chars", type=int, default=60_000, help="Length of the final answer")
+    parser.add_argument("--cited-fraction", type=float, default=0.3, help="Share of sources cited in the answer")
+    parser.add_argument("--branches", type=int, default=20, help="Search branches the sources come from")
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per size (best is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report to this file (default: stdout)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    results = []
+    for sources in args.sources:
+        text, source_list, expected = synthetic_case(
+            rng, sources, args.report_chars, args.cited_fraction, args.branches
+        )
+        expanded, used = expand_short_urls(text, source_list)
+        if expanded != expected:
+            raise AssertionError(f"expand_short_urls output is wrong for {sources} sources")
+        legacy_text, _ = legacy_expand(text, source_list)
+        legacy_s = time_call(legacy_expand, text, source_list, args.repeat)
+        one_pass_s = time_call(expand_short_urls, text, source_list, args.repeat)
+        results.append({
+            "sources": sources,
+            "report_chars": len(text),
+            "used_sources": len(used),
+            "legacy_ms": round(legacy_s * 1000, 3),
+            "one_pass_ms": round(one_pass_s * 1000, 3),
+            "speedup": round(legacy_s / one_pass_s, 1) if one_pass_s else None,
+            "legacy_mismatch": legacy_text != expected,
+        })
+
+    header = f"{'sources':>8}{'report chars':>14}{'used':>6}{'legacy ms':>11}{'1-pass ms':>11}{'speedup':>9}{'legacy ok':>11}"
+    print(header, file=sys.stderr)
+    print("-" * len(header), file=sys.stderr)
+    for r in results:
+        print(
+            f"{r['sources']:>8}{r['report_chars']:>14}{r['used_sources']:>6}{r['legacy_ms']:>11.2f}"
+            f"{r['one_pass_ms']:>11.2f}{r['speedup']:>8}x{'no' if r['legacy_mismatch'] else 'yes':>11}",
+            file=sys.stderr,
+        )
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "results": results,
+    }
+    payload = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(payload + "\n")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
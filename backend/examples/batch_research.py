@@ -0,0 +1,69 @@
+import argparse
+import json
+import os
+import sys
+
+
+def read_questions(path: str) -> list[str]:
+    """Read questions from a JSON list or a text file with one question per line."""
+    with open(path, encoding="utf-8") if path != "-" else sys.stdin as f:
+        content = f.read()
+    if content.lstrip().startswith("["):
+        return [str(question) for question in json.loads(content)]
+    return [line.strip() for line in content.splitlines() if line.strip()]
+
+
+def main() -> None:
+    """Research a batch of questions concurrently from the command line."""
+    parser = argparse.ArgumentParser(description="Run the research agent on a batch of questions")
+    parser.add_argument("questions", help="Text file with one question per line, a JSON list, or - for stdin")
+    parser.add_argument("--graph", choices=["enhanced", "simple", "academic"], default="enhanced")
+    parser.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=4,
+        help="Number of questions researched at the same time",
+    )
+    parser.add_argument("--initial-queries", type=int, default=None, help="Number of initial search queries")
+    parser.add_argument("--max-loops", type=int, default=None, help="Maximum number of research loops")
+    parser.add_argument("--reasoning-model", default=None, help="Model for the final answer")
+    parser.add_argument(
+        "--checkpoint-db",
+        default=os.getenv("CHECKPOINT_DB_PATH", ""),
+        help="SQLite file for durable checkpoints (disabled by default for batches)",
+    )
+    parser.add_argument("--output", help="Append the JSON lines to this file instead of stdout")
+    args = parser.parse_args()
+
+    questions = read_questions(args.questions)
+    if not questions:
+        parser.error("no questions found")
+
+    # The graphs pick up the checkpointer when they are compiled at import time
+    os.environ["CHECKPOINT_DB_PATH"] = args.checkpoint_db
+    from agent.batch import run_batch
+
+    state_overrides = {}
+    if args.initial_queries is not None:
+        state_overrides["initial_search_query_count"] = args.initial_queries
+    if args.max_loops is not None:
+        state_overrides["max_research_loops"] = args.max_loops
+    if args.reasoning_model is not None:
+        state_overrides["reasoning_model"] = args.reasoning_model
+
+    out = open(args.output, "a", encoding="utf-8") if args.output else sys.stdout
+    try:
+        # Results are written as soon as each question finishes; the summary comes last
+        for event in run_batch(questions, args.graph, args.max_concurrency, state_overrides):
+            out.write(json.dumps(event, ensure_ascii=False) + "\n")
+            out.flush()
+            if event["type"] == "result":
+                status = "failed" if "error" in event else f"done in {event['duration_ms'] / 1000:.1f}s"
+                print(f"[{event['index'] + 1}/{len(questions)}] {status}: {event['question'][:60]}", file=sys.stderr)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,13 @@
 import argparse
+import os
+import uuid
 from langchain_core.messages import HumanMessage
-from agent.graph import graph
 
 
 def main() -> None:
     """Run the research agent from the command line."""
     parser = argparse.ArgumentParser(description="Run the LangGraph research agent")
-    parser.add_argument("question", help="Research question")
+    parser.add_argument("question", nargs="?", help="Research question")
     parser.add_argument(
         "--initial-queries",
         type=int,
@@ -24,16 +25,60 @@ def main() -> None:
         default="gemini-2.5-pro",
         help="Model for the final answer",
     )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=None,
+        help="Time budget for the run in seconds",
+    )
+    parser.add_argument(
+        "--checkpoint-db",
+        default=os.getenv("CHECKPOINT_DB_PATH", ""),
+        help='SQLite file for durable checkpoints (disabled by default; requires pip install "agent[checkpoint]")',
+    )
+    parser.add_argument(
+        "--thread-id",
+        default=None,
+        help="Thread id of the run (defaults to a new id)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume the run of --thread-id from its last checkpoint",
+    )
     args = parser.parse_args()
 
-    state = {
-        "messages": [HumanMessage(content=args.question)],
-        "initial_search_query_count": args.initial_queries,
-        "max_research_loops": args.max_loops,
-        "reasoning_model": args.reasoning_model,
-    }
+    if args.resume and not args.thread_id:
+        parser.error("--resume requires --thread-id")
+    if args.resume and not args.checkpoint_db:
+        parser.error("--resume requires --checkpoint-db (or CHECKPOINT_DB_PATH)")
+    if not args.resume and not args.question:
+        parser.error("a research question is required unless --resume is given")
+
+    # The graphs pick up the checkpointer when they are compiled at import time
+    os.environ["CHECKPOINT_DB_PATH"] = args.checkpoint_db
+    from agent.graph import graph
+
+    thread_id = args.thread_id or str(uuid.uuid4())
+    config = {}
+    if args.checkpoint_db:
+        config = {"configurable": {"thread_id": thread_id}}
+        print(f"Thread id: {thread_id} (resume with --resume --thread-id {thread_id})")
+
+    if args.resume:
+        # Completed nodes and parallel branches are restored; only unfinished work is redone
+        result = graph.invoke(None, config)
+    else:
+        state = {
+            "messages": [HumanMessage(content=args.question)],
+            "initial_search_query_count": args.initial_queries,
+            "max_research_loops": args.max_loops,
+            "reasoning_model": args.reasoning_model,
+        }
+        if args.deadline is not None:
+            state["run_deadline_seconds"] = args.deadline
+        result = graph.invoke(state, config)
 
-    result = graph.invoke(state)
     messages = result.get("messages", [])
     if messages:
         print(messages[-1].content)
@@ -1,11 +1,16 @@
 # mypy: disable - error - code = "no-untyped-def,misc"
+import json
+import os
 import pathlib
 from fastapi import FastAPI, Response, HTTPException
+from fastapi.responses import StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
+from agent.batch import BATCH_GRAPHS, MAX_BATCH_CONCURRENCY, run_batch
 from agent.history import history_manager
+from agent.metrics import history_file_size_bytes, render_metrics
 
 # Define the FastAPI app
 app = FastAPI()
@@ -28,6 +33,14 @@ class DeleteResponse(BaseModel):
     success: bool
     message: str
 
+class BatchRequest(BaseModel):
+    questions: List[str]
+    graph: str = "enhanced"
+    max_concurrency: int = 4
+    initial_search_query_count: Optional[int] = None
+    max_research_loops: Optional[int] = None
+    reasoning_model: Optional[str] = None
+
 
 # API エンドポイント
 @app.get("/api/history", response_model=HistoryResponse)
@@ -97,12 +110,55 @@ async def clear_all_history():
         return DeleteResponse(success=False, message="履歴の削除に失敗しました")
 
 
+@app.post("/api/batch")
+async def submit_batch(request: BatchRequest):
+    """複数の質問をまとめて調査し、完了した順に結果をNDJSONでストリーミングする
+
+    バッチ内の質問はグラウンディング検索のキャッシュを共有し、同一の質問は一度だけ調査される。
+    最後の行はバッチ全体のサマリー。
+    """
+    if request.graph not in BATCH_GRAPHS:
+        raise HTTPException(status_code=400, detail=f"graphは {', '.join(BATCH_GRAPHS)} のいずれかを指定してください")
+    if not request.questions:
+        raise HTTPException(status_code=400, detail="質問が指定されていません")
+
+    state_overrides = {
+        key: value
+        for key, value in {
+            "initial_search_query_count": request.initial_search_query_count,
+            "max_research_loops": request.max_research_loops,
+            "reasoning_model": request.reasoning_model,
+        }.items()
+        if value is not None
+    }
+    events = run_batch(
+        request.questions,
+        graph_name=request.graph,
+        max_concurrency=min(MAX_BATCH_CONCURRENCY, max(1, request.max_concurrency)),
+        state_overrides=state_overrides,
+    )
+    return StreamingResponse(
+        (json.dumps(event, ensure_ascii=False) + "\n" for event in events),
+        media_type="application/x-ndjson",
+    )
+
+
 @app.get("/api/health")
 async def health_check():
     """ヘルスチェック用エンドポイント"""
     return {"status": "healthy", "message": "Search History API is running"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus形式のメトリクスを返すエンドポイント"""
+    try:
+        history_file_size_bytes.set(os.path.getsize(history_manager.history_file))
+    except OSError:
+        pass
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 def create_frontend_router(build_dir="../frontend/dist"):
     """Creates a router to serve the React frontend.
 
@@ -0,0 +1,114 @@
+import importlib
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+from langchain_core.messages import HumanMessage
+
+from agent.blobs import resolve_blobs
+from agent.cache import SingleFlightCache, normalize_cache_text, shared_search_cache
+
+
+BATCH_GRAPHS = ("enhanced", "simple", "academic")
+# Upper bound of concurrent runs per batch; each run makes its own Gemini calls and searches
+MAX_BATCH_CONCURRENCY = 8
+
+
+def _get_graph(graph_name: str) -> Any:
+    # Imported lazily: compiling the graphs needs GEMINI_API_KEY and the checkpoint settings.
+    # agent/__init__.py re-exports the compiled graph as agent.graph, so fetch the module itself
+    return getattr(importlib.import_module("agent.graph"), f"{graph_name}_graph")
+
+
+def _final_answer(result: Dict[str, Any]) -> str:
+    result = resolve_blobs(result)
+    for key in ("final_report", "academic_draft"):
+        if result.get(key):
+            return result[key]
+    messages = result.get("messages", [])
+    return messages[-1].content if messages else ""
+
+
+def run_batch(
+    questions: Sequence[str],
+    graph_name: str = "enhanced",
+    max_concurrency: int = 4,
+    state_overrides: Optional[Dict[str, Any]] = None,
+    config: Optional[Dict[str, Any]] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Research many questions concurrently, yielding events as they complete.
+
+    Identical questions (after normalization) are researched once. All runs share
+    one grounded search cache, so searches repeated across the batch, such as the
+    searches of a sub-topic that several questions plan, hit the API once, and
+    concurrent duplicates wait for the search already in flight.
+
+    max_concurrency is clamped to 1..MAX_BATCH_CONCURRENCY. Yields one
+    {"type": "result", ...} event per question in completion order, then a
+    {"type": "summary", ...} event.
+    """
+    if graph_name not in BATCH_GRAPHS:
+        raise ValueError(f"Unknown graph '{graph_name}'. Choose from: {', '.join(BATCH_GRAPHS)}")
+    graph = _get_graph(graph_name)
+    search_cache = SingleFlightCache("batch_search")
+    batch_id = uuid.uuid4().hex[:8]
+    started = time.perf_counter()
+
+    # Research each distinct question once; duplicates reuse its result
+    unique: Dict[str, List[int]] = {}
+    for index, question in enumerate(questions):
+        unique.setdefault(normalize_cache_text(question), []).append(index)
+
+    def research(index: int, question: str) -> Dict[str, Any]:
+        run_started = time.perf_counter()
+        state = {"messages": [HumanMessage(content=question)], **(state_overrides or {})}
+        run_config = dict(config or {})
+        # Every run needs its own thread when the graphs are compiled with a checkpointer
+        run_config["configurable"] = {
+            "thread_id": f"batch-{batch_id}-{index}",
+            **run_config.get("configurable", {}),
+        }
+        # Runs execute in worker threads, so the cache is bound inside each of them
+        with shared_search_cache(search_cache):
+            result = graph.invoke(state, run_config)
+        return {
+            "answer": _final_answer(result),
+            "sources_count": len(result.get("source_registry", {})),
+            "duration_ms": int((time.perf_counter() - run_started) * 1000),
+        }
+
+    failed = 0
+    executor = ThreadPoolExecutor(max_workers=min(MAX_BATCH_CONCURRENCY, max(1, max_concurrency)), thread_name_prefix="batch")
+    try:
+        pending = {
+            executor.submit(research, indices[0], questions[indices[0]]): indices
+            for indices in unique.values()
+        }
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                indices = pending.pop(future)
+                error = future.exception()
+                for position, index in enumerate(indices):
+                    event: Dict[str, Any] = {"type": "result", "index": index, "question": questions[index]}
+                    if error is not None:
+                        failed += 1
+                        event["error"] = f"{type(error).__name__}: {error}"
+                    else:
+                        event.update(future.result())
+                        event["deduplicated"] = position > 0
+                    yield event
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    yield {
+        "type": "summary",
+        "graph": graph_name,
+        "questions": len(questions),
+        "unique_questions": len(unique),
+        "succeeded": len(questions) - failed,
+        "failed": failed,
+        "wall_ms": int((time.perf_counter() - started) * 1000),
+        "search_cache": search_cache.stats(),
+    }
@@ -0,0 +1,243 @@
+import functools
+import hashlib
+import logging
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Mapping, Optional, Set, TypeVar
+
+logger = logging.getLogger(__name__)
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+BLOB_REF_PREFIX = "blob:sha256:"
+DEFAULT_MIN_CHARS = 4000
+
+_DIGEST_RE = re.compile(r"[0-9a-f]{64}")
+# Blob references as they appear in serialized checkpoints (msgpack/JSON keep strings as UTF-8)
+_SERIALIZED_REF_RE = re.compile(rb"blob:sha256:([0-9a-f]{64})")
+
+# State fields that hold large texts (or lists of them) and may be offloaded
+BLOB_FIELDS = (
+    "web_research_result",
+    "parallel_research_results",
+    "late_research_results",
+    "draft_report",
+    "final_report",
+    "literature_search_results",
+    "academic_draft",
+)
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+
+def find_blob_digests(data: Optional[bytes]) -> Set[str]:
+    """Digests of the blob references in serialized data (e.g. a checkpoint row)."""
+    if not data:
+        return set()
+    return {match.decode("ascii") for match in _SERIALIZED_REF_RE.findall(bytes(data))}
+
+
+class BlobStore:
+    """Content-addressed store for large texts, kept as files under root_dir.
+
+    put() returns a short reference ("blob:sha256:<digest>") to keep in the graph
+    state instead of the text, so checkpoints and the state copies LangGraph makes
+    between nodes stay small. Identical texts are stored once. Recently used blobs
+    are kept in memory.
+
+    Blob files are not owned by any one thread (identical texts are shared), so
+    they are removed by sweep(), which the checkpointer runs when it prunes stale
+    threads: every blob that no remaining checkpoint references and that was not
+    written or read within the checkpoint TTL is deleted.
+    """
+
+    def __init__(self, root_dir: str, min_chars: int = DEFAULT_MIN_CHARS, cache_size: int = 256):
+        self.root_dir = root_dir
+        self.min_chars = min_chars
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, str]" = OrderedDict()
+
+    def _path(self, digest: str) -> str:
+        return os.path.join(self.root_dir, digest[:2], digest)
+
+    def _remember(self, digest: str, text: str) -> None:
+        with self._lock:
+            self._cache[digest] = text
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def put(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        path = self._path(digest)
+        try:
+            # Mark the blob as in use, so sweep() keeps it until the new state is checkpointed
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write to a unique temp file first so concurrent writers never expose partial blobs
+            tmp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        self._remember(digest, text)
+        return BLOB_REF_PREFIX + digest
+
+    def get(self, ref: str) -> str:
+        digest = ref[len(BLOB_REF_PREFIX):]
+        with self._lock:
+            text = self._cache.get(digest)
+            if text is not None:
+                self._cache.move_to_end(digest)
+                return text
+        try:
+            with open(self._path(digest), "r", encoding="utf-8") as f:
+                text = f.read()
+        except FileNotFoundError:
+            raise KeyError(f"Blob {ref} not found in {self.root_dir}") from None
+        self._remember(digest, text)
+        return text
+
+    def sweep(self, referenced: Iterable[str], max_age_seconds: float) -> int:
+        """Delete the blobs not in referenced (digests) that are older than max_age_seconds.
+
+        The age check spares blobs of runs in flight, whose state may not be
+        checkpointed yet. Returns the number of deleted blobs.
+        """
+        referenced = set(referenced)
+        cutoff = time.time() - max_age_seconds
+        deleted = 0
+        for directory, _, files in os.walk(self.root_dir):
+            for name in files:
+                path = os.path.join(directory, name)
+                is_blob = bool(_DIGEST_RE.fullmatch(name))
+                if (is_blob and name in referenced) or not (is_blob or name.endswith(".tmp")):
+                    continue
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue
+                if is_blob:
+                    deleted += 1
+                    with self._lock:
+                        self._cache.pop(name, None)
+        return deleted
+
+    def offload(self, value: Any) -> Any:
+        """Replace a large text, or the large texts of a list, with blob references."""
+        if isinstance(value, list):
+            return [self.offload(item) for item in value]
+        if isinstance(value, str) and len(value) >= self.min_chars and not is_blob_ref(value):
+            return self.put(value)
+        return value
+
+    def resolve(self, value: Any) -> Any:
+        """Inverse of offload(): replace blob references with their texts."""
+        if isinstance(value, list):
+            return [self.resolve(item) for item in value]
+        if is_blob_ref(value):
+            return self.get(value)
+        return value
+
+
+def create_blob_store(root_dir: Optional[str] = None) -> Optional[BlobStore]:
+    """Create the blob store used by the graph nodes.
+
+    Enabled when root_dir or the BLOB_STORE_DIR environment variable is set;
+    returns None otherwise, in which case the state keeps its texts inline.
+    Texts shorter than BLOB_OFFLOAD_MIN_CHARS stay inline either way.
+    """
+    root_dir = root_dir or os.getenv("BLOB_STORE_DIR")
+    if not root_dir:
+        return None
+    min_chars = int(os.getenv("BLOB_OFFLOAD_MIN_CHARS", DEFAULT_MIN_CHARS))
+    os.makedirs(root_dir, exist_ok=True)
+    logger.info("Offloading state texts of %d+ characters to %s", min_chars, root_dir)
+    return BlobStore(root_dir, min_chars=min_chars)
+
+
+_blob_store: Optional[BlobStore] = None
+_blob_store_created = False
+_blob_store_lock = threading.Lock()
+
+
+def get_blob_store() -> Optional[BlobStore]:
+    """Return the blob store of the process, created on first use.
+
+    Created lazily so that BLOB_STORE_DIR set in a .env file loaded after this
+    module is imported still applies.
+    """
+    global _blob_store, _blob_store_created
+    if not _blob_store_created:
+        with _blob_store_lock:
+            if not _blob_store_created:
+                _blob_store = create_blob_store()
+                _blob_store_created = True
+    return _blob_store
+
+
+def resolve_blobs(state: Mapping[str, Any]) -> Any:
+    """Return state with the blob references of its large text fields resolved.
+
+    Returns state itself when there is nothing to resolve.
+    """
+    blob_store = get_blob_store()
+    if blob_store is None or not isinstance(state, Mapping):
+        return state
+    refs = [
+        key for key in BLOB_FIELDS
+        if key in state and any(is_blob_ref(item) for item in _as_list(state[key]))
+    ]
+    if not refs:
+        return state
+    resolved = dict(state)
+    for key in refs:
+        resolved[key] = blob_store.resolve(state[key])
+    return resolved
+
+
+def offload_blobs_in(update: Any) -> Any:
+    """Return a node's state update with its large text fields offloaded."""
+    blob_store = get_blob_store()
+    if blob_store is None or not isinstance(update, dict):
+        return update
+    offloaded = dict(update)
+    for key in BLOB_FIELDS:
+        if key in offloaded:
+            offloaded[key] = blob_store.offload(offloaded[key])
+    return offloaded
+
+
+def _as_list(value: Any) -> list:
+    return value if isinstance(value, list) else [value]
+
+
+def offload_blobs(fn: F) -> F:
+    """Let a graph node work on plain texts while the state holds blob references.
+
+    References in the incoming state are resolved before the node runs and large
+    texts in its update are offloaded afterwards. Routing functions are wrapped
+    too, since they read the state as well. A no-op without a blob store. Keeps
+    the signature and type hints, like traced_node.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(state: Any, config: Any = None, *args: Any, **kwargs: Any) -> Any:
+        if get_blob_store() is None:
+            return fn(state, config, *args, **kwargs) if config is not None else fn(state, *args, **kwargs)
+        state = resolve_blobs(state)
+        if config is not None:
+            result = fn(state, config, *args, **kwargs)
+        else:
+            result = fn(state, *args, **kwargs)
+        return offload_blobs_in(result)
+
+    return wrapper  # type: ignore[return-value]
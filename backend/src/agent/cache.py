@@ -0,0 +1,247 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Tuple
+
+from agent.metrics import record_cache_lookup
+from agent.utils import char_ngram_similarity, dedupe_queries, normalize_query
+
+logger = logging.getLogger(__name__)
+
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_cache_text(text: str) -> str:
+    """Normalize text for use in cache keys.
+
+    Applies NFKC (full-width/half-width forms), case folding and whitespace
+    collapsing, so trivially different spellings of the same query share a key.
+    """
+    return _WHITESPACE_RE.sub(" ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+class SingleFlightCache:
+    """Thread-safe memo where concurrent callers of the same key share one computation.
+
+    The first caller of a key runs the computation; callers arriving while it is in
+    flight wait for its result instead of starting their own. Successful results are
+    kept for the lifetime of the cache, failures are not cached.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, Future] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Tuple[Any, bool]:
+        """Return (value, hit) for key, computing it at most once at a time."""
+        with self._lock:
+            future = self._entries.get(key)
+            hit = future is not None
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+                future = self._entries[key] = Future()
+        record_cache_lookup(self.name, hit)
+        if hit:
+            return future.result(), True
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                self._entries.pop(key, None)
+            future.set_exception(e)
+            raise
+        future.set_result(value)
+        return value, False
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+# Cache of raw grounded search responses shared by every run in the current context
+# (e.g. all questions of a batch). None outside of such a scope.
+_search_cache: contextvars.ContextVar[Optional[SingleFlightCache]] = contextvars.ContextVar(
+    "agent_search_cache", default=None
+)
+
+
+def active_search_cache() -> Optional[SingleFlightCache]:
+    return _search_cache.get()
+
+
+@contextmanager
+def shared_search_cache(cache: SingleFlightCache) -> Iterator[SingleFlightCache]:
+    """Share grounded search responses between all runs started in this context."""
+    token = _search_cache.set(cache)
+    try:
+        yield cache
+    finally:
+        _search_cache.reset(token)
+
+
+def search_cache_key(model: str, prompt: str, temperature: float) -> Tuple[str, str, float]:
+    return (model, normalize_cache_text(prompt), temperature)
+
+
+class SubTopicCache:
+    """Completed sub-topic research shared across runs, persisted to a JSON file.
+
+    Entries are keyed on the normalized topic name plus the date bucket (day) they
+    were researched on, and hold the merged research text and its sources together
+    with the research question and search queries they were planned for. Lookups
+    return the newest entry of a date bucket within the freshness window whose topic
+    name is similar enough and whose context matches: either the research questions
+    are similar or most of the planned search queries were already run for the entry.
+    The context check keeps generic topic names (e.g. "市場概要") from picking up
+    research done for an unrelated question. The file is re-read only when another
+    process has changed it.
+    """
+
+    MAX_ENTRIES = 500
+
+    def __init__(self, cache_file: str = "sub_topic_cache.json"):
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.cache_file = os.path.join(base_dir, cache_file)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._loaded_mtime: Optional[float] = None
+
+    def _refresh(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.cache_file)
+        except OSError:
+            self._entries, self._loaded_mtime = {}, None
+            return
+        if mtime == self._loaded_mtime:
+            return
+        try:
+            with open(self.cache_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._entries = data if isinstance(data, dict) else {}
+        except (OSError, json.JSONDecodeError):
+            self._entries = {}
+        self._loaded_mtime = mtime
+
+    @staticmethod
+    def date_bucket(timestamp: float) -> str:
+        return date.fromtimestamp(timestamp).isoformat()
+
+    @staticmethod
+    def context_similarity(research_question: str, search_queries: List[str], entry: Dict[str, Any]) -> float:
+        """How related the run is to the one that researched entry (0.0-1.0).
+
+        The larger of the similarity of the normalized research questions and the
+        share of search_queries that nearly duplicate a query of the entry.
+        """
+        question = normalize_query(research_question)
+        question_score = char_ngram_similarity(question, entry.get("question", "")) if question else 0.0
+        query_score = 0.0
+        if search_queries and entry.get("search_queries"):
+            _, dropped = dedupe_queries(search_queries, entry["search_queries"])
+            query_score = sum(1 for d in dropped if d["executed"]) / len(search_queries)
+        return max(question_score, query_score)
+
+    def lookup(
+        self,
+        topic_name: str,
+        research_question: str,
+        search_queries: List[str],
+        max_age_hours: float,
+        min_similarity: float,
+        min_context_similarity: float,
+    ) -> Optional[Dict[str, Any]]:
+        """Return the best fresh entry for topic_name in a related context, or None."""
+        normalized = normalize_cache_text(topic_name)
+        now = time.time()
+        oldest_allowed = now - max_age_hours * 3600
+        oldest_bucket, newest_bucket = self.date_bucket(oldest_allowed), self.date_bucket(now)
+        with self._lock:
+            self._refresh()
+            best, best_score, best_context = None, 0.0, 0.0
+            for entry in self._entries.values():
+                if entry.get("created_at", 0) < oldest_allowed:
+                    continue
+                if not oldest_bucket <= entry.get("date_bucket", "") <= newest_bucket:
+                    continue
+                score = char_ngram_similarity(normalized, entry["normalized_topic"])
+                if score < min_similarity:
+                    continue
+                # Prefer the closest name, then the newest research
+                if not (score > best_score or (score == best_score and entry["created_at"] > best["created_at"])):
+                    continue
+                context_score = self.context_similarity(research_question, search_queries, entry)
+                if context_score >= min_context_similarity:
+                    best, best_score, best_context = entry, score, context_score
+        record_cache_lookup("sub_topic", best is not None)
+        if best is None:
+            return None
+        return {**best, "similarity": round(best_score, 3), "context_similarity": round(best_context, 3)}
+
+    def store(
+        self,
+        topic_name: str,
+        research_question: str,
+        search_queries: List[str],
+        owner_id: Any,
+        text: str,
+        sources: List[Dict[str, Any]],
+        max_age_hours: float,
+    ) -> None:
+        """Save the research of a sub-topic; stale entries are dropped on the way."""
+        normalized = normalize_cache_text(topic_name)
+        now = time.time()
+        bucket = self.date_bucket(now)
+        key = f"{normalized}|{bucket}"
+        with self._lock:
+            self._refresh()
+            entries = {
+                k: v for k, v in self._entries.items()
+                if v.get("created_at", 0) >= now - max_age_hours * 3600
+            }
+            entries[key] = {
+                "topic_name": topic_name,
+                "normalized_topic": normalized,
+                "date_bucket": bucket,
+                "question": normalize_query(research_question),
+                "search_queries": search_queries,
+                "owner_id": str(owner_id),
+                "created_at": now,
+                "text": text,
+                "sources": sources,
+            }
+            if len(entries) > self.MAX_ENTRIES:
+                newest = sorted(entries.items(), key=lambda item: item[1]["created_at"], reverse=True)
+                entries = dict(newest[:self.MAX_ENTRIES])
+            try:
+                tmp_file = f"{self.cache_file}.tmp"
+                with open(tmp_file, "w", encoding="utf-8") as f:
+                    json.dump(entries, f, ensure_ascii=False)
+                os.replace(tmp_file, self.cache_file)
+                self._entries = entries
+                self._loaded_mtime = os.path.getmtime(self.cache_file)
+            except OSError as e:
+                logger.warning("Failed to write the sub-topic cache: %s", e)
+
+
+sub_topic_cache = SubTopicCache()
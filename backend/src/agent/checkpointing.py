@@ -0,0 +1,156 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Optional
+
+from langchain_core.runnables import RunnableConfig
+
+from agent.blobs import BlobStore, find_blob_digests, get_blob_store
+
+try:
+    from langgraph.checkpoint.sqlite import SqliteSaver
+except ImportError:  # optional dependency: pip install "agent[checkpoint]"
+    SqliteSaver = None
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHECKPOINT_TTL_HOURS = 72.0
+# Upper bound on the time between two prunes of a long-running process
+PRUNE_INTERVAL_SECONDS = 3600.0
+
+
+def running_under_langgraph_server() -> bool:
+    """True inside `langgraph dev` and LangGraph server images, which set LANGSERVE_GRAPHS."""
+    return bool(os.getenv("LANGSERVE_GRAPHS"))
+
+
+if SqliteSaver is not None:
+
+    class PruningSqliteSaver(SqliteSaver):
+        """SQLite checkpointer that tracks thread activity so stale threads can be pruned.
+
+        With ttl_seconds, threads idle for longer than that are pruned by prune(),
+        which put() also runs at most once per PRUNE_INTERVAL_SECONDS (or per TTL,
+        when shorter) so that a long-running process keeps the database bounded.
+        """
+
+        def __init__(
+            self,
+            conn: sqlite3.Connection,
+            *,
+            ttl_seconds: Optional[float] = None,
+            blob_store: Optional[BlobStore] = None,
+            **kwargs: Any,
+        ) -> None:
+            super().__init__(conn, **kwargs)
+            self.ttl_seconds = ttl_seconds
+            self.blob_store = blob_store
+            self._prune_lock = threading.Lock()
+            self._next_prune_at = 0.0
+
+        def setup(self) -> None:
+            # cursor() calls setup() while holding self.lock, so do not lock here
+            if self.is_setup:
+                return
+            super().setup()
+            self.conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoint_threads (
+                    thread_id TEXT PRIMARY KEY,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            self.conn.commit()
+
+        def put(self, config: RunnableConfig, checkpoint: Any, metadata: Any, new_versions: Any) -> RunnableConfig:
+            next_config = super().put(config, checkpoint, metadata, new_versions)
+            with self.cursor() as cur:
+                cur.execute(
+                    "INSERT OR REPLACE INTO checkpoint_threads (thread_id, updated_at) VALUES (?, ?)",
+                    (str(config["configurable"]["thread_id"]), time.time()),
+                )
+            if self.ttl_seconds is not None and time.time() >= self._next_prune_at:
+                self.prune()
+            return next_config
+
+        def prune(self) -> int:
+            """Prune threads idle for longer than ttl_seconds; returns how many were pruned."""
+            if self.ttl_seconds is None:
+                return 0
+            with self._prune_lock:
+                now = time.time()
+                # Another thread may have pruned while this one waited for the lock
+                if now < self._next_prune_at:
+                    return 0
+                self._next_prune_at = now + min(self.ttl_seconds, PRUNE_INTERVAL_SECONDS)
+                pruned = self.prune_stale_threads(self.ttl_seconds, self.blob_store)
+            if pruned:
+                logger.info("Pruned checkpoints of %d stale threads", pruned)
+            return pruned
+
+        def prune_stale_threads(self, max_age_seconds: float, blob_store: Optional[BlobStore] = None) -> int:
+            """Delete every checkpoint of threads idle for longer than max_age_seconds.
+
+            With a blob store, the blobs no remaining checkpoint references (those
+            of the pruned threads and of runs that were never checkpointed) are
+            deleted too, once they are older than max_age_seconds. Returns the
+            number of pruned threads.
+            """
+            cutoff = time.time() - max_age_seconds
+            with self.cursor() as cur:
+                cur.execute("SELECT thread_id FROM checkpoint_threads WHERE updated_at < ?", (cutoff,))
+                stale_threads = [row[0] for row in cur.fetchall()]
+                for thread_id in stale_threads:
+                    cur.execute("DELETE FROM checkpoints WHERE thread_id = ?", (thread_id,))
+                    cur.execute("DELETE FROM writes WHERE thread_id = ?", (thread_id,))
+                    cur.execute("DELETE FROM checkpoint_threads WHERE thread_id = ?", (thread_id,))
+                if blob_store is not None:
+                    referenced = set()
+                    for (data,) in cur.execute("SELECT checkpoint FROM checkpoints"):
+                        referenced |= find_blob_digests(data)
+                    for (data,) in cur.execute("SELECT value FROM writes"):
+                        referenced |= find_blob_digests(data)
+            if blob_store is not None:
+                swept = blob_store.sweep(referenced, max_age_seconds)
+                if swept:
+                    logger.info("Deleted %d unreferenced blobs from %s", swept, blob_store.root_dir)
+            return len(stale_threads)
+
+
+def create_checkpointer(db_path: Optional[str] = None) -> Optional[Any]:
+    """Create the durable SQLite checkpointer shared by the compiled graphs.
+
+    Enabled when db_path or the CHECKPOINT_DB_PATH environment variable is set;
+    returns None otherwise. CHECKPOINT_DB_PATH is ignored under the LangGraph
+    server, which brings its own persistence (it also loads .env, so the variable
+    may well be set there). Threads idle for longer than CHECKPOINT_TTL_HOURS are
+    pruned, with the blobs only they referenced, when the checkpointer is created
+    and then periodically while checkpoints are written.
+    """
+    if not db_path and running_under_langgraph_server():
+        if os.getenv("CHECKPOINT_DB_PATH"):
+            logger.info("Ignoring CHECKPOINT_DB_PATH: the LangGraph server provides the checkpointer")
+        return None
+    db_path = db_path or os.getenv("CHECKPOINT_DB_PATH")
+    if not db_path:
+        return None
+    if SqliteSaver is None:
+        raise ImportError(
+            "CHECKPOINT_DB_PATH is set but langgraph-checkpoint-sqlite is not installed. "
+            'Install it with: pip install "agent[checkpoint]"'
+        )
+
+    directory = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(directory, exist_ok=True)
+
+    # Parallel branches run in worker threads, so the connection must be shareable
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    ttl_hours = float(os.getenv("CHECKPOINT_TTL_HOURS", DEFAULT_CHECKPOINT_TTL_HOURS))
+    checkpointer = PruningSqliteSaver(conn, ttl_seconds=ttl_hours * 3600, blob_store=get_blob_store())
+    checkpointer.setup()
+    checkpointer.prune()
+    return checkpointer
@@ -39,6 +39,125 @@ class Configuration(BaseModel):
         metadata={"description": "The maximum number of research loops to perform."},
     )
 
+    fast_model: str = Field(
+        default="gemini-2.5-flash",
+        metadata={
+            "description": "The name of the faster, cheaper language model used by the nodes that low effort runs downgrade."
+        },
+    )
+
+    effort_level: Optional[str] = Field(
+        default=None,
+        metadata={
+            "description": "Effort profile of the enhanced graph: 'low', 'medium' or 'high'. Bounds the planned sub-topics, the search queries per sub-topic, the model tier per node and whether the critique runs. Unset means the level implied by initial_search_query_count and max_research_loops."
+        },
+    )
+
+    min_loop_novelty: float = Field(
+        default=0.15,
+        metadata={
+            "description": "Minimum novelty (0.0-1.0: share of new text and new sources) a research loop must add over the previous loops. Below it, the simple graph stops looping without another reflection call. 0 disables the check."
+        },
+    )
+
+    follow_up_query_similarity: float = Field(
+        default=0.7,
+        metadata={
+            "description": "Similarity (character bigram Jaccard of normalized queries) at or above which a follow-up query counts as a duplicate of an executed or earlier follow-up query and is not searched. Above 1.0 disables the filter."
+        },
+    )
+
+    critique_skip_threshold: float = Field(
+        default=0.8,
+        metadata={
+            "description": "Local quality score (0.0-1.0) at or above which the LLM critique pass is skipped. Set above 1.0 to always run the critique."
+        },
+    )
+
+    incremental_synthesis: bool = Field(
+        default=False,
+        metadata={
+            "description": "Draft each report section as soon as its sub-topic research completes, so the final synthesis only writes the introduction and conclusion."
+        },
+    )
+
+    compact_citations: bool = Field(
+        default=True,
+        metadata={
+            "description": "Cite sources with short [S<id>] tokens instead of markdown links in the intermediate research texts and drafts, to save prompt tokens; links are restored in the final report."
+        },
+    )
+
+    conversation_window_tokens: int = Field(
+        default=4000,
+        metadata={
+            "description": "Token budget of the recent conversation turns included in full in prompts. Earlier turns of the thread are replaced by a rolling summary."
+        },
+    )
+
+    conversation_summary_tokens: int = Field(
+        default=500,
+        metadata={
+            "description": "Maximum length in tokens of the rolling summary of earlier conversation turns."
+        },
+    )
+
+    max_concurrent_searches_per_topic: int = Field(
+        default=3,
+        metadata={
+            "description": "The maximum number of grounded searches run concurrently for a single sub-topic."
+        },
+    )
+
+    run_deadline_seconds: Optional[float] = Field(
+        default=None,
+        metadata={
+            "description": "Time budget for a whole research run in seconds. Near the deadline, nodes skip optional work (extra reflection loops, critique, revision) and cap fan-out so the best available report is returned in time. Unset means no deadline."
+        },
+    )
+
+    research_quorum_fraction: float = Field(
+        default=1.0,
+        metadata={
+            "description": "Fraction of parallel research branches that must finish before aggregation proceeds. Below 1.0 (or with branch_timeout_seconds set) straggling branches no longer stall the run."
+        },
+    )
+
+    branch_timeout_seconds: Optional[float] = Field(
+        default=None,
+        metadata={
+            "description": "Maximum time, counted from the start of a fan-out, to wait for its parallel research branches as a whole before proceeding with the ones that finished. Not a per-branch timeout: every branch shares this one budget."
+        },
+    )
+
+    late_result_policy: str = Field(
+        default="drop",
+        metadata={
+            "description": "What to do with branches that finish after the quorum: 'drop' records them in run metadata, 'fold' integrates them in the revision pass."
+        },
+    )
+
+    sub_topic_cache_ttl_hours: Optional[float] = Field(
+        default=None,
+        metadata={
+            "description": "Reuse sub-topic research from earlier runs that is at most this many hours old. Disabled when not set."
+        },
+    )
+
+    sub_topic_cache_similarity: float = Field(
+        default=0.85,
+        metadata={
+            "description": "Minimum similarity (character bigram Jaccard) between normalized topic names for a cached sub-topic to be reused. 1.0 requires an exact match."
+        },
+    )
+
+    sub_topic_cache_context_similarity: float = Field(
+        default=0.4,
+        metadata={
+            "description": "Minimum relatedness of the run to the one that researched a cached sub-topic: the larger of the research question similarity and the share of planned search queries already run for it."
+        },
+    )
+
     @classmethod
     def from_runnable_config(
         cls, config: Optional[RunnableConfig] = None
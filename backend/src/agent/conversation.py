@@ -0,0 +1,135 @@
+"""Bounded conversation context for multi-turn threads.
+
+Prompts receive the research topic of the current turn: the most recent turns
+of the thread in full, within a token budget, preceded by a rolling summary of
+the earlier turns. The summary is kept in state ("conversation_summary") and
+extended once per turn with only the messages that left the window, so prompt
+sizes stay flat as a thread grows instead of carrying every previous report.
+"""
+
+import logging
+import re
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+
+logger = logging.getLogger(__name__)
+
+_NON_ASCII_RE = re.compile(r"[^\x00-\x7f]")
+
+SUMMARY_HEADER = "これまでの会話の要約:"
+
+
+def estimate_tokens(text: Any) -> int:
+    """Rough Gemini token count: about 4 ASCII characters or 1 CJK character per token."""
+    text = str(text)
+    non_ascii = len(_NON_ASCII_RE.findall(text))
+    return non_ascii + (len(text) - non_ascii) // 4
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to about max_tokens (as counted by estimate_tokens), marking the cut."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    budget = max_tokens * 4  # in quarter tokens
+    for i, char in enumerate(text):
+        budget -= 1 if char < "\x80" else 4
+        if budget < 0:
+            return text[:i].rstrip() + " …"
+    return text
+
+
+def format_message(message: AnyMessage) -> str:
+    """A message as a transcript line, the way get_research_topic() writes it."""
+    if isinstance(message, HumanMessage):
+        return f"User: {message.content}\n"
+    if isinstance(message, AIMessage):
+        return f"Assistant: {message.content}\n"
+    return ""
+
+
+def turn_starts(messages: List[AnyMessage]) -> List[int]:
+    """Indices of the messages starting a turn (each user message, and the first message)."""
+    return [i for i, message in enumerate(messages) if i == 0 or isinstance(message, HumanMessage)]
+
+
+def window_start(messages: List[AnyMessage], summarized: int, max_tokens: int) -> int:
+    """Index of the first message kept in full.
+
+    Whole turns are added from the most recent backwards while they fit in
+    max_tokens; the current turn is always kept. Messages before summarized are
+    already covered by the summary and never re-enter the window.
+    """
+    starts = turn_starts(messages)
+    start = starts[-1]
+    used = sum(estimate_tokens(format_message(m)) for m in messages[start:])
+    for turn_start in reversed(starts[:-1]):
+        if turn_start < summarized:
+            break
+        cost = sum(estimate_tokens(format_message(m)) for m in messages[turn_start:start])
+        if used + cost > max_tokens:
+            break
+        used += cost
+        start = turn_start
+    return max(start, summarized)
+
+
+def extractive_summary(summary: str, messages: List[AnyMessage], max_tokens: int) -> str:
+    """Fallback summary without a model call: the earlier user requests, shortened."""
+    lines = [summary] if summary else []
+    for message in messages:
+        if isinstance(message, HumanMessage):
+            lines.append(f"- User: {truncate_to_tokens(str(message.content), 60)}")
+    return truncate_to_tokens("\n".join(lines), max_tokens)
+
+
+class ConversationView(NamedTuple):
+    """Research topic of a turn and the summary state to keep for the next turn."""
+
+    topic: str
+    summary: Dict[str, Any]  # {"text": rolling summary, "messages": number of messages it covers}
+
+
+def resolve_conversation(
+    messages: List[AnyMessage],
+    previous_summary: Optional[Dict[str, Any]],
+    max_tokens: int,
+    summary_tokens: int,
+    summarize: Callable[[str, str], str],
+) -> ConversationView:
+    """Bounded research topic of the current turn.
+
+    summarize(previous summary text, transcript of the evicted messages) returns
+    the new summary text; it is only called when messages leave the window, so
+    a turn costs at most one summarization. Threads that fit in max_tokens get
+    exactly the text of get_research_topic().
+    """
+    previous_summary = previous_summary or {}
+    if len(messages) <= 1:
+        return ConversationView(messages[-1].content if messages else "", previous_summary)
+
+    text = previous_summary.get("text", "")
+    summarized = previous_summary.get("messages", 0)
+    if summarized > turn_starts(messages)[-1]:
+        # The summary covers messages this thread does not have (e.g. edited history)
+        text, summarized = "", 0
+
+    start = window_start(messages, summarized, max_tokens)
+    if start > summarized:
+        evicted = messages[summarized:start]
+        transcript = "".join(
+            format_message(m.model_copy(update={"content": truncate_to_tokens(str(m.content), max_tokens)}))
+            for m in evicted
+        )
+        try:
+            text = summarize(text, transcript)
+        except Exception as e:
+            logger.warning("Conversation summary failed, keeping the earlier requests only: %s", e)
+            text = extractive_summary(text, evicted, summary_tokens)
+        text = truncate_to_tokens(text.strip(), summary_tokens)
+        summarized = start
+
+    topic = "".join(format_message(m) for m in messages[start:])
+    if text:
+        topic = f"{SUMMARY_HEADER}\n{text}\n\n{topic}"
+    return ConversationView(topic, {"text": text, "messages": summarized})
@@ -0,0 +1,52 @@
+import math
+import time
+from typing import Any, Optional, Sequence
+
+from agent.configuration import Configuration
+
+
+# Share of the run budget kept in reserve for the final answer/report step.
+# Once less than this remains, optional work (reflection loops, critique, revision,
+# academic review) is skipped and the graph falls through to its final node.
+DEADLINE_RESERVE_FRACTION = 0.25
+
+
+def get_deadline_seconds(state: dict, configurable: Configuration) -> Optional[float]:
+    """Return the run's time budget in seconds (state overrides configuration), or None."""
+    deadline = state.get("run_deadline_seconds")
+    if deadline is None:
+        deadline = configurable.run_deadline_seconds
+    if deadline is None or deadline <= 0:
+        return None
+    return float(deadline)
+
+
+def time_remaining(state: dict, configurable: Configuration) -> Optional[float]:
+    """Seconds left before the run deadline, or None when the run has no deadline."""
+    deadline = get_deadline_seconds(state, configurable)
+    if deadline is None:
+        return None
+    start_time = state.get("start_time") or time.time()
+    return deadline - (time.time() - start_time)
+
+
+def should_wrap_up(state: dict, configurable: Configuration) -> bool:
+    """Whether the run must skip optional work and go straight to its final step."""
+    deadline = get_deadline_seconds(state, configurable)
+    if deadline is None:
+        return False
+    return time_remaining(state, configurable) < deadline * DEADLINE_RESERVE_FRACTION
+
+
+def cap_fan_out(items: Sequence[Any], state: dict, configurable: Configuration) -> list:
+    """Limit a fan-out in proportion to the share of the time budget that is left.
+
+    Always keeps at least one item so the run still produces a result.
+    """
+    items = list(items)
+    deadline = get_deadline_seconds(state, configurable)
+    if deadline is None or not items:
+        return items
+    remaining_ratio = max(0.0, time_remaining(state, configurable)) / deadline
+    limit = max(1, math.ceil(len(items) * remaining_ratio))
+    return items[:limit]
@@ -0,0 +1,64 @@
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from agent.configuration import Configuration
+
+
+@dataclass(frozen=True)
+class EffortProfile:
+    """Research budget of the enhanced graph for one effort level."""
+    name: str
+    min_sub_topics: int
+    max_sub_topics: int
+    queries_per_sub_topic: int
+    # "never": skip the LLM critique, "auto": the local quality pre-screen decides, "always": always critique
+    critique: str
+    # Nodes that run on Configuration.fast_model instead of their usual model
+    fast_nodes: Tuple[str, ...] = ()
+
+
+EFFORT_PROFILES: Dict[str, EffortProfile] = {
+    "low": EffortProfile("low", 1, 2, 1, "never", fast_nodes=("enhanced_planner", "focused_researcher")),
+    "medium": EffortProfile("medium", 3, 5, 3, "auto"),
+    "high": EffortProfile("high", 5, 8, 4, "always"),
+}
+DEFAULT_EFFORT = "medium"
+
+
+def effort_from_budget(initial_search_query_count: Optional[int], max_research_loops: Optional[int]) -> Optional[str]:
+    """Effort level implied by the budget the frontend sends (low 1/1, medium 3/3, high 5/10)."""
+    budget = initial_search_query_count if initial_search_query_count is not None else max_research_loops
+    if budget is None or budget <= 0:
+        return None
+    if budget <= 1:
+        return "low"
+    if budget >= 5:
+        return "high"
+    return "medium"
+
+
+def resolve_effort(state: dict, configurable: Configuration) -> EffortProfile:
+    """Effort profile of a run.
+
+    Configuration.effort_level wins, then the level implied by
+    initial_search_query_count / max_research_loops in the input, then the
+    effort_level of the state, then DEFAULT_EFFORT.
+    """
+    for level in (
+        configurable.effort_level,
+        effort_from_budget(state.get("initial_search_query_count"), state.get("max_research_loops")),
+        state.get("effort_level"),
+    ):
+        if level in EFFORT_PROFILES:
+            return EFFORT_PROFILES[level]
+    return EFFORT_PROFILES[DEFAULT_EFFORT]
+
+
+def get_effort_profile(state: dict) -> EffortProfile:
+    """Effort profile recorded in the state by the planner (DEFAULT_EFFORT if none)."""
+    return EFFORT_PROFILES.get(state.get("effort_level"), EFFORT_PROFILES[DEFAULT_EFFORT])
+
+
+def effort_model(profile: EffortProfile, node: str, model: str, configurable: Configuration) -> str:
+    """Model a node uses under the profile: the fast model for the profile's fast nodes, model otherwise."""
+    return configurable.fast_model if node in profile.fast_nodes else model
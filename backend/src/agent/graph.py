@@ -8,6 +8,7 @@ from agent.tools_and_schemas import (
     SubTopicResearch, 
     CitedAnswer, 
     CritiqueAssessment,
+    ReportFraming,
     # Academic Research Framework Schemas
     AcademicBackground,
     AcademicFramework,
@@ -24,11 +25,14 @@ from langchain_core.runnables import RunnableConfig
 from google.genai import Client
 
 from agent.state import (
-    OverallState,
+    EnhancedResearchState,
+    SimpleResearchState,
+    AcademicResearchState,
     QueryGenerationState,
     ReflectionState,
     ResearchPlanState,
     WebSearchState,
+    QuorumResearchState,
     PlannerState,
     ParallelResearchState,
     SynthesisState,
@@ -49,7 +53,11 @@ from agent.prompts import (
     PLANNER_PROMPT,
     RESEARCHER_PROMPT,
     SYNTHESIZER_PROMPT,
+    SECTION_DRAFT_PROMPT,
+    INTEGRATION_PROMPT,
     CRITIQUE_PROMPT,
+    SECTION_REVISION_PROMPT,
+    CONVERSATION_SUMMARY_PROMPT,
     # Academic Research Framework Prompts
     ACADEMIC_BACKGROUND_PROMPT,
     ACADEMIC_FRAMEWORK_PROMPT,
@@ -60,12 +68,36 @@ from agent.prompts import (
 )
 from langchain_google_genai import ChatGoogleGenerativeAI
 from agent.utils import (
-    get_citations,
-    get_research_topic,
-    insert_citation_markers,
-    resolve_urls
+    cite_grounded_response,
+    citation_token,
+    dedupe_queries,
+    dedupe_sources,
+    compact_sources,
+    expand_sources,
+    expand_citations,
+    match_section_revisions,
+    merge_research_texts,
+    rebase_citation_ids,
+    split_report_sections
 )
 from agent.history import history_manager
+from agent.checkpointing import create_checkpointer
+from agent.quality import LoopNovelty, score_draft_report, score_loop_novelty
+from agent.deadline import cap_fan_out, should_wrap_up
+from agent.effort import effort_model, get_effort_profile, resolve_effort
+from agent.quorum import fold_late_results, merge_branch_updates, quorum_enabled, run_with_quorum
+import agent.metrics  # noqa: F401  (registers the run, node and LLM metric collectors)
+from agent.metrics import count_genai_retries, record_follow_up_queries
+from agent.cache import active_search_cache, search_cache_key
+from agent.blobs import offload_blobs
+from agent.conversation import ConversationView, resolve_conversation
+from agent.run_context import RunContext, get_run_context
+from agent.structured_output import structured_output
+from agent.tracing import add_span_event, propagate_context, record_search_usage, set_span_attributes, span, traced_node
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Optional
+import logging
 import time
 
 load_dotenv()
@@ -74,43 +106,159 @@ if os.getenv("GEMINI_API_KEY") is None:
     raise ValueError("GEMINI_API_KEY is not set")
 
 # Used for Google Search API
-genai_client = Client(api_key=os.getenv("GEMINI_API_KEY"))
+genai_client = count_genai_retries(Client(api_key=os.getenv("GEMINI_API_KEY")))
+
+logger = logging.getLogger(__name__)
+
+
+NOT_FOUND_TEXT = "該当する情報は見つかりませんでした。"
+
+
+def chat_model(context: RunContext, model: str, temperature: float) -> ChatGoogleGenerativeAI:
+    """Chat model client of the run for (model, temperature), created on first use."""
+    return context.memo(
+        ("chat_model", model, temperature),
+        lambda: ChatGoogleGenerativeAI(
+            model=model,
+            temperature=temperature,
+            max_retries=2,
+            api_key=context.api_key,
+        ),
+    )
+
+
+def conversation_view(state, context: RunContext) -> ConversationView:
+    """Research topic of the current turn (recent turns in full, earlier ones summarized).
+
+    Resolved once per run; entry nodes return its summary as conversation_summary
+    so the next turn of the thread only summarizes the messages it evicts.
+    """
+    configurable = context.configurable
+    messages = state["messages"]
+
+    def summarize(summary: str, transcript: str) -> str:
+        llm = chat_model(context, configurable.query_generator_model, temperature=0)
+        prompt = CONVERSATION_SUMMARY_PROMPT.format(
+            summary=summary or "（なし）",
+            transcript=transcript,
+            max_words=configurable.conversation_summary_tokens,
+        )
+        return llm.invoke(prompt).content
+
+    return context.memo(
+        ("conversation", len(messages)),
+        lambda: resolve_conversation(
+            messages,
+            state.get("conversation_summary"),
+            configurable.conversation_window_tokens,
+            configurable.conversation_summary_tokens,
+            summarize,
+        ),
+    )
+
+
+def grounded_search(
+    prompt: str, model: str, id, temperature: float = 0, compact_citations: bool = False
+) -> tuple[str, list]:
+    """Runs a single Google Search grounded generation and resolves its citations.
+    
+    Uses the google genai client as the langchain client doesn't return grounding metadata.
+    Returns the response text with citation markers inserted and the list of cited
+    source segments. With compact_citations the markers are citation tokens
+    ("[S<id>-<index>]") that the final report step expands into links.
+    Exceptions from the API are propagated to the caller.
+    """
+
+    def search():
+        return genai_client.models.generate_content(
+            model=model,
+            contents=prompt,
+            config={
+                "tools": [{"google_search": {}}],
+                "temperature": temperature,
+            },
+        )
+
+    with span("search.grounded", model=model, branch_id=str(id)):
+        # Inside a batch, identical searches of all questions share one API call.
+        # The raw response is shared, so citation ids below still come from this call's id
+        cache = active_search_cache()
+        if cache is None:
+            response, cache_hit = search(), False
+        else:
+            response, cache_hit = cache.get_or_compute(search_cache_key(model, prompt, temperature), search)
+            set_span_attributes(cache_hit=cache_hit)
+        if not cache_hit:
+            record_search_usage(response)
+    
+    # Safely process citations
+    grounding_chunks = None
+    if (response and 
+        hasattr(response, 'candidates') and 
+        response.candidates and 
+        len(response.candidates) > 0 and
+        hasattr(response.candidates[0], 'grounding_metadata') and
+        response.candidates[0].grounding_metadata and
+        hasattr(response.candidates[0].grounding_metadata, 'grounding_chunks')):
+        grounding_chunks = response.candidates[0].grounding_metadata.grounding_chunks
+    
+    if grounding_chunks is None:
+        # Fallback when no grounding metadata available
+        text = response.text if response and hasattr(response, 'text') else None
+        return text or NOT_FOUND_TEXT, []
+    
+    return cite_grounded_response(response, id, compact_markers=compact_citations)
 
 
 # Enhanced Multi-Agent Nodes for Deep Research Architecture
 
-def enhanced_planner(state: OverallState, config: RunnableConfig) -> PlannerState:
+@traced_node
+@offload_blobs
+def enhanced_planner(state: EnhancedResearchState, config: RunnableConfig) -> PlannerState:
     """Enhanced planner that creates structured research plan with sub-topics.
     
     Creates a hierarchical research plan with multiple sub-topics that can be executed 
     by parallel researcher agents. This approach enables comprehensive coverage of 
     complex topics through focused, parallel investigation of different aspects.
     """
-    configurable = Configuration.from_runnable_config(config)
+    start_time = time.time()
+    context = get_run_context(config)
+    configurable = context.configurable
+    # The effort profile bounds the plan and is recorded for the later nodes
+    effort = resolve_effort(state, configurable)
     
     # Initialize Gemini 2.5 Pro for enhanced planning
-    llm = ChatGoogleGenerativeAI(
-        model=configurable.query_generator_model,
-        temperature=0.3,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
+    llm = chat_model(
+        context, effort_model(effort, "enhanced_planner", configurable.query_generator_model, configurable), temperature=0.3
     )
-    structured_llm = llm.with_structured_output(StructuredResearchPlan)
+    structured_llm = structured_output(llm, StructuredResearchPlan)
     
     # Format the enhanced planner prompt
-    user_question = get_research_topic(state["messages"])
-    formatted_prompt = PLANNER_PROMPT.format(user_question=user_question)
+    conversation = conversation_view(state, context)
+    user_question = conversation.topic
+    formatted_prompt = PLANNER_PROMPT.format(
+        user_question=user_question,
+        min_sub_topics=effort.min_sub_topics,
+        max_sub_topics=effort.max_sub_topics,
+        queries_per_sub_topic=effort.queries_per_sub_topic,
+    )
     
     # Generate the structured research plan
     result = structured_llm.invoke(formatted_prompt)
     
-    # Convert to state format
+    # Convert to state format, holding the plan to the effort profile's bounds
     sub_topics_list = []
-    for sub_topic in result.sub_topics:
+    for sub_topic in result.sub_topics[:effort.max_sub_topics]:
         sub_topics_list.append({
             "topic_name": sub_topic.topic_name,
-            "search_queries": sub_topic.search_queries
+            "search_queries": sub_topic.search_queries[:effort.queries_per_sub_topic]
         })
+    add_span_event(
+        "planner.effort",
+        effort_level=effort.name,
+        planned_sub_topics=len(result.sub_topics),
+        sub_topics=len(sub_topics_list),
+    )
     
     return {
         "structured_plan": {
@@ -119,110 +267,240 @@ def enhanced_planner(state: OverallState, config: RunnableConfig) -> PlannerStat
             "estimated_depth": result.estimated_depth
         },
         "current_phase": "planning",
-        "start_time": time.time(),
+        "start_time": start_time,
         "original_query": user_question,
-        "effort_level": "comprehensive",  # Enhanced planning implies comprehensive research
+        "conversation_summary": conversation.summary,
+        "effort_level": effort.name,
         "revision_count": 0
     }
 
 
-def run_parallel_research(state: OverallState, config: RunnableConfig):
+@traced_node
+@offload_blobs
+def run_parallel_research(state: EnhancedResearchState, config: RunnableConfig):
     """Dispatcher node that launches parallel researcher agents.
     
     Distributes research sub-topics to multiple specialized researcher agents that can 
     work in parallel. Uses LangGraph's Send directive to spawn multiple parallel research branches,
     enabling efficient and comprehensive information gathering across different aspects of the topic.
     """
+    context = get_run_context(config)
+    configurable = context.configurable
     structured_plan = state.get("structured_plan", {})
-    sub_topics = structured_plan.get("sub_topics", [])
+    # Fewer branches when part of the run's time budget is already spent
+    sub_topics = cap_fan_out(structured_plan.get("sub_topics", []), state, configurable)
+    
+    payloads = [
+        {
+            "topic_name": sub_topic["topic_name"],
+            "search_queries": sub_topic["search_queries"],
+            "sub_topic_id": str(idx),
+            "research_question": structured_plan.get("research_question", ""),
+            "effort_level": get_effort_profile(state).name,
+        }
+        for idx, sub_topic in enumerate(sub_topics)
+    ]
+    
+    # Straggler mitigation: a single quorum node runs the branches and proceeds early
+    if quorum_enabled(configurable):
+        return [Send("quorum_research", {"branches": payloads})]
     
     # Create parallel Send directives for each sub-topic
-    parallel_sends = []
-    for idx, sub_topic in enumerate(sub_topics):
-        parallel_sends.append(
-            Send(
-                "focused_researcher",
-                {
-                    "topic_name": sub_topic["topic_name"],
-                    "search_queries": sub_topic["search_queries"],
-                    "sub_topic_id": str(idx)
-                }
-            )
-        )
+    return [Send("focused_researcher", payload) for payload in payloads]
+
+
+@traced_node
+@offload_blobs
+def quorum_research(state: QuorumResearchState, config: RunnableConfig) -> EnhancedResearchState:
+    """Runs the focused researchers and proceeds once a quorum of them has finished.
+    
+    Used instead of the plain Send fan-out when research_quorum_fraction < 1.0 or
+    branch_timeout_seconds (a bound on the whole fan-out) is set, so the run's tail
+    latency is set by the typical branch rather than the slowest one. Late branches
+    are recorded in run_metadata and, to be folded in later, in pending_late_branches.
+    """
+    context = get_run_context(config)
+    configurable = context.configurable
+    branches = state["branches"]
+    
+    updates, metadata, pending = run_with_quorum(
+        lambda payload: focused_researcher(payload, config),
+        branches,
+        [branch["topic_name"] for branch in branches],
+        configurable,
+    )
     
-    return parallel_sends
+    update = merge_branch_updates(updates)
+    if metadata:
+        update["run_metadata"] = metadata
+    if pending:
+        update["pending_late_branches"] = pending
+    return update
 
 
-def focused_researcher(state: ParallelResearchState, config: RunnableConfig) -> OverallState:
+@traced_node
+@offload_blobs
+def focused_researcher(state: ParallelResearchState, config: RunnableConfig) -> EnhancedResearchState:
     """Focused researcher agent for single sub-topic.
     
     Specialized researcher that focuses exclusively on one sub-topic to ensure deep, 
     comprehensive coverage without interference from other topics. This targeted approach
     enables higher quality research results for each specific area of investigation.
     """
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
+    cache_ttl_hours = configurable.sub_topic_cache_ttl_hours
+    research_question = state.get("research_question", "")
+    
+    # Reuse fresh research of the same (or a very similar) sub-topic from an earlier run
+    # of a related question
+    cached = None
+    if cache_ttl_hours:
+        cached = context.sub_topic_cache.lookup(
+            state["topic_name"],
+            research_question,
+            state.get("search_queries", []),
+            cache_ttl_hours,
+            configurable.sub_topic_cache_similarity,
+            configurable.sub_topic_cache_context_similarity,
+        )
+        set_span_attributes(cache_hit=cached is not None)
+    if cached is not None:
+        modified_text, sources_gathered = rebase_citation_ids(
+            cached["text"], cached["sources"], cached["owner_id"], state["sub_topic_id"]
+        )
+        add_span_event(
+            "sub_topic_cache.hit",
+            cached_topic=cached["topic_name"],
+            similarity=cached["similarity"],
+            context_similarity=cached["context_similarity"],
+        )
+        return build_sub_topic_update(state, modified_text, sources_gathered, context, reused_from={
+            "topic_name": state["topic_name"],
+            "cached_topic_name": cached["topic_name"],
+            "similarity": cached["similarity"],
+            "context_similarity": cached["context_similarity"],
+            "researched_at": datetime.fromtimestamp(cached["created_at"]).isoformat(timespec="seconds"),
+        })
     
-    # Format the specialized researcher prompt
-    formatted_prompt = RESEARCHER_PROMPT.format(sub_topic=state["topic_name"])
+    # Each planned query becomes its own grounded search; fall back to the topic itself
+    search_queries = state.get("search_queries") or [state["topic_name"]]
+    search_model = effort_model(
+        get_effort_profile(state), "focused_researcher", configurable.query_generator_model, configurable
+    )
     
-    # Use Google Search for this sub-topic
-    try:
-        response = genai_client.models.generate_content(
-            model=configurable.query_generator_model,
-            contents=formatted_prompt,
-            config={
-                "tools": [{"google_search": {}}],
-                "temperature": 0,
-            },
+    def search_one(query_idx: int, query: str) -> tuple[str, list]:
+        formatted_prompt = RESEARCHER_PROMPT.format(
+            sub_topic=f"{state['topic_name']}（検索クエリ: {query}）"
         )
-        
-        # Safely process citations for this sub-topic
-        grounding_chunks = None
-        if (response and 
-            hasattr(response, 'candidates') and 
-            response.candidates and 
-            len(response.candidates) > 0 and
-            hasattr(response.candidates[0], 'grounding_metadata') and
-            response.candidates[0].grounding_metadata and
-            hasattr(response.candidates[0].grounding_metadata, 'grounding_chunks')):
-            grounding_chunks = response.candidates[0].grounding_metadata.grounding_chunks
-        
-        if grounding_chunks is not None:
-            resolved_urls = resolve_urls(grounding_chunks, state["sub_topic_id"])
-            citations = get_citations(response, resolved_urls)
-            modified_text = insert_citation_markers(response.text, citations) if citations else (response.text if response else "")
-            sources_gathered = []
-            if citations:
-                for citation in citations:
-                    if citation and "segments" in citation and citation["segments"]:
-                        sources_gathered.extend(citation["segments"])
-        else:
-            # Fallback when no grounding metadata available
-            modified_text = response.text if response and hasattr(response, 'text') else "該当する情報は見つかりませんでした。"
-            sources_gathered = []
-            
-    except Exception as e:
-        print(f"🚨 Error in focused_researcher for topic '{state.get('topic_name', 'unknown')}': {e}")
-        modified_text = "該当する情報は見つかりませんでした。"
-        sources_gathered = []
+        try:
+            return grounded_search(
+                formatted_prompt,
+                search_model,
+                f"{state['sub_topic_id']}-{query_idx}",
+                compact_citations=configurable.compact_citations,
+            )
+        except Exception as e:
+            logger.warning("Error in focused_researcher for topic '%s' (query '%s'): %s", state.get('topic_name', 'unknown'), query, e)
+            return NOT_FOUND_TEXT, []
+    
+    # Run the sub-topic's queries concurrently with bounded per-topic parallelism
+    max_workers = max(1, min(configurable.max_concurrent_searches_per_topic, len(search_queries)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(propagate_context(search_one), range(len(search_queries)), search_queries))
     
+    modified_text = merge_research_texts(
+        [text for text, _ in results], sources=[sources for _, sources in results]
+    )
+    sources_gathered = dedupe_sources([source for _, sources in results for source in sources])
+    
+    # Only research that found something is worth reusing
+    if cache_ttl_hours and sources_gathered:
+        context.sub_topic_cache.store(
+            state["topic_name"],
+            research_question,
+            search_queries,
+            state["sub_topic_id"],
+            modified_text,
+            sources_gathered,
+            cache_ttl_hours,
+        )
+    
+    return build_sub_topic_update(state, modified_text, sources_gathered, context)
+
+
+def build_sub_topic_update(
+    state: ParallelResearchState,
+    modified_text: str,
+    sources_gathered: list,
+    context: RunContext,
+    reused_from: Optional[dict] = None,
+) -> dict:
+    """Builds the focused_researcher state update from a sub-topic's merged research.
+    
+    reused_from describes the cached research the text came from, if any; it is
+    recorded in run_metadata["reused_sub_topics"].
+    """
     # Format as structured sub-topic research
+    if context.configurable.compact_citations:
+        source_lines = [f"- {citation_token(source['short_url'])} {source['label']}" for source in sources_gathered[:5]]
+    else:
+        source_lines = [f"- [{source['label']}]({source['value']})" for source in sources_gathered[:5]]
     research_result = f"""
 ## {state["topic_name"]}
 
 {modified_text}
 
 ### 情報源
-{chr(10).join([f"- [{source['label']}]({source['value']})" for source in sources_gathered[:5]])}
+{chr(10).join(source_lines)}
 """
     
-    return {
+    source_refs, source_registry = compact_sources(sources_gathered)
+    update = {
         "parallel_research_results": [research_result],
-        "sources_gathered": sources_gathered,
+        "sources_gathered": source_refs,
+        "source_registry": source_registry,
     }
+    
+    # Draft this sub-topic's section now, while slower branches are still searching
+    if context.configurable.incremental_synthesis:
+        update["section_drafts"] = [draft_section(state, research_result, context)]
+    
+    if reused_from is not None:
+        update["run_metadata"] = {"reused_sub_topics": [reused_from]}
+    
+    return update
 
 
-def aggregate_research_results(state: OverallState, config: RunnableConfig):
+def draft_section(state: ParallelResearchState, research_result: str, context: RunContext) -> dict:
+    """Drafts the report section for a single sub-topic (incremental synthesis).
+    
+    Runs inside the researcher branch so section drafting overlaps with the search
+    latency of the other branches. Returns an empty draft on failure, in which case
+    the synthesizer falls back to full synthesis.
+    """
+    llm = chat_model(context, context.configurable.answer_model, temperature=0.2)
+    formatted_prompt = SECTION_DRAFT_PROMPT.format(
+        research_question=state.get("research_question", ""),
+        topic_name=state["topic_name"],
+        research_result=research_result,
+    )
+    try:
+        text = llm.invoke(formatted_prompt).content.strip()
+    except Exception as e:
+        logger.warning("Error drafting section for topic '%s': %s", state.get('topic_name', 'unknown'), e)
+        text = ""
+    
+    return {
+        "sub_topic_id": state["sub_topic_id"],
+        "topic_name": state["topic_name"],
+        "text": text,
+    }
+
+
+@traced_node
+@offload_blobs
+def aggregate_research_results(state: EnhancedResearchState, config: RunnableConfig):
     """Aggregation node that waits for all parallel research to complete.
     
     This node simply passes through the state after all parallel research is complete.
@@ -230,36 +508,49 @@ def aggregate_research_results(state: OverallState, config: RunnableConfig):
     """
     # Brief processing to ensure parallel results are properly aggregated
     parallel_results_count = len(state.get("parallel_research_results", []))
-    sources_count = len(state.get("sources_gathered", []))
+    sources_count = len(state.get("source_registry", {}))
     
-    print(f"🔄 Aggregating {parallel_results_count} research results with {sources_count} sources...")
+    add_span_event("aggregate", research_results=parallel_results_count, sources=sources_count)
     
     return {
         "current_phase": "researching"  # Single phase update after all parallel research
     }
 
 
-def synthesizer(state: OverallState, config: RunnableConfig) -> SynthesisState:
+@traced_node
+@offload_blobs
+def synthesizer(state: EnhancedResearchState, config: RunnableConfig) -> SynthesisState:
     """Synthesizer agent that integrates all parallel research results.
     
     Integration specialist that combines findings from multiple parallel research agents 
     into a single coherent, well-structured report. Ensures logical flow and consistency 
     across different research areas while maintaining comprehensive coverage.
     """
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     reasoning_model = state.get("reasoning_model") or configurable.answer_model
     
     # Initialize LLM for synthesis
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0.2,  # Lower temperature for more consistent synthesis
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
+    llm = chat_model(context, reasoning_model, temperature=0.2)  # Lower temperature for more consistent synthesis
+    
+    research_question = state.get("structured_plan", {}).get("research_question", conversation_view(state, context).topic)
+    
+    # Incremental synthesis: sections were drafted per branch, only frame them here
+    section_drafts = state.get("section_drafts", [])
+    if section_drafts and all(draft["text"] for draft in section_drafts):
+        draft_report = integrate_section_drafts(llm, research_question, section_drafts)
+        quality_score = score_draft_report(
+            draft_report,
+            state.get("structured_plan", {}).get("sub_topics", []),
+        )
+        return {
+            "draft_report": draft_report,
+            "quality_score": quality_score.to_dict(),
+            "current_phase": "synthesizing"
+        }
     
     # Combine all research results
     research_results = "\n\n---\n\n".join(state.get("parallel_research_results", []))
-    research_question = state.get("structured_plan", {}).get("research_question", get_research_topic(state["messages"]))
     
     # Format synthesizer prompt
     formatted_prompt = SYNTHESIZER_PROMPT.format(
@@ -270,13 +561,81 @@ def synthesizer(state: OverallState, config: RunnableConfig) -> SynthesisState:
     # Generate draft report
     result = llm.invoke(formatted_prompt)
     
+    # Cheap local pre-screen used to decide whether the LLM critique is needed
+    quality_score = score_draft_report(
+        result.content,
+        state.get("structured_plan", {}).get("sub_topics", []),
+    )
+    
     return {
         "draft_report": result.content,
+        "quality_score": quality_score.to_dict(),
         "current_phase": "synthesizing"
     }
 
 
-def critique_agent(state: OverallState, config: RunnableConfig) -> CritiqueState:
+def integrate_section_drafts(
+    llm: ChatGoogleGenerativeAI,
+    research_question: str,
+    section_drafts: list[dict],
+) -> str:
+    """Assembles precomputed section drafts into a report.
+    
+    The LLM only writes the title, introduction and conclusion; the section bodies
+    are spliced in verbatim in plan order.
+    """
+    ordered_drafts = sorted(section_drafts, key=lambda draft: int(draft["sub_topic_id"]))
+    sections_text = "\n\n".join(draft["text"] for draft in ordered_drafts)
+    
+    framing = structured_output(llm, ReportFraming).invoke(
+        INTEGRATION_PROMPT.format(
+            research_question=research_question,
+            section_drafts=sections_text,
+        )
+    )
+    
+    return (
+        f"# {framing.title}\n\n"
+        f"## はじめに\n\n{framing.introduction.strip()}\n\n"
+        f"{sections_text}\n\n"
+        f"## 結論\n\n{framing.conclusion.strip()}\n"
+    )
+
+
+@traced_node
+@offload_blobs
+def route_after_synthesis(state: EnhancedResearchState, config: RunnableConfig):
+    """Routing function that skips the LLM critique when the local quality score is high enough.
+    
+    The critique is a full reasoning-model call over the whole draft; drafts that already
+    cite their sources, cover every planned sub-topic and contain no empty-result markers
+    go straight to final polish. The effort profile can override the pre-screen: low
+    effort runs never critique and high effort runs always do. Otherwise pending late
+    research branches send the draft to the critique, which folds them in.
+    """
+    context = get_run_context(config)
+    configurable = context.configurable
+    score = state.get("quality_score", {}).get("total", 0.0)
+    
+    if should_wrap_up(state, configurable):
+        add_span_event("critique.skipped", reason="deadline")
+        return "final_polish"
+    critique = get_effort_profile(state).critique
+    if critique == "never":
+        add_span_event("critique.skipped", reason="effort", effort_level=state.get("effort_level"))
+        return "final_polish"
+    # Late branches may still be folded in by the critique/revision pass
+    if critique == "always" or state.get("pending_late_branches"):
+        return "critique_agent"
+    if score >= configurable.critique_skip_threshold:
+        add_span_event("critique.skipped", reason="quality_score", score=score, threshold=configurable.critique_skip_threshold)
+        return "final_polish"
+    return "critique_agent"
+
+
+@traced_node
+@offload_blobs
+def critique_agent(state: EnhancedResearchState, config: RunnableConfig) -> CritiqueState:
     """Critique agent for quality assurance.
     
     Quality assurance specialist that evaluates research reports for accuracy, completeness,
@@ -286,30 +645,57 @@ def critique_agent(state: OverallState, config: RunnableConfig) -> CritiqueState
     MAX_REVISIONS = 1  # STRICT LIMIT: Match other functions
     current_revisions = state.get("revision_count", 0)
     
-    print(f"📝 CRITIQUE START - Current revisions: {current_revisions}/{MAX_REVISIONS}")
+    add_span_event("critique.start", revision_count=current_revisions, max_revisions=MAX_REVISIONS)
     
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     reasoning_model = state.get("reasoning_model") or configurable.reflection_model
     
-    # Check if we've already reached the revision limit
+    # Check if we've already reached the revision limit or the run deadline is near
+    if should_wrap_up(state, configurable):
+        add_span_event("critique.skipped", reason="deadline")
+        return {
+            "critique_feedback": "品質評価: 実行時間の上限が近いため、現在のレポートで完了します。",
+            "should_revise": False,
+            "revision_suggestions": [],
+            "section_revisions": [],
+            "current_phase": "critiquing_completed"
+        }
+    # Straggling research branches that finished after the quorum are folded in
+    # through a revision instead of a full critique
+    # Branches this process has no future for (a resumed run) are run again, unless no revision is left to fold them in
+    rerun = (lambda payload: focused_researcher(payload, config)) if current_revisions < MAX_REVISIONS else None
+    late, settled = fold_late_results(state, rerun)
+    late_updates = merge_branch_updates(late)
+    settled_update = {"pending_late_branches": settled} if settled else {}
+    if late_updates.get("parallel_research_results") and current_revisions < MAX_REVISIONS:
+        add_span_event("critique.fold_late_results", late_results=len(late_updates["parallel_research_results"]))
+        return {
+            "critique_feedback": "品質評価: 遅れて完了したサブトピックのリサーチ結果をレポートに統合する必要があります。",
+            "should_revise": True,
+            "revision_suggestions": ["追加のリサーチ結果の内容を、該当するセクションに統合してください"],
+            "section_revisions": [],
+            "parallel_research_results": late_updates["parallel_research_results"],
+            "late_research_results": late_updates["parallel_research_results"],
+            "sources_gathered": late_updates.get("sources_gathered", []),
+            "source_registry": late_updates.get("source_registry", {}),
+            **settled_update,
+            "current_phase": "critiquing"
+        }
     if current_revisions >= MAX_REVISIONS:
-        print(f"🚫 CRITIQUE: Revision limit already reached ({current_revisions})")
-        print(f"🚫 FORCING should_revise=False to prevent infinite loop")
+        add_span_event("critique.revision_limit_reached", revision_count=current_revisions)
         return {
             "critique_feedback": "品質評価: 修正回数の制限に達したため、現在のレポートで完了します。",
             "should_revise": False,  # FORCE False to prevent infinite loop
             "revision_suggestions": [],
+            "section_revisions": [],
+            **settled_update,
             "current_phase": "critiquing_completed"
         }
     
     # Initialize LLM for critique
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0.7,  # Higher temperature for more creative critique
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    structured_llm = llm.with_structured_output(CritiqueAssessment)
+    llm = chat_model(context, reasoning_model, temperature=0.7)  # Higher temperature for more creative critique
+    structured_llm = structured_output(llm, CritiqueAssessment)
     
     # Format critique prompt
     draft_report = state.get("draft_report", "")
@@ -322,19 +708,22 @@ def critique_agent(state: OverallState, config: RunnableConfig) -> CritiqueState
     original_should_revise = result.should_revise
     if current_revisions >= MAX_REVISIONS:
         result.should_revise = False
-        print(f"🛡️ SAFETY: Forced should_revise from {original_should_revise} to False")
+        add_span_event("critique.should_revise_forced", original_should_revise=original_should_revise)
     
-    print(f"📝 CRITIQUE RESULT: should_revise={result.should_revise} (original: {original_should_revise})")
-    print(f"📝 Current revision count: {current_revisions}")
+    add_span_event("critique.result", should_revise=result.should_revise, overall_quality=result.overall_quality, section_revisions=len(result.section_revisions))
     
     return {
         "critique_feedback": f"品質評価: {result.overall_quality}\n\n強み: {', '.join(result.strengths)}\n\n改善点: {', '.join(result.weaknesses)}\n\n具体的提案: {', '.join(result.specific_suggestions)}",
         "should_revise": result.should_revise,
         "revision_suggestions": result.specific_suggestions,
+        "section_revisions": [revision.model_dump() for revision in result.section_revisions],
+        **settled_update,
         "current_phase": "critiquing"
     }
 
 
+@traced_node
+@offload_blobs
 def evaluate_report_quality(state: CritiqueState, config: RunnableConfig):
     """Routing function that determines whether to revise or finalize the report.
     
@@ -344,56 +733,111 @@ def evaluate_report_quality(state: CritiqueState, config: RunnableConfig):
     current_revisions = state.get("revision_count", 0)
     should_revise = state.get("should_revise", False)
     
-    print(f"🔍 QUALITY EVALUATION - Current revisions: {current_revisions}/{MAX_REVISIONS}")
-    print(f"🔍 Should revise: {should_revise}")
-    print(f"🔍 State revision_count: {state.get('revision_count', 'NOT_SET')}")
+    add_span_event("quality_evaluation", revision_count=current_revisions, should_revise=should_revise)
     
     # ABSOLUTE HARD LIMIT: Never exceed 1 revision under any circumstances
     if current_revisions >= MAX_REVISIONS:
-        print(f"🚫 REVISION LIMIT REACHED: {current_revisions} >= {MAX_REVISIONS}")
-        print(f"🚫 FORCING FINAL POLISH - No more revisions allowed")
+        add_span_event("quality_evaluation.revision_limit_reached", revision_count=current_revisions)
         return "final_polish"
     
     # Only proceed with revision if we haven't hit the limit AND should_revise is True
     if should_revise and current_revisions < MAX_REVISIONS:
-        print(f"✅ PROCEEDING TO REVISION #{current_revisions + 1}/{MAX_REVISIONS}")
+        add_span_event("quality_evaluation.route", next_node="revise_report")
         return "revise_report"
     else:
-        print(f"✅ PROCEEDING TO FINAL POLISH (revisions: {current_revisions}, should_revise: {should_revise})")
+        add_span_event("quality_evaluation.route", next_node="final_polish")
         return "final_polish"
 
 
-def revise_report(state: OverallState, config: RunnableConfig) -> SynthesisState:
+def revise_sections(
+    llm: ChatGoogleGenerativeAI,
+    sections: list[dict],
+    targets: dict[int, list[str]],
+    report_feedback: str = "",
+) -> str:
+    """Regenerates only the targeted sections in parallel and splices them back.
+
+    Untouched sections are kept byte-for-byte, so output tokens scale with the
+    amount of change rather than with the length of the report. report_feedback
+    (the critique and its report-level suggestions) goes to every targeted section.
+    """
+    target_indices = sorted(targets)
+    prompts = [
+        SECTION_REVISION_PROMPT.format(
+            instructions="\n".join(f"- {instruction}" for instruction in targets[idx]),
+            report_feedback=report_feedback or "（なし）",
+            section_text=sections[idx]["text"].strip(),
+            section_heading=sections[idx]["heading"],
+        )
+        for idx in target_indices
+    ]
+    results = llm.batch(prompts)
+
+    revised_texts = [section["text"] for section in sections]
+    for idx, result in zip(target_indices, results):
+        revised = result.content.strip()
+        heading = sections[idx]["heading"]
+        if heading and not revised.startswith(heading):
+            revised = f"{heading}\n\n{revised}"
+        # Preserve the original spacing before the next section
+        trailing = sections[idx]["text"][len(sections[idx]["text"].rstrip()):]
+        revised_texts[idx] = revised + (trailing or "\n\n")
+    return "".join(revised_texts)
+
+
+@traced_node
+@offload_blobs
+def revise_report(state: EnhancedResearchState, config: RunnableConfig) -> SynthesisState:
     """Revises the report based on critique feedback.
     
-    Implements SINGLE revision with strict limits to prevent infinite loops.
+    When the critique names specific sections, only those sections are regenerated
+    (in parallel) and spliced back into the draft, each with the critique feedback,
+    the report-level suggestions and the section revisions that matched no section.
+    Falls back to a full rewrite when no section can be matched. Implements SINGLE revision with strict limits to
+    prevent infinite loops.
     """
     MAX_REVISIONS = 1  # STRICT LIMIT: Match the evaluation function
     current_revisions = state.get("revision_count", 0)
     
-    print(f"🔄 REVISION START - Current: {current_revisions}/{MAX_REVISIONS}")
-    print(f"🔄 State before revision: revision_count = {state.get('revision_count', 'NOT_SET')}")
+    add_span_event("revision.start", revision_count=current_revisions, max_revisions=MAX_REVISIONS)
     
     # CRITICAL SAFETY CHECK: Never allow more than 1 revision
     if current_revisions >= MAX_REVISIONS:
-        print(f"🚨 EMERGENCY STOP - Maximum revisions ({current_revisions}) reached")
-        print(f"🚨 Aborting revision, returning current draft")
+        add_span_event("revision.aborted", reason="revision_limit", revision_count=current_revisions)
         return {
             "draft_report": state.get("draft_report", ""),
             "revision_count": current_revisions,  # Don't increment
             "current_phase": "emergency_stopped"
         }
     
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     reasoning_model = state.get("reasoning_model") or configurable.answer_model
     
     # Initialize LLM for revision
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0.3,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
+    llm = chat_model(context, reasoning_model, temperature=0.3)
+    
+    draft_report = state.get("draft_report", "")
+    sections = split_report_sections(draft_report)
+    targets, unmatched = match_section_revisions(sections, state.get("section_revisions", []))
+    
+    if targets:
+        add_span_event(
+            "revision.targeted", revised_sections=len(targets), total_sections=len(sections), unmatched=len(unmatched)
+        )
+        suggestions = "\n".join(f"- {suggestion}" for suggestion in state.get("revision_suggestions", []) + unmatched)
+        report_feedback = "\n\n".join(part for part in (state.get("critique_feedback", ""), suggestions) if part)
+        new_revision_count = current_revisions + 1
+        return {
+            "draft_report": revise_sections(llm, sections, targets, report_feedback),
+            "revision_count": new_revision_count,
+            "current_phase": "revising"
+        }
+    
+    late_results = state.get("late_research_results", [])
+    late_results_section = ""
+    if late_results:
+        late_results_section = "\n## 追加のリサーチ結果（ドラフト作成後に完了）\n" + "\n\n---\n\n".join(late_results) + "\n"
     
     # Create revision prompt incorporating feedback
     revision_prompt = f"""
@@ -406,8 +850,8 @@ def revise_report(state: OverallState, config: RunnableConfig) -> SynthesisState
 {chr(10).join(f"- {suggestion}" for suggestion in state.get("revision_suggestions", []))}
 
 ## 現在のドラフト
-{state.get("draft_report", "")}
-
+{draft_report}
+{late_results_section}
 ## 指示
 - 批評フィードバックを注意深く検討し、指摘された問題を修正してください
 - 日本語で自然で読みやすいレポートを作成してください
@@ -422,8 +866,7 @@ def revise_report(state: OverallState, config: RunnableConfig) -> SynthesisState
     result = llm.invoke(revision_prompt)
     
     new_revision_count = current_revisions + 1
-    print(f"✅ REVISION COMPLETED - New count: {new_revision_count}/{MAX_REVISIONS}")
-    print(f"✅ This was the FINAL allowed revision")
+    add_span_event("revision.completed", revision_count=new_revision_count)
     
     return {
         "draft_report": result.content,
@@ -432,17 +875,27 @@ def revise_report(state: OverallState, config: RunnableConfig) -> SynthesisState
     }
 
 
-def final_polish(state: OverallState, config: RunnableConfig):
+@traced_node
+@offload_blobs
+def final_polish(state: EnhancedResearchState, config: RunnableConfig):
     """Final polishing and completion of the research report.
     
     Applies final touches and saves the completed report.
     """
-    # Use the latest draft as the final report
-    final_content = state.get("draft_report", "")
+    context = get_run_context(config)
+    
+    # Use the latest draft as the final report, with real links for its citations
+    final_content, _ = expand_citations(
+        state.get("draft_report", ""),
+        expand_sources(state.get("sources_gathered", []), state.get("source_registry", {})),
+    )
+    
+    # Forget research branches that are still running; their results are dropped
+    _, settled = fold_late_results(state, final=True)
     
     # Add completion footer with research summary
     parallel_results_count = len(state.get("parallel_research_results", []))
-    sources_count = len(state.get("sources_gathered", []))
+    sources_count = len(state.get("source_registry", {}))
     revision_count = state.get("revision_count", 0)
     
     metadata_footer = f"""
@@ -470,10 +923,10 @@ def final_polish(state: OverallState, config: RunnableConfig):
     try:
         duration_ms = int((time.time() - state.get("start_time", time.time())) * 1000)
         search_queries = [result for result in state.get("parallel_research_results", [])]
-        sources_count = len(state.get("sources_gathered", []))
+        sources_count = len(state.get("source_registry", {}))
         
         history_id = history_manager.save_history(
-            query=state.get("original_query", get_research_topic(state["messages"])),
+            query=state.get("original_query", conversation_view(state, context).topic),
             effort=state.get("effort_level", "comprehensive"),
             model=state.get("reasoning_model", "gemini-2.5-pro"),
             result=final_content_with_metadata,
@@ -482,20 +935,23 @@ def final_polish(state: OverallState, config: RunnableConfig):
             duration_ms=duration_ms
         )
         
-        print(f"Enhanced research completed and saved: {history_id}")
+        add_span_event("history.saved", history_id=history_id)
         
     except Exception as e:
-        print(f"History save error in enhanced research: {e}")
+        logger.warning("History save error in enhanced research: %s", e)
 
     return {
         "messages": [AIMessage(content=final_content_with_metadata)],
         "final_report": final_content_with_metadata,
+        "pending_late_branches": settled,
         "current_phase": "completed"
     }
 
 
 # Original nodes (preserved for backward compatibility)
-def create_research_plan(state: OverallState, config: RunnableConfig) -> ResearchPlanState:
+@traced_node
+@offload_blobs
+def create_research_plan(state: SimpleResearchState, config: RunnableConfig) -> ResearchPlanState:
     """LangGraph node that creates a structured research plan based on the user's question.
     
     This implements Step 1 of the DeepResearch algorithm: Query Input and Research Plan Creation.
@@ -508,29 +964,27 @@ def create_research_plan(state: OverallState, config: RunnableConfig) -> Researc
     Returns:
         Dictionary with state update, including research_plan containing sections and rationale
     """
-    configurable = Configuration.from_runnable_config(config)
+    start_time = time.time()
+    context = get_run_context(config)
+    configurable = context.configurable
     
     # Initialize Gemini 2.5 Pro for plan creation
-    llm = ChatGoogleGenerativeAI(
-        model=configurable.query_generator_model,
-        temperature=0.3,  # Lower temperature for more structured planning
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    structured_llm = llm.with_structured_output(ResearchPlan)
+    llm = chat_model(context, configurable.query_generator_model, temperature=0.3)  # Lower temperature for more structured planning
+    structured_llm = structured_output(llm, ResearchPlan)
     
     # Format the prompt for research plan creation
     current_date = get_current_date()
+    conversation = conversation_view(state, context)
     formatted_prompt = research_plan_instructions.format(
         current_date=current_date,
-        research_topic=get_research_topic(state["messages"]),
+        research_topic=conversation.topic,
     )
     
     # Generate the research plan
     result = structured_llm.invoke(formatted_prompt)
     
     # メタデータの初期化
-    original_query = get_research_topic(state["messages"])
+    original_query = conversation.topic
     effort_level = "medium"  # デフォルト値、実際の値はフロントエンドから渡される
     
     return {
@@ -539,13 +993,16 @@ def create_research_plan(state: OverallState, config: RunnableConfig) -> Researc
             "rationale": result.rationale
         },
         "plan_approved": True,
-        "start_time": time.time(),
+        "start_time": start_time,
         "original_query": original_query,
+        "conversation_summary": conversation.summary,
         "effort_level": effort_level
     }
 
 
-def generate_query(state: OverallState, config: RunnableConfig) -> QueryGenerationState:
+@traced_node
+@offload_blobs
+def generate_query(state: SimpleResearchState, config: RunnableConfig) -> QueryGenerationState:
     """LangGraph node that generates search queries based on the User's question.
 
     Uses Gemini 2.5 Pro to create an optimized search queries for web research based on
@@ -558,46 +1015,85 @@ def generate_query(state: OverallState, config: RunnableConfig) -> QueryGenerati
     Returns:
         Dictionary with state update, including search_query key containing the generated queries
     """
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
 
     # check for custom initial search query count
     if state.get("initial_search_query_count") is None:
         state["initial_search_query_count"] = configurable.number_of_initial_queries
 
     # init Gemini 2.5 Pro
-    llm = ChatGoogleGenerativeAI(
-        model=configurable.query_generator_model,
-        temperature=1.0,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    structured_llm = llm.with_structured_output(SearchQueryList)
+    llm = chat_model(context, configurable.query_generator_model, temperature=1.0)
+    structured_llm = structured_output(llm, SearchQueryList)
 
     # Format the prompt - now uses Japanese instructions by default
     current_date = get_current_date()
     formatted_prompt = query_writer_instructions.format(
         current_date=current_date,
-        research_topic=get_research_topic(state["messages"]),
+        research_topic=conversation_view(state, context).topic,
         number_queries=state["initial_search_query_count"],
     )
     
     # Generate the search queries
     result = structured_llm.invoke(formatted_prompt)
-    return {"search_query": result.query}
+    return {"search_query": cap_fan_out(result.query, state, configurable)}
 
 
-def continue_to_web_research(state: QueryGenerationState):
+@traced_node
+@offload_blobs
+def continue_to_web_research(state: QueryGenerationState, config: RunnableConfig):
     """LangGraph node that sends the search queries to the web research node.
 
     This is used to spawn n number of web research nodes, one for each search query.
     """
-    return [
-        Send("web_research", {"search_query": search_query, "id": int(idx)})
+    branches = [
+        {"search_query": search_query, "id": int(idx)}
         for idx, search_query in enumerate(state["search_query"])
     ]
+    return dispatch_web_research(branches, config)
+
+
+def dispatch_web_research(branches: list[dict], config: RunnableConfig) -> list[Send]:
+    """Sends web research branches directly, or through the quorum node when enabled."""
+    if quorum_enabled(get_run_context(config).configurable):
+        return [Send("quorum_web_research", {"branches": branches})]
+    return [Send("web_research", branch) for branch in branches]
+
+
+@traced_node
+@offload_blobs
+def quorum_web_research(state: QuorumResearchState, config: RunnableConfig) -> SimpleResearchState:
+    """LangGraph node that runs web research branches and proceeds once a quorum has finished.
+
+    Args:
+        state: Payload with one web research branch (search_query and id) per entry
+        config: Configuration for the runnable, including the quorum settings
+
+    Returns:
+        Merged state update of the finished branches, plus run_metadata for late ones
+    """
+    context = get_run_context(config)
+    configurable = context.configurable
+    branches = state["branches"]
+
+    updates, metadata, pending = run_with_quorum(
+        lambda payload: web_research(payload, config),
+        branches,
+        [branch["search_query"] for branch in branches],
+        configurable,
+    )
+
+    update = merge_branch_updates(updates)
+    if metadata:
+        update["run_metadata"] = metadata
+    if pending:
+        update["pending_late_branches"] = pending
+    return update
 
 
-def web_research(state: WebSearchState, config: RunnableConfig) -> OverallState:
+@traced_node
+@offload_blobs
+def web_research(state: WebSearchState, config: RunnableConfig) -> SimpleResearchState:
     """LangGraph node that performs web research using the native Google Search API tool.
 
     Executes a web search using the native Google Search API tool in combination with Gemini 2.5 Pro.
@@ -610,61 +1106,37 @@ def web_research(state: WebSearchState, config: RunnableConfig) -> OverallState:
         Dictionary with state update, including sources_gathered, research_loop_count, and web_research_results
     """
     # Configure
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     formatted_prompt = web_searcher_instructions.format(
         current_date=get_current_date(),
         research_topic=state["search_query"],
     )
 
-    # Uses the google genai client as the langchain client doesn't return grounding metadata
     try:
-        response = genai_client.models.generate_content(
-            model=configurable.query_generator_model,
-            contents=formatted_prompt,
-            config={
-                "tools": [{"google_search": {}}],
-                "temperature": 0,
-            },
+        modified_text, sources_gathered = grounded_search(
+            formatted_prompt,
+            configurable.query_generator_model,
+            state["id"],
+            compact_citations=configurable.compact_citations,
         )
-        
-        # Safely process citations
-        grounding_chunks = None
-        if (response and 
-            hasattr(response, 'candidates') and 
-            response.candidates and 
-            len(response.candidates) > 0 and
-            hasattr(response.candidates[0], 'grounding_metadata') and
-            response.candidates[0].grounding_metadata and
-            hasattr(response.candidates[0].grounding_metadata, 'grounding_chunks')):
-            grounding_chunks = response.candidates[0].grounding_metadata.grounding_chunks
-        
-        if grounding_chunks is not None:
-            resolved_urls = resolve_urls(grounding_chunks, state["id"])
-            citations = get_citations(response, resolved_urls)
-            modified_text = insert_citation_markers(response.text, citations) if citations else (response.text if response else "")
-            sources_gathered = []
-            if citations:
-                for citation in citations:
-                    if citation and "segments" in citation and citation["segments"]:
-                        sources_gathered.extend(citation["segments"])
-        else:
-            # Fallback when no grounding metadata available
-            modified_text = response.text if response and hasattr(response, 'text') else "該当する情報は見つかりませんでした。"
-            sources_gathered = []
-            
     except Exception as e:
-        print(f"🚨 Error in web_research for query '{state.get('search_query', 'unknown')}': {e}")
-        modified_text = "該当する情報は見つかりませんでした。"
+        logger.warning("Error in web_research for query '%s': %s", state.get('search_query', 'unknown'), e)
+        modified_text = NOT_FOUND_TEXT
         sources_gathered = []
 
+    source_refs, source_registry = compact_sources(sources_gathered)
     return {
-        "sources_gathered": sources_gathered,
+        "sources_gathered": source_refs,
+        "source_registry": source_registry,
         "search_query": [state["search_query"]],
         "web_research_result": [modified_text],
     }
 
 
-def reflection(state: OverallState, config: RunnableConfig) -> ReflectionState:
+@traced_node
+@offload_blobs
+def reflection(state: SimpleResearchState, config: RunnableConfig) -> ReflectionState:
     """LangGraph node that identifies knowledge gaps and generates potential follow-up queries.
 
     Analyzes the current summary to identify areas for further research and generates
@@ -678,11 +1150,23 @@ def reflection(state: OverallState, config: RunnableConfig) -> ReflectionState:
     Returns:
         Dictionary with state update, including search_query key containing the generated follow-up query
     """
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     # Increment the research loop count and get the reasoning model
     state["research_loop_count"] = state.get("research_loop_count", 0) + 1
     reasoning_model = state.get("reasoning_model", configurable.reflection_model)
 
+    # Near the run deadline: no further loops, go straight to the final answer
+    if should_wrap_up(state, configurable):
+        add_span_event("reflection.skipped", reason="deadline")
+        return {
+            "is_sufficient": True,
+            "knowledge_gap": "",
+            "follow_up_queries": [],
+            "research_loop_count": state["research_loop_count"],
+            "number_of_ran_queries": len(state["search_query"]),
+        }
+
     # Deep Research approach - structured reflection with comprehensive analysis
     reflection_instructions = """
 あなたは高度な調査エージェントです。収集したウェブ調査の要約を評価し、構造化された深層調査手法に従って知識のギャップを特定し、戦略的な追加質問を作成することがあなたのタスクです。
@@ -724,39 +1208,95 @@ def reflection(state: OverallState, config: RunnableConfig) -> ReflectionState:
 {summaries}
 """
 
+    # Fold in web research branches that finished after the previous quorum
+    late, settled = fold_late_results(state, lambda payload: web_research(payload, config))
+    late_updates = merge_branch_updates(late)
+    if settled:
+        late_updates["pending_late_branches"] = settled
+    web_research_results = state["web_research_result"] + late_updates.get("web_research_result", [])
+
+    # Stop once a loop adds little over the previous ones, without another reflection call
+    novelty, novelty_update = loop_novelty_update(state, late_updates, web_research_results)
+    if novelty is not None and novelty.total < configurable.min_loop_novelty:
+        add_span_event("reflection.skipped", reason="low_novelty", novelty=novelty.total, threshold=configurable.min_loop_novelty)
+        return {
+            **late_updates,
+            **novelty_update,
+            "is_sufficient": True,
+            "knowledge_gap": "",
+            "follow_up_queries": [],
+            "research_loop_count": state["research_loop_count"],
+            "number_of_ran_queries": len(state["search_query"]) + len(late_updates.get("search_query", [])),
+        }
+
     # Format the prompt
     current_date = get_current_date()
     formatted_prompt = reflection_instructions.format(
         current_date=current_date,
-        research_topic=get_research_topic(state["messages"]),
-        summaries="\n\n---\n\n".join(state["web_research_result"]),
+        research_topic=conversation_view(state, context).topic,
+        summaries="\n\n---\n\n".join(web_research_results),
     )
     # init Reasoning Model
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=1.0,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    result = llm.with_structured_output(Reflection).invoke(formatted_prompt)
+    llm = chat_model(context, reasoning_model, temperature=1.0)
+    result = structured_output(llm, Reflection).invoke(formatted_prompt)
 
     return {
+        **late_updates,
+        **novelty_update,
         "is_sufficient": result.is_sufficient,
         "knowledge_gap": result.knowledge_gap,
-        "follow_up_queries": result.follow_up_queries,
+        "follow_up_queries": cap_fan_out(result.follow_up_queries, state, configurable),
         "research_loop_count": state["research_loop_count"],
-        "number_of_ran_queries": len(state["search_query"]),
+        "number_of_ran_queries": len(state["search_query"]) + len(late_updates.get("search_query", [])),
     }
 
 
+def loop_novelty_update(
+    state: SimpleResearchState, late_updates: dict, web_research_results: list
+) -> tuple[Optional[LoopNovelty], dict]:
+    """Novelty of the research loop that just finished, and the state update recording it.
+    
+    The loop's results are those added since the previous reflection (whose counts
+    are kept in novelty_baseline). Sources are compared by label, since the grounding
+    redirect urls differ per search even for the same site. The first loop has
+    nothing to compare with (novelty None) and only sets the baseline.
+    """
+    sources = state.get("sources_gathered", []) + late_updates.get("sources_gathered", [])
+    registry = {**state.get("source_registry", {}), **late_updates.get("source_registry", {})}
+    source_keys = [
+        registry.get(source.get("source_id"), {}).get("label") or source.get("source_id") or source.get("short_url")
+        for source in sources
+    ]
+    baseline = state.get("novelty_baseline") or {}
+    update = {"novelty_baseline": {"results": len(web_research_results), "sources": len(source_keys)}}
+    if not baseline:
+        return None, update
+    
+    previous_results, previous_sources = baseline.get("results", 0), baseline.get("sources", 0)
+    novelty = score_loop_novelty(
+        web_research_results[:previous_results],
+        web_research_results[previous_results:],
+        source_keys[:previous_sources],
+        source_keys[previous_sources:],
+    )
+    run_metadata = dict(late_updates.get("run_metadata", {}))
+    run_metadata["loop_novelty"] = [{"loop": state["research_loop_count"], **novelty.to_dict()}]
+    update["run_metadata"] = run_metadata
+    return novelty, update
+
+
+@traced_node
+@offload_blobs
 def evaluate_research(
     state: ReflectionState,
     config: RunnableConfig,
-) -> OverallState:
+) -> SimpleResearchState:
     """LangGraph routing function that determines the next step in the research flow.
 
     Controls the research loop by deciding whether to continue gathering information
     or to finalize the summary based on the configured maximum number of research loops.
+    Follow-up queries that nearly duplicate an executed query or another follow-up
+    are not searched; the graph finalizes when none are left.
 
     Args:
         state: Current graph state containing the research loop count
@@ -765,7 +1305,8 @@ def evaluate_research(
     Returns:
         String literal indicating the next node to visit ("web_research" or "finalize_summary")
     """
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     max_research_loops = (
         state.get("max_research_loops")
         if state.get("max_research_loops") is not None
@@ -773,20 +1314,37 @@ def evaluate_research(
     )
     if state["is_sufficient"] or state["research_loop_count"] >= max_research_loops:
         return "finalize_answer"
-    else:
-        return [
-            Send(
-                "web_research",
-                {
-                    "search_query": follow_up_query,
-                    "id": state["number_of_ran_queries"] + int(idx),
-                },
-            )
-            for idx, follow_up_query in enumerate(state["follow_up_queries"])
-        ]
 
+    # Skip follow-ups that repeat (or paraphrase) executed searches or each other
+    follow_up_queries, duplicates = dedupe_queries(
+        state["follow_up_queries"], state.get("search_query", []), configurable.follow_up_query_similarity
+    )
+    duplicates_of_executed = sum(1 for duplicate in duplicates if duplicate["executed"])
+    record_follow_up_queries(len(follow_up_queries), duplicates_of_executed, len(duplicates) - duplicates_of_executed)
+    if duplicates:
+        add_span_event(
+            "follow_up_queries.deduplicated",
+            dispatched=len(follow_up_queries),
+            duplicates_of_executed=duplicates_of_executed,
+            duplicates_in_batch=len(duplicates) - duplicates_of_executed,
+        )
+    if not follow_up_queries:
+        # Nothing new left to search
+        return "finalize_answer"
 
-def finalize_answer(state: OverallState, config: RunnableConfig):
+    branches = [
+        {
+            "search_query": follow_up_query,
+            "id": state["number_of_ran_queries"] + int(idx),
+        }
+        for idx, follow_up_query in enumerate(follow_up_queries)
+    ]
+    return dispatch_web_research(branches, config)
+
+
+@traced_node
+@offload_blobs
+def finalize_answer(state: SimpleResearchState, config: RunnableConfig):
     """LangGraph node that finalizes the research summary.
 
     Prepares the final output by deduplicating and formatting sources, then
@@ -799,7 +1357,8 @@ def finalize_answer(state: OverallState, config: RunnableConfig):
     Returns:
         Dictionary with state update, including running_summary key containing the formatted final summary with sources
     """
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     reasoning_model = state.get("reasoning_model") or configurable.answer_model
     
     # Deep Research approach - comprehensive structured analysis report
@@ -875,30 +1434,28 @@ def finalize_answer(state: OverallState, config: RunnableConfig):
         # Fallback if no research plan exists
         research_plan_sections = "- エグゼクティブサマリー\n- 主要発表内容の分析\n- 戦略的意味と競合への影響\n- 将来展望と示唆"
     
+    # Last chance for late web research branches; anything still running is dropped
+    late, settled = fold_late_results(state, final=True)
+    late_updates = merge_branch_updates(late)
+    web_research_results = state["web_research_result"] + late_updates.get("web_research_result", [])
+    source_registry = {**late_updates.get("source_registry", {}), **state.get("source_registry", {})}
+    sources_gathered = expand_sources(
+        state["sources_gathered"] + late_updates.get("sources_gathered", []), source_registry
+    )
+
     formatted_prompt = answer_instructions.format(
         current_date=current_date,
-        research_topic=get_research_topic(state["messages"]),
+        research_topic=conversation_view(state, context).topic,
         research_plan_sections=research_plan_sections,
-        summaries="\n---\n\n".join(state["web_research_result"]),
+        summaries="\n---\n\n".join(web_research_results),
     )
 
     # init Reasoning Model, default to Gemini 2.5 Pro
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
+    llm = chat_model(context, reasoning_model, temperature=0)
     result = llm.invoke(formatted_prompt)
 
     # Replace the short urls with the original urls and add all used urls to the sources_gathered
-    unique_sources = []
-    for source in state["sources_gathered"]:
-        if source["short_url"] in result.content:
-            result.content = result.content.replace(
-                source["short_url"], source["value"]
-            )
-            unique_sources.append(source)
+    result.content, unique_sources = expand_citations(result.content, sources_gathered)
 
     # 検索履歴を保存
     try:
@@ -907,7 +1464,7 @@ def finalize_answer(state: OverallState, config: RunnableConfig):
         sources_count = len(unique_sources)
         
         history_id = history_manager.save_history(
-            query=state.get("original_query", get_research_topic(state["messages"])),
+            query=state.get("original_query", conversation_view(state, context).topic),
             effort=state.get("effort_level", "medium"),
             model=reasoning_model,
             result=result.content,
@@ -916,23 +1473,30 @@ def finalize_answer(state: OverallState, config: RunnableConfig):
             duration_ms=duration_ms
         )
         
-        print(f"検索履歴を保存しました: {history_id}")
+        add_span_event("history.saved", history_id=history_id)
         
     except Exception as e:
-        print(f"検索履歴の保存中にエラーが発生しました: {e}")
+        logger.warning("検索履歴の保存中にエラーが発生しました: %s", e)
 
     return {
         "messages": [AIMessage(content=result.content)],
-        "sources_gathered": unique_sources,
+        "sources_gathered": compact_sources(unique_sources)[0],
+        "source_registry": late_updates.get("source_registry", {}),
+        "pending_late_branches": settled,
     }
 
 
+# Durable local checkpointer shared by all graphs (None unless CHECKPOINT_DB_PATH is set)
+checkpointer = create_checkpointer()
+
+
 # Enhanced Multi-Agent Deep Research Graph (Primary Implementation)
-enhanced_builder = StateGraph(OverallState, config_schema=Configuration)
+enhanced_builder = StateGraph(EnhancedResearchState, config_schema=Configuration)
 
 # Add all enhanced multi-agent nodes
 enhanced_builder.add_node("enhanced_planner", enhanced_planner)
 enhanced_builder.add_node("focused_researcher", focused_researcher)
+enhanced_builder.add_node("quorum_research", quorum_research)
 enhanced_builder.add_node("aggregate_research_results", aggregate_research_results)
 enhanced_builder.add_node("synthesizer", synthesizer)
 enhanced_builder.add_node("critique_agent", critique_agent)
@@ -940,7 +1504,7 @@ enhanced_builder.add_node("revise_report", revise_report)
 enhanced_builder.add_node("final_polish", final_polish)
 
 # Build the enhanced multi-agent workflow using hierarchical planning and parallel execution:
-# START -> Enhanced Planner -> Parallel Research -> Synthesis -> Critique -> (Revise or Polish) -> END
+# START -> Enhanced Planner -> Parallel Research -> Synthesis -> (Critique -> (Revise or Polish) | Polish) -> END
 
 # Entry point: Enhanced hierarchical planning
 enhanced_builder.add_edge(START, "enhanced_planner")
@@ -949,17 +1513,22 @@ enhanced_builder.add_edge(START, "enhanced_planner")
 enhanced_builder.add_conditional_edges(
     "enhanced_planner", 
     run_parallel_research,
-    ["focused_researcher"]
+    ["focused_researcher", "quorum_research"]
 )
 
 # All parallel research results flow to aggregator
 enhanced_builder.add_edge("focused_researcher", "aggregate_research_results")
+enhanced_builder.add_edge("quorum_research", "aggregate_research_results")
 
 # Aggregator synchronizes and then flows to synthesizer
 enhanced_builder.add_edge("aggregate_research_results", "synthesizer")
 
-# Synthesizer creates draft, then goes to critique
-enhanced_builder.add_edge("synthesizer", "critique_agent")
+# Synthesizer creates draft, then goes to critique unless the local pre-screen passes
+enhanced_builder.add_conditional_edges(
+    "synthesizer",
+    route_after_synthesis,
+    ["critique_agent", "final_polish"]
+)
 
 # Critique decides: revise or finalize
 enhanced_builder.add_conditional_edges(
@@ -975,16 +1544,17 @@ enhanced_builder.add_edge("revise_report", "critique_agent")
 enhanced_builder.add_edge("final_polish", END)
 
 # Compile enhanced graph
-enhanced_graph = enhanced_builder.compile(name="enhanced-deepresearch-agent")
+enhanced_graph = enhanced_builder.compile(name="enhanced-deepresearch-agent", checkpointer=checkpointer)
 
 
 # Original Simple Graph (Preserved for backward compatibility)
-simple_builder = StateGraph(OverallState, config_schema=Configuration)
+simple_builder = StateGraph(SimpleResearchState, config_schema=Configuration)
 
 # Define the nodes implementing the 5-step DeepResearch algorithm
 simple_builder.add_node("create_research_plan", create_research_plan)  # Step 1: Research Plan Creation
 simple_builder.add_node("generate_query", generate_query)              # Step 2: Initial Query Generation  
 simple_builder.add_node("web_research", web_research)                  # Step 2: Web Research
+simple_builder.add_node("quorum_web_research", quorum_web_research)    # Step 2: Web Research (straggler mitigation)
 simple_builder.add_node("reflection", reflection)                      # Step 3: Reflection & Knowledge Gap Analysis
 simple_builder.add_node("finalize_answer", finalize_answer)            # Step 4: Final Documentation
 
@@ -992,37 +1562,38 @@ simple_builder.add_node("finalize_answer", finalize_answer)            # Step 4:
 simple_builder.add_edge(START, "create_research_plan")
 simple_builder.add_edge("create_research_plan", "generate_query")
 simple_builder.add_conditional_edges(
-    "generate_query", continue_to_web_research, ["web_research"]
+    "generate_query", continue_to_web_research, ["web_research", "quorum_web_research"]
 )
 simple_builder.add_edge("web_research", "reflection")
+simple_builder.add_edge("quorum_web_research", "reflection")
 simple_builder.add_conditional_edges(
-    "reflection", evaluate_research, ["web_research", "finalize_answer"]
+    "reflection", evaluate_research, ["web_research", "quorum_web_research", "finalize_answer"]
 )
 simple_builder.add_edge("finalize_answer", END)
 
-simple_graph = simple_builder.compile(name="simple-deepresearch-agent")
+simple_graph = simple_builder.compile(name="simple-deepresearch-agent", checkpointer=checkpointer)
 
 # ============================================================================
 # ACADEMIC RESEARCH FRAMEWORK AGENTS (学術論文フレームワーク用エージェント)
 # ============================================================================
 
-def academic_background_generator(state: OverallState, config: RunnableConfig) -> AcademicBackgroundState:
+@traced_node
+@offload_blobs
+def academic_background_generator(state: AcademicResearchState, config: RunnableConfig) -> AcademicBackgroundState:
     """学術的背景と目的を生成するエージェント"""
     
-    configurable = Configuration.from_runnable_config(config)
+    start_time = time.time()
+    context = get_run_context(config)
+    configurable = context.configurable
     reasoning_model = state.get("reasoning_model") or configurable.answer_model
     
     # Initialize LLM
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0.1,  # Low temperature for factual accuracy
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    structured_llm = llm.with_structured_output(AcademicBackground)
+    llm = chat_model(context, reasoning_model, temperature=0.1)  # Low temperature for factual accuracy
+    structured_llm = structured_output(llm, AcademicBackground)
     
     # Get research question
-    research_question = get_research_topic(state["messages"])
+    conversation = conversation_view(state, context)
+    research_question = conversation.topic
     
     # Format prompt
     formatted_prompt = ACADEMIC_BACKGROUND_PROMPT.format(research_question=research_question)
@@ -1030,28 +1601,28 @@ def academic_background_generator(state: OverallState, config: RunnableConfig) -
     # Generate background and objective
     result = structured_llm.invoke(formatted_prompt)
     
-    print(f"DEBUG - Academic background generated: {result.background[:100]}...")
+    add_span_event("academic_background.generated", background_chars=len(result.background))
     
     return {
         "background": result.background,
         "objective": result.objective,
-        "research_framework": result.research_framework
+        "research_framework": result.research_framework,
+        "conversation_summary": conversation.summary,
+        "start_time": start_time
     }
 
 
-def academic_framework_planner(state: OverallState, config: RunnableConfig) -> AcademicFrameworkState:
+@traced_node
+@offload_blobs
+def academic_framework_planner(state: AcademicResearchState, config: RunnableConfig) -> AcademicFrameworkState:
     """学術論文の全体フレームワークを作成するエージェント"""
     
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     reasoning_model = state.get("reasoning_model") or configurable.answer_model
     
     # Initialize LLM
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0.2,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
+    llm = chat_model(context, reasoning_model, temperature=0.2)
     
     # Format background and objective
     background_data = state.get("academic_background", {})
@@ -1074,7 +1645,7 @@ def academic_framework_planner(state: OverallState, config: RunnableConfig) -> A
     # Generate framework
     result = llm.invoke(formatted_prompt)
     
-    print(f"DEBUG - Academic framework generated: {len(result.content)} characters")
+    add_span_event("academic_framework.generated", chars=len(result.content))
     
     # Parse the markdown response into sections (simplified parsing)
     content = result.content
@@ -1111,20 +1682,18 @@ def academic_framework_planner(state: OverallState, config: RunnableConfig) -> A
     return sections
 
 
-def academic_abstract_generator(state: OverallState, config: RunnableConfig) -> AcademicAbstractState:
+@traced_node
+@offload_blobs
+def academic_abstract_generator(state: AcademicResearchState, config: RunnableConfig) -> AcademicAbstractState:
     """学術論文のアブストラクトを生成するエージェント"""
     
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     reasoning_model = state.get("reasoning_model") or configurable.answer_model
     
     # Initialize LLM
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0.1,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    structured_llm = llm.with_structured_output(AcademicAbstract)
+    llm = chat_model(context, reasoning_model, temperature=0.1)
+    structured_llm = structured_output(llm, AcademicAbstract)
     
     # Create full paper draft from framework
     framework = state.get("academic_framework", {})
@@ -1156,7 +1725,7 @@ def academic_abstract_generator(state: OverallState, config: RunnableConfig) ->
     # Generate abstract
     result = structured_llm.invoke(formatted_prompt)
     
-    print(f"DEBUG - Academic abstract generated: {len(result.abstract_text)} characters")
+    add_span_event("academic_abstract.generated", chars=len(result.abstract_text))
     
     return {
         "abstract_text": result.abstract_text,
@@ -1164,26 +1733,8 @@ def academic_abstract_generator(state: OverallState, config: RunnableConfig) ->
     }
 
 
-def literature_researcher(state: OverallState, config: RunnableConfig) -> LiteratureResearchState:
-    """先行研究・文献調査を実施するエージェント"""
-    
-    configurable = Configuration.from_runnable_config(config)
-    reasoning_model = state.get("reasoning_model") or configurable.answer_model
-    
-    # Initialize LLM
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0.1,  # Very low temperature for factual research
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    structured_llm = llm.with_structured_output(LiteratureResearch)
-    
-    # Get abstract for research
-    abstract_data = state.get("academic_abstract", "")
-    
-    # Perform web search for literature
-    research_question = get_research_topic(state["messages"])
+def run_literature_searches(research_question: str, model: str) -> str:
+    """学術的情報源向けの検索クエリを並列に実行し、結果を結合して返す"""
     
     # Create focused search queries for academic sources
     academic_queries = [
@@ -1192,50 +1743,69 @@ def literature_researcher(state: OverallState, config: RunnableConfig) -> Litera
         f"{research_question} 政府発表 公式情報"
     ]
     
-    search_results = []
-    for i, query in enumerate(academic_queries):
+    def search_one(i: int, query: str) -> str:
         try:
-            # Use existing Google Search API functionality
-            response = genai_client.models.generate_content(
-                model=reasoning_model,
-                contents=f"以下のトピックについて、信頼性の高い学術的情報源から事実情報を調査してください: {query}",
-                config={
-                    "tools": [{"google_search": {}}],
-                    "temperature": 0.1,
-                },
+            modified_text, _ = grounded_search(
+                f"以下のトピックについて、信頼性の高い学術的情報源から事実情報を調査してください: {query}",
+                model,
+                i,
+                temperature=0.1,
             )
-            
-            # Process search results safely
-            if response and response.text:
-                # Resolve URLs and get citations like in web_research
-                if (hasattr(response, 'candidates') and 
-                    response.candidates and 
-                    len(response.candidates) > 0):
-                    candidate = response.candidates[0]
-                    if (hasattr(candidate, 'grounding_metadata') and 
-                        candidate.grounding_metadata and 
-                        hasattr(candidate.grounding_metadata, 'grounding_chunks') and
-                        candidate.grounding_metadata.grounding_chunks is not None):
-                        try:
-                            resolved_urls = resolve_urls(candidate.grounding_metadata.grounding_chunks, i)
-                            citations = get_citations(response, resolved_urls) if resolved_urls else None
-                            if citations:
-                                modified_text = insert_citation_markers(response.text, citations)
-                            else:
-                                modified_text = response.text
-                            search_results.append(f"検索クエリ: {query}\n結果: {modified_text}\n---")
-                        except Exception as citation_error:
-                            print(f"Citation processing failed for '{query}': {citation_error}")
-                            search_results.append(f"検索クエリ: {query}\n結果: {response.text}\n---")
-                    else:
-                        search_results.append(f"検索クエリ: {query}\n結果: {response.text}\n---")
-                else:
-                    search_results.append(f"検索クエリ: {query}\n結果: {response.text}\n---")
+            return f"検索クエリ: {query}\n結果: {modified_text}\n---"
         except Exception as e:
-            print(f"Literature search failed for '{query}': {e}")
-            search_results.append(f"検索クエリ: {query}\nエラー: 検索に失敗しました\n---")
+            logger.warning("Literature search failed for '%s': %s", query, e)
+            return f"検索クエリ: {query}\nエラー: 検索に失敗しました\n---"
     
-    combined_search_results = "\n".join(search_results)
+    # The queries are independent, so run them concurrently (order is preserved)
+    with ThreadPoolExecutor(max_workers=len(academic_queries)) as executor:
+        search_results = list(executor.map(propagate_context(search_one), range(len(academic_queries)), academic_queries))
+    
+    return "\n".join(search_results)
+
+
+@traced_node
+@offload_blobs
+def literature_search(state: AcademicResearchState, config: RunnableConfig):
+    """先行研究の検索を投機的に実行するエージェント
+    
+    検索クエリは研究課題のみに依存するため、グラフ開始時に背景・フレームワーク・
+    アブストラクト生成と並行して実行し、literature_researcher のクリティカルパスから外す。
+    """
+    
+    context = get_run_context(config)
+    configurable = context.configurable
+    reasoning_model = state.get("reasoning_model") or configurable.answer_model
+    
+    conversation = conversation_view(state, context)
+    
+    return {
+        "literature_search_results": run_literature_searches(conversation.topic, reasoning_model),
+        "conversation_summary": conversation.summary,
+    }
+
+
+@traced_node
+@offload_blobs
+def literature_researcher(state: AcademicResearchState, config: RunnableConfig) -> LiteratureResearchState:
+    """先行研究・文献調査を実施するエージェント"""
+    
+    context = get_run_context(config)
+    configurable = context.configurable
+    reasoning_model = state.get("reasoning_model") or configurable.answer_model
+    
+    # Initialize LLM
+    llm = chat_model(context, reasoning_model, temperature=0.1)  # Very low temperature for factual research
+    structured_llm = structured_output(llm, LiteratureResearch)
+    
+    # Get abstract for research
+    abstract_data = state.get("academic_abstract", "")
+    
+    # Search results are normally prefetched by literature_search at graph entry
+    combined_search_results = state.get("literature_search_results")
+    if combined_search_results is None:
+        combined_search_results = run_literature_searches(
+            conversation_view(state, context).topic, reasoning_model
+        )
     
     # Format prompt with search results
     formatted_prompt = LITERATURE_RESEARCH_PROMPT.format(
@@ -1245,7 +1815,7 @@ def literature_researcher(state: OverallState, config: RunnableConfig) -> Litera
     # Generate literature research
     result = structured_llm.invoke(formatted_prompt)
     
-    print(f"DEBUG - Literature research completed: {len(result.factual_findings)} facts found")
+    add_span_event("literature_research.completed", factual_findings=len(result.factual_findings))
     
     return {
         "factual_findings": result.factual_findings,
@@ -1255,19 +1825,17 @@ def literature_researcher(state: OverallState, config: RunnableConfig) -> Litera
     }
 
 
-def academic_synthesizer(state: OverallState, config: RunnableConfig):
+@traced_node
+@offload_blobs
+def academic_synthesizer(state: AcademicResearchState, config: RunnableConfig):
     """最終的な学術論文を統合・作成するエージェント"""
     
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     reasoning_model = state.get("reasoning_model") or configurable.answer_model
     
     # Initialize LLM
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0.2,
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
+    llm = chat_model(context, reasoning_model, temperature=0.2)
     
     # Prepare data
     abstract_data = state.get("academic_abstract", "")
@@ -1299,7 +1867,7 @@ def academic_synthesizer(state: OverallState, config: RunnableConfig):
     # Generate final academic report
     result = llm.invoke(formatted_prompt)
     
-    print(f"DEBUG - Academic report synthesized: {len(result.content)} characters")
+    add_span_event("academic_synthesis.completed", chars=len(result.content))
     
     return {
         "academic_draft": result.content,
@@ -1307,20 +1875,18 @@ def academic_synthesizer(state: OverallState, config: RunnableConfig):
     }
 
 
-def academic_reviewer(state: OverallState, config: RunnableConfig) -> AcademicReviewState:
+@traced_node
+@offload_blobs
+def academic_reviewer(state: AcademicResearchState, config: RunnableConfig) -> AcademicReviewState:
     """学術論文のレビューを実施するエージェント"""
     
-    configurable = Configuration.from_runnable_config(config)
+    context = get_run_context(config)
+    configurable = context.configurable
     reasoning_model = state.get("reasoning_model") or configurable.reflection_model
     
     # Initialize LLM
-    llm = ChatGoogleGenerativeAI(
-        model=reasoning_model,
-        temperature=0.3,  # Slightly higher temperature for critical analysis
-        max_retries=2,
-        api_key=os.getenv("GEMINI_API_KEY"),
-    )
-    structured_llm = llm.with_structured_output(AcademicReview)
+    llm = chat_model(context, reasoning_model, temperature=0.3)  # Slightly higher temperature for critical analysis
+    structured_llm = structured_output(llm, AcademicReview)
     
     # Get academic draft for review
     academic_draft = state.get("academic_draft", "")
@@ -1331,7 +1897,7 @@ def academic_reviewer(state: OverallState, config: RunnableConfig) -> AcademicRe
     # Generate review
     result = structured_llm.invoke(formatted_prompt)
     
-    print(f"DEBUG - Academic review completed: revision_needed={result.revision_needed}")
+    add_span_event("academic_review.completed", revision_needed=result.revision_needed)
     
     return {
         "overall_assessment": result.overall_assessment,
@@ -1342,6 +1908,19 @@ def academic_reviewer(state: OverallState, config: RunnableConfig) -> AcademicRe
     }
 
 
+@traced_node
+@offload_blobs
+def route_after_academic_synthesis(state: AcademicResearchState, config: RunnableConfig):
+    """実行期限が近い場合はレビューを省略して終了するルーティング関数"""
+    
+    context = get_run_context(config)
+    configurable = context.configurable
+    if should_wrap_up(state, configurable):
+        add_span_event("academic_review.skipped", reason="deadline")
+        return END
+    return "academic_reviewer"
+
+
 # ============================================================================
 # ACADEMIC RESEARCH FRAMEWORK GRAPH (学術論文フレームワーク用グラフ)
 # ============================================================================
@@ -1351,12 +1930,13 @@ def build_academic_research_graph():
     from langgraph.graph import StateGraph, START, END
     
     # Initialize academic research graph
-    academic_builder = StateGraph(OverallState)
+    academic_builder = StateGraph(AcademicResearchState)
     
     # Add academic research nodes
     academic_builder.add_node("academic_background_generator", academic_background_generator)
     academic_builder.add_node("academic_framework_planner", academic_framework_planner) 
     academic_builder.add_node("academic_abstract_generator", academic_abstract_generator)
+    academic_builder.add_node("literature_search", literature_search)
     academic_builder.add_node("literature_researcher", literature_researcher)
     academic_builder.add_node("academic_synthesizer", academic_synthesizer)
     academic_builder.add_node("academic_reviewer", academic_reviewer)
@@ -1365,12 +1945,19 @@ def build_academic_research_graph():
     academic_builder.add_edge(START, "academic_background_generator")
     academic_builder.add_edge("academic_background_generator", "academic_framework_planner")
     academic_builder.add_edge("academic_framework_planner", "academic_abstract_generator")
-    academic_builder.add_edge("academic_abstract_generator", "literature_researcher")
+    # Literature searches only depend on the research question: start them at entry
+    # and join with the abstract before the literature review
+    academic_builder.add_edge(START, "literature_search")
+    academic_builder.add_edge(["academic_abstract_generator", "literature_search"], "literature_researcher")
     academic_builder.add_edge("literature_researcher", "academic_synthesizer")
-    academic_builder.add_edge("academic_synthesizer", "academic_reviewer")
+    academic_builder.add_conditional_edges(
+        "academic_synthesizer",
+        route_after_academic_synthesis,
+        ["academic_reviewer", END]
+    )
     academic_builder.add_edge("academic_reviewer", END)
     
-    return academic_builder.compile(name="academic-research-agent")
+    return academic_builder.compile(name="academic-research-agent", checkpointer=checkpointer)
 
 
 # Build academic research graph
@@ -1,10 +1,14 @@
 import json
 import os
+import tempfile
+import threading
 from datetime import datetime
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass, asdict
 import uuid
 
+from agent.metrics import time_history_operation
+
 
 @dataclass
 class SearchHistory:
@@ -34,6 +38,8 @@ class SearchHistoryManager:
         # より安全なパス処理
         base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
         self.history_file = os.path.join(base_dir, history_file)
+        # 読み込み→更新→書き込みをスレッド間で直列化（バッチ実行では複数スレッドが同時に保存する）
+        self._lock = threading.RLock()
         self._ensure_history_file()
     
     def _ensure_history_file(self):
@@ -81,18 +87,18 @@ class SearchHistoryManager:
         )
         
         try:
-            # 既存の履歴を読み込み
-            histories = self.load_histories()
-            
-            # 新しい履歴を先頭に追加
-            histories.insert(0, new_history.to_dict())
-            
-            # 最大100件まで保持
-            histories = histories[:100]
-            
-            # ファイルに保存
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump(histories, f, ensure_ascii=False, indent=2)
+            with self._lock:
+                # 既存の履歴を読み込み
+                histories = self.load_histories()
+                
+                # 新しい履歴を先頭に追加
+                histories.insert(0, new_history.to_dict())
+                
+                # 最大100件まで保持
+                histories = histories[:100]
+                
+                # ファイルに保存
+                self._write_histories(histories)
             
             return history_id
             
@@ -100,13 +106,31 @@ class SearchHistoryManager:
             print(f"検索履歴の保存に失敗しました: {e}")
             return ""
     
+    def _write_histories(self, histories: List[Dict[str, Any]]) -> None:
+        """履歴ファイルを書き込み（所要時間をメトリクスに記録）
+
+        一時ファイルに書き出してから os.replace で置き換えるため、
+        読み込み側が書きかけのファイルを読むことはない。
+        """
+        directory = os.path.dirname(self.history_file) or "."
+        with time_history_operation("write"):
+            fd, tmp_path = tempfile.mkstemp(prefix=".search_history.", suffix=".tmp", dir=directory)
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(histories, f, ensure_ascii=False, indent=2)
+                os.replace(tmp_path, self.history_file)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+    
     def load_histories(self) -> List[Dict[str, Any]]:
         """すべての検索履歴を読み込み"""
         try:
             if not os.path.exists(self.history_file):
                 return []
             
-            with open(self.history_file, 'r', encoding='utf-8') as f:
+            with time_history_operation("read"), open(self.history_file, 'r', encoding='utf-8') as f:
                 data = json.load(f)
                 # データ構造の検証
                 if not isinstance(data, list):
@@ -128,15 +152,15 @@ class SearchHistoryManager:
     def delete_history(self, history_id: str) -> bool:
         """特定の履歴を削除"""
         try:
-            histories = self.load_histories()
-            original_length = len(histories)
-            histories = [h for h in histories if h.get('id') != history_id]
-            
-            if len(histories) < original_length:
-                with open(self.history_file, 'w', encoding='utf-8') as f:
-                    json.dump(histories, f, ensure_ascii=False, indent=2)
-                return True
-            return False
+            with self._lock:
+                histories = self.load_histories()
+                original_length = len(histories)
+                histories = [h for h in histories if h.get('id') != history_id]
+                
+                if len(histories) < original_length:
+                    self._write_histories(histories)
+                    return True
+                return False
             
         except Exception as e:
             print(f"履歴の削除に失敗しました: {e}")
@@ -145,8 +169,8 @@ class SearchHistoryManager:
     def clear_all_history(self) -> bool:
         """すべての履歴を削除"""
         try:
-            with open(self.history_file, 'w', encoding='utf-8') as f:
-                json.dump([], f, ensure_ascii=False, indent=2)
+            with self._lock:
+                self._write_histories([])
             return True
         except Exception as e:
             print(f"履歴の全削除に失敗しました: {e}")
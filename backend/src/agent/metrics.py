@@ -0,0 +1,363 @@
+"""In-process metrics for research runs and the history store.
+
+Metrics are rendered in the Prometheus text exposition format by the /metrics
+endpoint of app.py. Recording a value takes one short per-metric lock around a
+dict update, so instrumentation stays cheap on the hot path; everything derived
+(cache hit ratios, file sizes) is computed when the endpoint is scraped.
+
+Run, node and LLM metrics are fed by a span processor (see agent.tracing) and a
+LangChain callback handler, so graph code does not need to call this module.
+Both are on unless METRICS_ENABLED is set to false, which also leaves spans
+no-ops when no tracing exporter is configured. Retries of the google-genai
+client are counted through its retry hook (see count_genai_retries).
+"""
+
+import contextvars
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+from agent.tracing import Span, SpanProcessor, add_span_processor
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+RUN_DURATION_BUCKETS = (5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 1800.0, 3600.0)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.label_names)
+
+    def _format_labels(self, key: LabelValues, extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.label_names, key))
+        if extra is not None:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._render_samples())
+        return lines
+
+    def _render_samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def snapshot(self) -> Dict[LabelValues, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def _render_samples(self) -> List[str]:
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(self.snapshot().items())]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down per label set."""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        super().__init__(name, documentation, label_names)
+        self._values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{self._format_labels(key)} {value}" for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets per label set."""
+
+    metric_type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def _render_samples(self) -> List[str]:
+        with self._lock:
+            values = {key: (list(entry[0]), entry[1], entry[2]) for key, entry in self._values.items()}
+        lines = []
+        for key, (bucket_counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{self._format_labels(key, ('le', le))} {cumulative}")
+            lines.append(f"{self.name}_sum{self._format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{self._format_labels(key)} {count}")
+        return lines
+
+
+class _Timer:
+    """Context manager that observes the elapsed seconds on a histogram."""
+
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram: Histogram, labels: Dict[str, Any]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self._histogram.observe(time.perf_counter() - self._start, **self._labels)
+
+
+_registry: List[_Metric] = []
+
+
+def _register(metric: _Metric) -> Any:
+    _registry.append(metric)
+    return metric
+
+
+runs_active = _register(Gauge("agent_runs_active", "Graph runs currently in progress", ["graph"]))
+runs_total = _register(Counter("agent_runs_total", "Finished graph runs", ["graph", "effort", "status"]))
+run_duration_seconds = _register(Histogram(
+    "agent_run_duration_seconds", "Wall time of graph runs", ["graph", "effort"], buckets=RUN_DURATION_BUCKETS,
+))
+node_duration_seconds = _register(Histogram("agent_node_duration_seconds", "Latency of graph nodes", ["node"]))
+llm_calls_total = _register(Counter("agent_llm_calls_total", "LLM and grounded search calls", ["model", "kind"]))
+llm_errors_total = _register(Counter("agent_llm_errors_total", "Failed LLM and grounded search calls", ["model", "kind"]))
+llm_duration_seconds = _register(Histogram("agent_llm_duration_seconds", "Latency of LLM and grounded search calls", ["model", "kind"]))
+llm_tokens_total = _register(Counter("agent_llm_tokens_total", "Tokens used by LLM and grounded search calls", ["model", "direction"]))
+retries_total = _register(Counter("agent_retries_total", "Retried API requests", ["source"]))
+history_operation_seconds = _register(Histogram(
+    "agent_history_operation_duration_seconds", "Latency of search history store reads and writes", ["operation"],
+))
+history_file_size_bytes = _register(Gauge("agent_history_file_size_bytes", "Size of the search history file"))
+cache_requests_total = _register(Counter("agent_cache_requests_total", "Cache lookups", ["cache", "result"]))
+cache_hit_ratio = _register(Gauge("agent_cache_hit_ratio", "Share of cache lookups that were hits", ["cache"]))
+follow_up_queries_total = _register(Counter(
+    "agent_follow_up_queries_total",
+    "Follow-up queries proposed by reflection: dispatched, or dropped as a duplicate of an executed or a sibling query",
+    ["result"],
+))
+structured_outputs_total = _register(Counter(
+    "agent_structured_outputs_total", "Structured LLM outputs by outcome (valid, repaired, retried, failed)", ["schema", "result"],
+))
+
+
+def time_history_operation(operation: str) -> _Timer:
+    """Time a search history store operation ("read" or "write")."""
+    return _Timer(history_operation_seconds, {"operation": operation})
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Count a cache lookup for the hit ratio of the named cache."""
+    cache_requests_total.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_follow_up_queries(dispatched: int, duplicates_of_executed: int, duplicates_in_batch: int) -> None:
+    """Count the follow-up queries of one reflection; the duplicates are searches avoided."""
+    for result, count in (
+        ("dispatched", dispatched),
+        ("duplicate_of_executed", duplicates_of_executed),
+        ("duplicate_in_batch", duplicates_in_batch),
+    ):
+        if count:
+            follow_up_queries_total.inc(count, result=result)
+
+
+def record_structured_output(schema: str, result: str) -> None:
+    """Count a structured output: "valid", "repaired" locally, "retried" with another call or "failed"."""
+    structured_outputs_total.inc(schema=schema, result=result)
+
+
+def render_metrics() -> str:
+    """Render every metric in the Prometheus text exposition format."""
+    lookups: Dict[str, List[float]] = {}
+    for (cache, result), value in cache_requests_total.snapshot().items():
+        totals = lookups.setdefault(cache, [0.0, 0.0])
+        totals[0 if result == "hit" else 1] += value
+    for cache, (hits, misses) in lookups.items():
+        cache_hit_ratio.set(hits / (hits + misses) if hits + misses else 0.0, cache=cache)
+
+    lines: List[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+_metrics_enabled: Optional[bool] = None
+
+
+def metrics_enabled() -> bool:
+    """Whether run, node and LLM metrics are collected (METRICS_ENABLED, read on first use)."""
+    global _metrics_enabled
+    if _metrics_enabled is None:
+        _metrics_enabled = os.getenv("METRICS_ENABLED", "true").strip().lower() not in ("0", "false", "no", "off")
+    return _metrics_enabled
+
+
+class MetricsSpanProcessor(SpanProcessor):
+    """Turns finished node, LLM and search spans into metrics."""
+
+    def enabled(self) -> bool:
+        return metrics_enabled()
+
+    def on_end(self, span: Span) -> None:
+        seconds = span.duration_ms / 1000
+        if span.name.startswith("node."):
+            node_duration_seconds.observe(seconds, node=span.attributes.get("node", span.name[5:]))
+            return
+        if span.name == "llm.call":
+            kind = "chat"
+        elif span.name == "search.grounded":
+            kind = "search"
+        else:
+            return
+        model = span.attributes.get("model", "unknown")
+        llm_calls_total.inc(model=model, kind=kind)
+        llm_duration_seconds.observe(seconds, model=model, kind=kind)
+        if span.status != "ok":
+            llm_errors_total.inc(model=model, kind=kind)
+        for direction in ("input", "output"):
+            tokens = span.attributes.get(f"{direction}_tokens")
+            if tokens:
+                llm_tokens_total.inc(tokens, model=model, direction=direction)
+
+
+class RunMetricsCallbackHandler(BaseCallbackHandler):
+    """LangChain callback handler that tracks active runs and run durations of the graphs."""
+
+    def __init__(self) -> None:
+        self._runs: Dict[Any, Tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def on_chain_start(
+        self, serialized: Dict[str, Any], inputs: Any, *, run_id: Any, parent_run_id: Any = None, **kwargs: Any
+    ) -> None:
+        if parent_run_id is not None or not metrics_enabled():
+            return
+        graph_name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        with self._lock:
+            self._runs[run_id] = (graph_name, time.perf_counter())
+        runs_active.inc(graph=graph_name)
+
+    def _finish(self, run_id: Any, outputs: Any, status: str) -> None:
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+        if run is None:
+            return
+        graph_name, started = run
+        effort = outputs.get("effort_level") if isinstance(outputs, dict) else None
+        effort = effort or "unknown"
+        runs_active.dec(graph=graph_name)
+        runs_total.inc(graph=graph_name, effort=effort, status=status)
+        run_duration_seconds.observe(time.perf_counter() - started, graph=graph_name, effort=effort)
+
+    def on_chain_end(self, outputs: Any, *, run_id: Any, **kwargs: Any) -> None:
+        self._finish(run_id, outputs, "ok")
+
+    def on_chain_error(self, error: BaseException, *, run_id: Any, **kwargs: Any) -> None:
+        self._finish(run_id, None, "error")
+
+    def on_retry(self, retry_state: Any, *, run_id: Any, **kwargs: Any) -> None:
+        retries_total.inc(source="langchain")
+
+
+def count_genai_retries(client: Any) -> Any:
+    """Count the retries of a google-genai client in agent_retries_total.
+
+    Chains a counter onto the before_sleep hook of the client's tenacity retry
+    policies, which runs once before each retry. Returns the client. Clients of
+    google-genai versions without these policies are returned unchanged.
+    """
+    api_client = getattr(client, "_api_client", None)
+    for name in ("_retry", "_async_retry"):
+        retrying = getattr(api_client, name, None)
+        if retrying is None or not hasattr(retrying, "before_sleep"):
+            continue
+        original = retrying.before_sleep
+
+        def before_sleep(retry_state: Any, original: Any = original) -> Any:
+            retries_total.inc(source="google_genai")
+            if original is not None:
+                return original(retry_state)
+
+        retrying.before_sleep = before_sleep
+    return client
+
+
+add_span_processor(MetricsSpanProcessor())
+
+_run_metrics_handler = RunMetricsCallbackHandler()
+_run_metrics_var: contextvars.ContextVar[Optional[BaseCallbackHandler]] = contextvars.ContextVar(
+    "agent_run_metrics", default=_run_metrics_handler
+)
+register_configure_hook(_run_metrics_var, inheritable=True)
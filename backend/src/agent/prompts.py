@@ -165,6 +165,8 @@ JSONスキーマ:
   "estimated_depth": "comprehensive"
 }}
 
+サブトピックは{min_sub_topics}〜{max_sub_topics}個、各サブトピックの検索クエリは最大{queries_per_sub_topic}個にしてください。
+
 今度は、以下のユーザー質問に対するJSON出力を生成してください。
 
 ユーザー質問: "{user_question}"
@@ -218,7 +220,7 @@ SYNTHESIZER_PROMPT = """
 1. **事実確認の前提**: まず各サブトピックで実際に情報が見つかったかを確認してください
 2. **マークダウン形式**: 完全なマークダウン形式でレポートを作成してください
 3. **日本語での出力**: すべての内容は自然で読みやすい日本語で作成してください
-4. **情報源の引用**: 確認できた情報の各部分について、必ず情報源を引用してください。文またはクレームの最後に、`[情報源名](URL)`の形式で引用マーカーを追加してください
+4. **情報源の引用**: 確認できた情報の各部分について、必ず情報源を引用してください。文またはクレームの最後に、リサーチ結果中の引用（`[情報源名](URL)` または `[S1-0-2]` のような引用トークン）をそのままの形式で追加してください
 5. **事実のみの記述**: 確認できた事実のみを記述し、推測や一般的な情報は含めないでください
 
 各サブトピックのリサーチ結果:
@@ -230,6 +232,45 @@ SYNTHESIZER_PROMPT = """
 情報が不十分な場合は、その旨を明記し、追加調査が必要であることを示してください。
 """
 
+# Section Draft Prompt - drafts one report section as soon as its sub-topic research completes
+SECTION_DRAFT_PROMPT = """
+あなたは専門のレポートライター兼アナリストです。調査レポート「{research_question}」のうち、サブトピック「{topic_name}」のセクションのみを、**実際の検索結果に基づいてのみ**執筆してください。
+
+## 重要な制約事項
+- **検索で情報が見つからなかった場合は、「該当する情報は確認できませんでした」と明記してください**
+- **推測、想定、一般的な知識、テンプレート的な内容は一切含めないでください**
+- 他のサブトピックやレポート全体の導入・結論は書かないでください（別途統合されます）
+
+## 指示
+1. 見出しは `## {topic_name}` で始めてください。小見出しには `###` を使用してください
+2. 確認できた情報の各部分について、文またはクレームの最後に引用を付けてください（リサーチ結果中の `[情報源名](URL)` または `[S1-0-2]` のような引用トークンをそのまま使用してください）
+3. すべての内容は自然で読みやすい日本語で作成してください
+4. セクション本文のみを出力し、前置きや説明は一切含めないでください
+
+サブトピックのリサーチ結果:
+-----------------
+{research_result}
+-----------------
+"""
+
+# Integration Prompt - frames precomputed section drafts with an introduction and conclusion
+INTEGRATION_PROMPT = """
+あなたは専門のレポートライター兼アナリストです。トピック「{research_question}」の調査レポートについて、各セクションはすでに執筆済みです。
+レポート全体のタイトル、導入部、結論のみを作成してください。
+
+## 重要な制約事項
+- 導入部と結論は、以下のセクションに**実際に記載されている内容のみ**に基づいてください
+- セクション間で矛盾する情報がある場合は、結論でその食い違いを指摘し、事実の確認が必要であることを明記してください
+- 情報が不十分なセクションがある場合は、結論で追加調査が必要であることを明記してください
+- セクション本文を繰り返したり書き直したりしないでください
+- すべての内容は自然で読みやすい日本語で作成してください
+
+執筆済みのセクション:
+-----------------
+{section_drafts}
+-----------------
+"""
+
 # Critique Prompt - quality assurance loop with fact-checking focus
 CRITIQUE_PROMPT = """
 あなたは事実確認を重視する細心で批判的な編集者です。提供された調査レポートのドラフトを以下の基準に基づいてレビューし、評価することがあなたのタスクです：
@@ -253,6 +294,8 @@ CRITIQUE_PROMPT = """
 - 推測や根拠のない情報が含まれている場合は、厳しく指摘してください
 - 改善のための具体的で実行可能な提案を提供してください
 - 事実に基づく内容のみで構成されている場合は、「レポートは事実に基づいており満足のいくものです」と述べてください
+- 修正が必要な場合は、修正対象のセクションを`section_revisions`に列挙してください。`section_title`にはドラフト中の見出し（`#`記号を除く）をそのまま記載し、`instruction`にはそのセクションで修正すべき点を具体的に記載してください
+- 問題のないセクションは`section_revisions`に含めないでください
 
 レビューするレポートドラフト:
 -----------------
@@ -262,6 +305,49 @@ CRITIQUE_PROMPT = """
 事実確認を重視した批評を開始してください（日本語で回答）。
 """
 
+# Section Revision Prompt - rewrites a single section flagged by the critique agent
+SECTION_REVISION_PROMPT = """
+あなたは専門のレポートライターです。調査レポートの一部のセクションについて、批評フィードバックに基づく修正を依頼されています。
+
+## 修正指示
+{instructions}
+
+## レポート全体への批評（このセクションに関係する点のみ反映してください）
+{report_feedback}
+
+## 修正対象のセクション
+-----------------
+{section_text}
+-----------------
+
+## 指示
+- 指摘された問題のみを修正し、それ以外の内容は可能な限りそのまま維持してください
+- 見出し行（`{section_heading}`）はそのまま残してください
+- マークダウン形式と既存の引用（`[情報源名](URL)` や `[S1-0-2]` のような引用トークン）を維持してください
+- 推測や検索結果に基づかない情報を追加しないでください
+- 修正後のセクションのみを出力し、前置きや説明は一切含めないでください
+
+修正後のセクション：
+"""
+
+CONVERSATION_SUMMARY_PROMPT = """
+あなたは会話の記録係です。ユーザーとリサーチアシスタントのこれまでの会話の要約に、新しいやり取りを反映した要約を作成してください。この要約は、以降の調査で会話の文脈として使われます。
+
+## これまでの要約
+{summary}
+
+## 新しいやり取り
+-----------------
+{transcript}
+-----------------
+
+## 指示
+- ユーザーの質問・関心・条件（対象地域、期間、前提など）を優先して残してください
+- アシスタントの回答は、主要な結論と重要な数値のみを簡潔に残してください
+- 引用やURLは含めないでください
+- {max_words}語以内で、要約のみを出力してください
+"""
+
 # ============================================================================
 # ACADEMIC RESEARCH FRAMEWORK PROMPTS (学術論文フレームワーク)
 # ============================================================================
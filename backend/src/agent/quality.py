@@ -0,0 +1,146 @@
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+
+# Markers the researcher/synthesizer prompts ask the model to emit when nothing was found
+EMPTY_RESULT_MARKERS = (
+    "該当する情報は見つかりませんでした",
+    "該当する情報は確認できませんでした",
+    "追加の調査が必要です",
+)
+
+# Markdown links and citation tokens ("[S3-12]", see agent.utils.citation_token)
+_CITATION_RE = re.compile(r"\[[^\]]+\]\(https?://[^)\s]+\)|\[S[0-9][0-9-]*\]")
+_HEADING_RE = re.compile(r"^#{1,6}\s+(.+)$", re.MULTILINE)
+
+
+@dataclass
+class QualityScore:
+    """ドラフトレポートのローカル品質スコア（各項目は0.0〜1.0）"""
+    citation_density: float
+    section_coverage: float
+    length: float
+    empty_results: float
+    total: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _bigrams(text: str) -> set:
+    text = re.sub(r"[\s#*_`・、。「」()（）:：\-]+", "", text.lower())
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def _topic_covered(topic_name: str, headings: List[str], report: str) -> bool:
+    """Check whether a sub-topic is covered by a heading (or, failing that, the body)."""
+    topic_grams = _bigrams(topic_name)
+    if not topic_grams:
+        return True
+    for heading in headings:
+        heading_grams = _bigrams(heading)
+        # Containment rather than Jaccard: headings are often longer than topic names
+        if len(topic_grams & heading_grams) / len(topic_grams) >= 0.5:
+            return True
+    return topic_name.strip() in report
+
+
+def score_draft_report(
+    report: str,
+    sub_topics: Optional[List[Dict[str, Any]]] = None,
+    min_length: int = 1500,
+    citations_per_1000_chars: float = 2.0,
+) -> QualityScore:
+    """Score a draft report locally without any LLM call.
+
+    Combines citation density, coverage of the planned sub-topics by report
+    headings, report length and the number of empty-result markers into a
+    weighted total in the range 0.0-1.0.
+    """
+    report = report or ""
+    length = len(report)
+
+    citations = len(_CITATION_RE.findall(report))
+    expected_citations = max(1.0, length / 1000 * citations_per_1000_chars)
+    citation_density = min(1.0, citations / expected_citations)
+
+    topic_names = [topic.get("topic_name", "") for topic in (sub_topics or [])]
+    topic_names = [name for name in topic_names if name.strip()]
+    if topic_names:
+        headings = _HEADING_RE.findall(report)
+        covered = sum(1 for name in topic_names if _topic_covered(name, headings, report))
+        section_coverage = covered / len(topic_names)
+    else:
+        section_coverage = 1.0
+
+    length_score = min(1.0, length / min_length) if min_length > 0 else 1.0
+
+    marker_count = sum(report.count(marker) for marker in EMPTY_RESULT_MARKERS)
+    empty_results = max(0.0, 1.0 - 0.25 * marker_count)
+
+    total = (
+        0.35 * citation_density
+        + 0.35 * section_coverage
+        + 0.15 * length_score
+        + 0.15 * empty_results
+    )
+    # Empty-result markers or an uncovered sub-topic are real gaps the critique should see
+    if marker_count or section_coverage < 1.0:
+        total = min(total, 0.75)
+
+    return QualityScore(
+        citation_density=round(citation_density, 3),
+        section_coverage=round(section_coverage, 3),
+        length=round(length_score, 3),
+        empty_results=round(empty_results, 3),
+        total=round(total, 3),
+    )
+
+
+@dataclass
+class LoopNovelty:
+    """研究ループ1回分の新規性（各項目は0.0〜1.0）"""
+    new_text: float
+    new_sources: float
+    total: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _char_ngrams(texts: List[str], n: int) -> set:
+    grams = set()
+    for text in texts:
+        # Citations differ per search even when the content repeats, so they are not content
+        text = re.sub(r"\s+", "", _CITATION_RE.sub("", text or ""))
+        grams.update(text[i:i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def score_loop_novelty(
+    previous_texts: List[str],
+    new_texts: List[str],
+    previous_sources: List[str],
+    new_sources: List[str],
+    ngram_size: int = 3,
+) -> LoopNovelty:
+    """Score how much a research loop added over the loops before it, without any LLM call.
+
+    new_text is the share of the loop's character n-grams (citations and whitespace
+    removed) not found in earlier research texts; new_sources is the share of the
+    loop's sources not cited before. The total is their mean.
+    """
+    new_grams = _char_ngrams(new_texts, ngram_size)
+    new_text = len(new_grams - _char_ngrams(previous_texts, ngram_size)) / len(new_grams) if new_grams else 0.0
+
+    loop_sources = set(new_sources)
+    new_source_share = len(loop_sources - set(previous_sources)) / len(loop_sources) if loop_sources else 0.0
+
+    return LoopNovelty(
+        new_text=round(new_text, 3),
+        new_sources=round(new_source_share, 3),
+        total=round((new_text + new_source_share) / 2, 3),
+    )
@@ -0,0 +1,171 @@
+import logging
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from agent.blobs import resolve_blobs
+from agent.configuration import Configuration
+from agent.tracing import add_span_event, propagate_context
+
+logger = logging.getLogger(__name__)
+
+
+# Futures of the branches still running after their quorum node returned, by branch key.
+# Only used with late_result_policy="fold". The branches themselves are recorded in the
+# graph state ("pending_late_branches"), so a run resumed in a process that has no
+# future for a branch runs it again instead of losing it.
+_late_futures: Dict[str, Future] = {}
+_late_futures_lock = threading.Lock()
+
+
+def quorum_enabled(configurable: Configuration) -> bool:
+    """Whether fan-outs should go through the quorum nodes instead of plain Send branches."""
+    return (
+        configurable.research_quorum_fraction < 1.0
+        or configurable.branch_timeout_seconds is not None
+    )
+
+
+def run_with_quorum(
+    fn: Callable[[Dict[str, Any]], Dict[str, Any]],
+    payloads: Sequence[Dict[str, Any]],
+    labels: Sequence[str],
+    configurable: Configuration,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Any], List[Dict[str, Any]]]:
+    """Run one branch per payload and return once a quorum of them has finished.
+
+    branch_timeout_seconds bounds the wait for the fan-out as a whole, counted
+    from its start, not the time of each branch. Returns the updates of the
+    finished branches (in payload order), a run metadata update describing the
+    branches that were left behind, and the pending_late_branches state update.
+    Straggling branches keep running in the background; with
+    late_result_policy="fold" they are recorded (key, branch label and payload)
+    so fold_late_results() can pick them up later, otherwise their results are
+    dropped.
+    """
+    if not payloads:
+        return [], {}, []
+
+    executor = ThreadPoolExecutor(max_workers=len(payloads))
+    futures = [executor.submit(propagate_context(fn), payload) for payload in payloads]
+    required = max(1, math.ceil(len(futures) * configurable.research_quorum_fraction))
+    timeout = configurable.branch_timeout_seconds
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    done: set = set()
+    pending = set(futures)
+    while pending and len(done) < required:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            break
+        finished, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+        done |= finished
+    # Do not block on stragglers; they finish (or fail) on their own
+    executor.shutdown(wait=False)
+
+    updates = []
+    for label, future in zip(labels, futures):
+        if future not in done:
+            continue
+        if future.exception() is not None:
+            logger.warning("Branch '%s' failed: %s", label, future.exception())
+            continue
+        updates.append(resolve_blobs(future.result()))
+
+    late = [
+        (label, payload, future)
+        for label, payload, future in zip(labels, payloads, futures)
+        if future not in done
+    ]
+    if not late:
+        return updates, {}, []
+
+    metadata: Dict[str, Any] = {
+        "late_branches": [
+            {"branch": label, "policy": configurable.late_result_policy} for label, _, _ in late
+        ]
+    }
+    pending = []
+    if configurable.late_result_policy == "fold":
+        for label, payload, future in late:
+            key = str(uuid.uuid4())
+            with _late_futures_lock:
+                _late_futures[key] = future
+            pending.append({"key": key, "branch": label, "payload": dict(payload)})
+    add_span_event("quorum.reached", finished=len(done), total=len(futures), late=len(late))
+    return updates, metadata, pending
+
+
+def fold_late_results(
+    state: dict,
+    fn: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None,
+    final: bool = False,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """Collect the updates of the late branches in state["pending_late_branches"].
+
+    Branches that have finished since their quorum are folded in. A branch this
+    process has no future for (the run was resumed from a checkpoint, possibly in
+    another worker) is run again with fn. With final=True, branches that are still
+    running or have no future are dropped instead. Blob references in the updates
+    are resolved, since callers read their texts.
+
+    Returns the updates and the pending_late_branches state update settling every
+    branch that was folded or dropped.
+    """
+    updates = []
+    settled = []
+    rerun = []
+    for branch in state.get("pending_late_branches") or []:
+        key = branch["key"]
+        with _late_futures_lock:
+            future = _late_futures.get(key)
+            if future is not None and (future.done() or final):
+                del _late_futures[key]
+        if future is None:
+            if final or fn is None:
+                add_span_event("quorum.late_branch_dropped", branch=branch["branch"], reason="no_future")
+            else:
+                rerun.append(branch)
+            settled.append({"key": key, "settled": True})
+        elif future.done():
+            if future.exception() is None:
+                updates.append(resolve_blobs(future.result()))
+            settled.append({"key": key, "settled": True})
+        elif final:
+            add_span_event("quorum.late_branch_dropped", branch=branch["branch"], reason="still_running")
+            settled.append({"key": key, "settled": True})
+
+    if rerun:
+        add_span_event("quorum.late_branches_rerun", branches=len(rerun))
+        with ThreadPoolExecutor(max_workers=len(rerun)) as executor:
+            futures = [executor.submit(propagate_context(fn), branch["payload"]) for branch in rerun]
+        for branch, future in zip(rerun, futures):
+            if future.exception() is not None:
+                logger.warning("Late branch '%s' failed on rerun: %s", branch["branch"], future.exception())
+                continue
+            updates.append(resolve_blobs(future.result()))
+    return updates, settled
+
+
+def merge_branch_updates(updates: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """Merge branch updates the way the list and dict reducers of OverallState would."""
+    merged: Dict[str, Any] = {}
+    for update in updates:
+        for key, value in update.items():
+            if isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+            elif isinstance(value, dict) and isinstance(merged.get(key), dict):
+                # source_registry keeps the first entry, run_metadata concatenates lists
+                combined = dict(merged[key])
+                for inner_key, inner_value in value.items():
+                    if isinstance(inner_value, list) and isinstance(combined.get(inner_key), list):
+                        combined[inner_key] = combined[inner_key] + inner_value
+                    else:
+                        combined.setdefault(inner_key, inner_value)
+                merged[key] = combined
+            else:
+                merged[key] = value
+    return merged
@@ -0,0 +1,143 @@
+import contextvars
+import os
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tracers.context import register_configure_hook
+
+from agent.cache import SubTopicCache, sub_topic_cache
+from agent.configuration import Configuration
+
+# Callers that manage runs themselves may attach a RunContext under this configurable key
+RUN_CONTEXT_KEY = "__agent_run_context"
+
+
+class RunContext:
+    """Everything a run resolves once and its nodes share.
+
+    Holds the resolved Configuration (environment variables and configurable
+    values are read once per run), the API key, the thread id, the sub-topic cache
+    and a memo for per-run objects such as chat model clients. Nodes get it with
+    get_run_context(config); cross-cutting features such as limiters or further
+    caches belong here rather than in every node.
+    """
+
+    def __init__(
+        self,
+        configurable: Configuration,
+        api_key: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        sub_topic_cache: Optional[SubTopicCache] = None,
+    ):
+        self.configurable = configurable
+        self.api_key = api_key
+        self.thread_id = thread_id
+        self.sub_topic_cache = sub_topic_cache
+        self._lock = threading.Lock()
+        self._memo: Dict[Hashable, Any] = {}
+        self._memo_locks: Dict[Hashable, threading.Lock] = {}
+
+    @classmethod
+    def from_runnable_config(cls, config: Optional[RunnableConfig] = None) -> "RunContext":
+        configurable = (config or {}).get("configurable", {})
+        thread_id = configurable.get("thread_id")
+        return cls(
+            Configuration.from_runnable_config(config),
+            api_key=os.getenv("GEMINI_API_KEY"),
+            thread_id=str(thread_id) if thread_id is not None else None,
+            sub_topic_cache=sub_topic_cache,
+        )
+
+    def memo(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """Return the run's object for key, creating it with factory on first use.
+
+        Concurrent callers of the same key wait for one factory call; other keys are not blocked.
+        """
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+            key_lock = self._memo_locks.setdefault(key, threading.Lock())
+        with key_lock:
+            with self._lock:
+                if key in self._memo:
+                    return self._memo[key]
+            value = factory()
+            with self._lock:
+                self._memo[key] = value
+            return value
+
+
+class RunContextRegistry(BaseCallbackHandler):
+    """Keeps one RunContext per graph run, found from the config of any of its nodes.
+
+    Tracks the top-level runs (the graph invocations) and the runs of their
+    direct children (the node tasks, whose run id is the parent_run_id of the
+    callbacks a node receives). A run's context is dropped when the run ends.
+    """
+
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._graph_runs: set = set()
+        self._task_runs: Dict[Any, Any] = {}  # task run id -> graph run id
+        self._contexts: Dict[Any, RunContext] = {}
+
+    def on_chain_start(
+        self, serialized: Dict[str, Any], inputs: Any, *, run_id: Any, parent_run_id: Any = None, **kwargs: Any
+    ) -> None:
+        with self._lock:
+            if parent_run_id is None:
+                self._graph_runs.add(run_id)
+            elif parent_run_id in self._graph_runs:
+                self._task_runs[run_id] = parent_run_id
+
+    def _finish(self, run_id: Any) -> None:
+        with self._lock:
+            if self._task_runs.pop(run_id, None) is None and run_id in self._graph_runs:
+                self._graph_runs.discard(run_id)
+                self._contexts.pop(run_id, None)
+
+    def on_chain_end(self, outputs: Any, *, run_id: Any, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def on_chain_error(self, error: BaseException, *, run_id: Any, **kwargs: Any) -> None:
+        self._finish(run_id)
+
+    def get(self, config: Optional[RunnableConfig]) -> RunContext:
+        callbacks = (config or {}).get("callbacks")
+        task_run_id = getattr(callbacks, "parent_run_id", None)
+        with self._lock:
+            graph_run_id = self._task_runs.get(task_run_id)
+            if graph_run_id is not None and graph_run_id in self._contexts:
+                return self._contexts[graph_run_id]
+        # Resolved outside the lock; a racing node of the same run may resolve it too
+        context = RunContext.from_runnable_config(config)
+        if graph_run_id is None:
+            # Not called from a node of a top-level graph run (e.g. a direct call)
+            return context
+        with self._lock:
+            if graph_run_id not in self._graph_runs:
+                return context
+            return self._contexts.setdefault(graph_run_id, context)
+
+
+_registry = RunContextRegistry()
+_registry_var: contextvars.ContextVar[Optional[BaseCallbackHandler]] = contextvars.ContextVar(
+    "agent_run_context_registry", default=_registry
+)
+register_configure_hook(_registry_var, inheritable=True)
+
+
+def get_run_context(config: Optional[RunnableConfig]) -> RunContext:
+    """Return the RunContext of the run a node config belongs to.
+
+    Uses the context attached under RUN_CONTEXT_KEY if there is one; otherwise the
+    context is created by the first node of the run that asks for it.
+    """
+    attached = (config or {}).get("configurable", {}).get(RUN_CONTEXT_KEY)
+    if attached is not None:
+        return attached
+    return _registry.get(config)
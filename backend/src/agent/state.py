@@ -10,38 +10,119 @@ from typing_extensions import Annotated
 import operator
 
 
-class OverallState(TypedDict):
+def merge_run_metadata(left: dict | None, right: dict | None) -> dict:
+    """Reducer for run metadata: list values are concatenated, other values are replaced."""
+    merged = dict(left or {})
+    for key, value in (right or {}).items():
+        if isinstance(value, list) and isinstance(merged.get(key), list):
+            merged[key] = merged[key] + value
+        else:
+            merged[key] = value
+    return merged
+
+
+def merge_sources(left: list | None, right: list | None) -> list:
+    """Reducer for citation segments: appends right, skipping short urls already present."""
+    merged = list(left or [])
+    seen = {source.get("short_url") for source in merged}
+    for source in right or []:
+        key = source.get("short_url")
+        if key in seen:
+            continue
+        seen.add(key)
+        merged.append(source)
+    return merged
+
+
+def merge_source_registry(left: dict | None, right: dict | None) -> dict:
+    """Reducer for the source registry: union of both, entries already registered win."""
+    merged = dict(right or {})
+    merged.update(left or {})
+    return merged
+
+
+def merge_late_branches(left: list | None, right: list | None) -> list:
+    """Reducer for pending late branches: adds new branches, {"key", "settled": True} entries remove theirs."""
+    settled = {branch["key"] for branch in right or [] if branch.get("settled")}
+    merged = [branch for branch in left or [] if branch["key"] not in settled]
+    known = {branch["key"] for branch in merged}
+    for branch in right or []:
+        if not branch.get("settled") and branch["key"] not in known:
+            known.add(branch["key"])
+            merged.append(branch)
+    return merged
+
+
+def merge_conversation_summary(left: dict | None, right: dict | None) -> dict:
+    """Reducer for the rolling conversation summary: the one covering more messages wins."""
+    if not left:
+        return right or {}
+    if not right:
+        return left
+    return right if right.get("messages", 0) >= left.get("messages", 0) else left
+
+
+class BaseResearchState(TypedDict):
+    """Channels shared by every research graph."""
     messages: Annotated[list, add_messages]
-    search_query: Annotated[list, operator.add]
-    web_research_result: Annotated[list, operator.add]
-    sources_gathered: Annotated[list, operator.add]
+    conversation_summary: Annotated[dict, merge_conversation_summary]  # Rolling summary of turns outside the prompt window (see agent.conversation)
+    sources_gathered: Annotated[list, merge_sources]  # {short_url, source_id} per cited segment
+    source_registry: Annotated[dict, merge_source_registry]  # source_id -> {label, value}
     initial_search_query_count: int
     max_research_loops: int
-    research_loop_count: int
     reasoning_model: str
-    research_plan: dict  # Contains sections and rationale
-    plan_approved: bool
     # 履歴保存用のメタデータ
     start_time: float  # 実行開始時刻
+    run_deadline_seconds: float  # 実行の時間予算（秒）。Configuration.run_deadline_seconds を上書き
     effort_level: str  # low/medium/high
     original_query: str  # ユーザーの元のクエリ
-    
-    # Enhanced multi-agent architecture fields
+    run_metadata: Annotated[dict, merge_run_metadata]  # 実行メタデータ（遅延ブランチなど）
+    pending_late_branches: Annotated[list, merge_late_branches]  # Quorum branches still to fold in: key, branch, payload (see agent.quorum)
+
+
+# Large text fields below may hold blob references instead of the text (see agent.blobs)
+
+class SimpleResearchState(BaseResearchState):
+    """State of simple_graph (plan, query, web research and reflection loop)."""
+    search_query: Annotated[list, operator.add]
+    web_research_result: Annotated[list, operator.add]
+    research_loop_count: int
+    novelty_baseline: dict  # Research results and sources already present at the previous reflection
+    research_plan: dict  # Contains sections and rationale
+    plan_approved: bool
+
+
+class EnhancedResearchState(BaseResearchState):
+    """State of enhanced_graph (enhanced multi-agent architecture)."""
     structured_plan: dict  # Detailed plan with sub-topics and queries
     parallel_research_results: Annotated[list, operator.add]  # Results from parallel research
+    section_drafts: Annotated[list, operator.add]  # Per sub-topic section drafts (incremental synthesis)
+    late_research_results: Annotated[list, operator.add]  # Results of straggling branches folded in after the quorum
     draft_report: str  # Initial synthesized report
+    quality_score: dict  # Local pre-screen score of the draft (see agent.quality)
     critique_feedback: str  # Feedback from critique agent
+    should_revise: bool  # Whether the critique agent requested a revision
+    revision_suggestions: list[str]  # Report-level suggestions from the critique agent
+    section_revisions: list[dict]  # Section-targeted revisions: section_title, instruction
     final_report: str  # Final polished report
     revision_count: int  # Number of revisions performed
     current_phase: str  # Track current phase: 'planning', 'researching', 'synthesizing', 'critiquing', 'finalizing'
-    
-    # Academic research framework state fields
+
+
+class AcademicResearchState(BaseResearchState):
+    """State of academic_graph (academic research framework)."""
     academic_background: dict  # Background and objective from academic analysis
     academic_framework: dict  # Complete academic paper framework
     academic_abstract: str  # Generated abstract
+    literature_search_results: str  # Prefetched grounded search results for literature research
     literature_research: dict  # Literature research results
     academic_draft: str  # Academic paper draft
     academic_review: dict  # Academic review results
+    current_phase: str
+
+
+class OverallState(SimpleResearchState, EnhancedResearchState, AcademicResearchState):
+    """Union of the per-graph states, for code that handles the state of any graph."""
 
 
 class ReflectionState(TypedDict):
@@ -50,6 +131,8 @@ class ReflectionState(TypedDict):
     follow_up_queries: Annotated[list, operator.add]
     research_loop_count: int
     number_of_ran_queries: int
+    max_research_loops: int  # read by evaluate_research, whose input is this schema
+    search_query: Annotated[list, operator.add]  # executed queries, read by evaluate_research
 
 
 # Enhanced state classes for multi-agent architecture
@@ -65,12 +148,15 @@ class ParallelResearchState(TypedDict):
     research_result: str
     sources_used: list[str]
     sub_topic_id: str
+    research_question: str
+    effort_level: str
 
 
 class SynthesisState(TypedDict):
     research_question: str
     research_results: list[str]  # Combined results from all parallel research
     draft_report: str
+    quality_score: dict
 
 
 class CritiqueState(TypedDict):
@@ -78,6 +164,7 @@ class CritiqueState(TypedDict):
     critique_feedback: str
     should_revise: bool
     revision_suggestions: list[str]
+    section_revisions: list[dict]
 
 
 class ResearchPlanState(TypedDict):
@@ -143,6 +230,11 @@ class WebSearchState(TypedDict):
     id: str
 
 
+class QuorumResearchState(TypedDict):
+    """Payload of the quorum fan-out nodes: one entry per branch to run."""
+    branches: list[dict]
+
+
 @dataclass(kw_only=True)
 class SearchStateOutput:
     running_summary: str = field(default=None)  # Final report
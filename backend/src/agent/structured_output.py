@@ -0,0 +1,257 @@
+"""Local repair of structured model outputs.
+
+with_structured_output() fails the call when the model returns JSON that is
+slightly off: a trailing comma, single quotes, a missing optional field, a string
+where the schema wants a list. structured_output() asks the model for the raw
+output as well and, when parsing fails, repairs it locally against the pydantic
+schema (tolerant JSON parsing, type coercion, schema defaults for missing fields
+that have one) before paying for another model call. Output that lacks a required
+field or leaves a required list empty is not repaired: made-up values such as no
+sub-topics or no queries would silently end the run, so it is retried instead. Outcomes are counted per schema in
+agent_structured_outputs_total: "valid", "repaired", "retried" and "failed".
+"""
+
+import ast
+import json
+import logging
+import re
+import typing
+from typing import Any, Dict, List, Optional, Type, get_args, get_origin
+
+from langchain_core.exceptions import OutputParserException
+from pydantic import BaseModel, ValidationError
+
+from agent.metrics import record_structured_output
+from agent.tracing import add_span_event
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_RETRIES = 1
+
+_FENCE_RE = re.compile(r"```(?:json|JSON)?\s*(.*?)```", re.DOTALL)
+_TRAILING_COMMA_RE = re.compile(r",\s*([}\]])")
+_BULLET_RE = re.compile(r"^\s*(?:[-*•・]|\d+[.)])\s*")
+_TRUE_STRINGS = {"true", "yes", "y", "1", "はい", "必要", "要"}
+_FALSE_STRINGS = {"false", "no", "n", "0", "none", "null", "いいえ", "不要", ""}
+
+
+def _close_truncated(text: str) -> str:
+    """Close the strings, arrays and objects left open by a truncated JSON text."""
+    stack: List[str] = []
+    in_string = escaped = False
+    for char in text:
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+        elif char in "}]" and stack:
+            stack.pop()
+    if in_string:
+        text += '"'
+    text = text.rstrip().rstrip(",:")
+    return text + "".join(reversed(stack))
+
+
+def _loads(text: str) -> Any:
+    """json.loads of the first JSON value in text, ignoring anything after it."""
+    return json.JSONDecoder().raw_decode(text)[0]
+
+
+def parse_json_tolerant(text: str) -> Any:
+    """Parse the JSON value in a model output, fixing common defects.
+
+    Handles markdown code fences, prose around the JSON, trailing commas,
+    Python literals (single quotes, True/False/None) and truncated output.
+    Raises ValueError when nothing usable is found.
+    """
+    fenced = _FENCE_RE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object or array in the output")
+    text = text[min(starts):].strip()
+
+    candidates = [text, _TRAILING_COMMA_RE.sub(r"\1", text)]
+    candidates.append(_close_truncated(candidates[-1]))
+    candidates.append(_TRAILING_COMMA_RE.sub(r"\1", candidates[-1]))
+    for candidate in candidates:
+        try:
+            return _loads(candidate)
+        except ValueError:
+            continue
+    for candidate in candidates:
+        try:
+            literal = re.sub(r"\btrue\b", "True", re.sub(r"\bfalse\b", "False", re.sub(r"\bnull\b", "None", candidate)))
+            return ast.literal_eval(literal)
+        except (ValueError, SyntaxError):
+            continue
+    raise ValueError("output is not repairable JSON")
+
+
+def _normalize_key(key: str) -> str:
+    return re.sub(r"[^a-z0-9]", "", re.sub(r"(?<!^)(?=[A-Z])", "_", str(key)).lower())
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+def _coerce(value: Any, annotation: Any) -> Any:
+    """Coerce a parsed value towards a field annotation; unknown shapes are left to pydantic."""
+    if annotation is str:
+        if isinstance(value, list):
+            return "\n".join(str(item) for item in value)
+        if isinstance(value, dict):
+            return json.dumps(value, ensure_ascii=False)
+        return str(value)
+    if annotation is bool:
+        if isinstance(value, str):
+            lowered = value.strip().lower()
+            if lowered in _TRUE_STRINGS:
+                return True
+            if lowered in _FALSE_STRINGS:
+                return False
+        return value
+    if annotation in (int, float):
+        if isinstance(value, str):
+            try:
+                return annotation(float(value.strip()))
+            except ValueError:
+                return value
+        return value
+    origin = get_origin(annotation)
+    if origin in (list, typing.List):
+        args = get_args(annotation)
+        item_type = args[0] if args else Any
+        if isinstance(value, str):
+            if _is_model(item_type):
+                try:
+                    value = parse_json_tolerant(value)
+                except ValueError:
+                    return value
+            else:
+                value = [_BULLET_RE.sub("", line).strip() for line in value.splitlines()]
+                value = [line for line in value if line]
+        if isinstance(value, (dict, BaseModel)) or not isinstance(value, (list, tuple)):
+            value = [value]
+        return [_coerce(item, item_type) for item in value if item is not None]
+    if _is_model(annotation):
+        if isinstance(value, str):
+            try:
+                value = parse_json_tolerant(value)
+            except ValueError:
+                return value
+        if isinstance(value, dict):
+            return coerce_to_schema(value, annotation)
+    return value
+
+
+def coerce_to_schema(data: Any, schema: Type[BaseModel]) -> BaseModel:
+    """Build a schema instance from loosely shaped data.
+
+    Keys are matched ignoring case and camelCase and values are coerced to the
+    field types. Missing fields only get the schema's default; a required field
+    that is missing (or null) or a required list that is empty makes the data
+    unrepairable. Raises ValueError.
+    """
+    fields = schema.model_fields
+    required = [name for name, field in fields.items() if field.is_required()]
+    if isinstance(data, BaseModel):
+        data = data.model_dump()
+    if isinstance(data, list):
+        # A bare list for a schema whose only required field is a list
+        if len(required) != 1 or get_origin(fields[required[0]].annotation) not in (list, typing.List):
+            raise ValueError(f"a list cannot be read as {schema.__name__}")
+        data = {required[0]: data}
+    if not isinstance(data, dict):
+        raise ValueError(f"{type(data).__name__} cannot be read as {schema.__name__}")
+
+    by_key = {_normalize_key(key): value for key, value in data.items()}
+    if not any(_normalize_key(name) in by_key for name in fields) and len(data) == 1:
+        # Wrapped in one extra object, e.g. {"StructuredResearchPlan": {...}} or {"properties": {...}}
+        (inner,) = data.values()
+        if isinstance(inner, dict):
+            return coerce_to_schema(inner, schema)
+
+    values: Dict[str, Any] = {}
+    for name, field in fields.items():
+        value = by_key.get(_normalize_key(name))
+        if value is not None:
+            values[name] = _coerce(value, field.annotation)
+    missing = [name for name in required if name not in values]
+    if missing:
+        raise ValueError(f"{schema.__name__} output is missing {', '.join(missing)}")
+    empty = [name for name in required if isinstance(values[name], list) and not values[name]]
+    if empty:
+        raise ValueError(f"{schema.__name__} output has no items in {', '.join(empty)}")
+    try:
+        return schema.model_validate(values)
+    except ValidationError as e:
+        raise ValueError(str(e)) from e
+
+
+def _raw_output(raw: Any) -> Any:
+    """The part of a raw model message that holds the structured output."""
+    tool_calls = getattr(raw, "tool_calls", None)
+    if tool_calls:
+        return tool_calls[0].get("args", {})
+    content = getattr(raw, "content", raw)
+    if isinstance(content, list):
+        return "".join(part if isinstance(part, str) else str(part.get("text", "")) for part in content)
+    return content
+
+
+def repair_structured_output(raw: Any, schema: Type[BaseModel]) -> BaseModel:
+    """Repair the raw message of a failed structured call into a schema instance. Raises ValueError."""
+    output = _raw_output(raw)
+    data = parse_json_tolerant(output) if isinstance(output, str) else output
+    return coerce_to_schema(data, schema)
+
+
+class StructuredOutput:
+    """with_structured_output() with local repair before any retry; use structured_output()."""
+
+    def __init__(self, llm: Any, schema: Type[BaseModel], max_retries: int = DEFAULT_MAX_RETRIES):
+        self.schema = schema
+        self.max_retries = max_retries
+        self._runnable = llm.with_structured_output(schema, include_raw=True)
+
+    def invoke(self, input: Any, config: Optional[Any] = None, **kwargs: Any) -> BaseModel:
+        name = self.schema.__name__
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                record_structured_output(name, "retried")
+                add_span_event("structured_output.retried", schema=name, attempt=attempt)
+            output = self._runnable.invoke(input, config, **kwargs)
+            parsed = output.get("parsed")
+            if parsed is not None and output.get("parsing_error") is None:
+                record_structured_output(name, "valid")
+                return parsed
+            error = output.get("parsing_error")
+            try:
+                repaired = repair_structured_output(output.get("raw"), self.schema)
+            except ValueError as repair_error:
+                logger.warning("Structured output for %s could not be repaired: %s", name, repair_error)
+                continue
+            record_structured_output(name, "repaired")
+            add_span_event("structured_output.repaired", schema=name, parsing_error=str(error)[:200])
+            return repaired
+        record_structured_output(name, "failed")
+        raise OutputParserException(f"Failed to get a valid {name} after {self.max_retries + 1} attempts: {error}")
+
+
+def structured_output(llm: Any, schema: Type[BaseModel], max_retries: int = DEFAULT_MAX_RETRIES) -> StructuredOutput:
+    """Structured output runnable for schema that repairs malformed outputs locally.
+
+    Only outputs that cannot be repaired cost another model call (at most
+    max_retries of them).
+    """
+    return StructuredOutput(llm, schema, max_retries)
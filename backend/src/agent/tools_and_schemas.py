@@ -61,6 +61,19 @@ class SubTopicResearch(BaseModel):
     )
 
 
+class ReportFraming(BaseModel):
+    """Title, introduction and conclusion wrapped around precomputed report sections."""
+    title: str = Field(
+        description="Title of the research report"
+    )
+    introduction: str = Field(
+        description="Introduction summarizing the purpose and scope of the report"
+    )
+    conclusion: str = Field(
+        description="Conclusion integrating the findings of all sections"
+    )
+
+
 class CitedAnswer(BaseModel):
     """Answer with proper citations to sources."""
     answer: str = Field(
@@ -71,6 +84,16 @@ class CitedAnswer(BaseModel):
     )
 
 
+class SectionRevision(BaseModel):
+    """Targeted revision request for a single section of a report."""
+    section_title: str = Field(
+        description="Heading of the section to revise, exactly as it appears in the draft"
+    )
+    instruction: str = Field(
+        description="Concrete instruction describing what to fix in this section"
+    )
+
+
 class CritiqueAssessment(BaseModel):
     """Critique assessment of a research report."""
     overall_quality: str = Field(
@@ -88,6 +111,10 @@ class CritiqueAssessment(BaseModel):
     should_revise: bool = Field(
         description="Whether the report should be revised"
     )
+    section_revisions: List[SectionRevision] = Field(
+        default_factory=list,
+        description="Sections that need revision, each with a targeted instruction"
+    )
 
 
 class Reflection(BaseModel):
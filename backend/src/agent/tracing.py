@@ -0,0 +1,386 @@
+"""Lightweight tracing for graph nodes, LLM calls and grounded searches.
+
+Spans are recorded only while a span processor is enabled: the exporter
+configured through the TRACING_EXPORTER environment variable, or the metrics
+processor of agent.metrics, which is on unless METRICS_ENABLED=false. With
+neither, spans are no-ops. The settings are read when tracing is first used, so
+a .env loaded after this module is imported still applies. Exporters:
+
+- ``console``: one JSON line per finished span on stderr
+- ``file``: one JSON line per finished span appended to TRACING_FILE
+  (default ``traces.jsonl``)
+- ``otel``: forwards spans to the OpenTelemetry API (requires
+  ``pip install "agent[tracing]"`` and an SDK/exporter configured by the application)
+
+Console and file output is written by a background thread so exporting never
+blocks a node. Additional span processors (e.g. metrics) can be registered with
+add_span_processor().
+"""
+
+import atexit
+import contextvars
+import functools
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, TypeVar
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+
+logger = logging.getLogger("agent.tracing")
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class Span:
+    """A timed operation with attributes and events."""
+
+    __slots__ = (
+        "name", "span_id", "trace_id", "parent_id", "attributes", "events",
+        "start_time", "end_time", "status", "handle",
+    )
+
+    def __init__(self, name: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.trace_id = parent.trace_id if parent else attributes.get("thread_id") or uuid.uuid4().hex
+        self.attributes = dict(attributes)
+        self.events: List[Dict[str, Any]] = []
+        self.start_time = time.time()
+        self.end_time: Optional[float] = None
+        self.status = "ok"
+        self.handle: Any = None  # exporter specific (e.g. the OpenTelemetry span)
+
+    @property
+    def duration_ms(self) -> float:
+        end_time = self.end_time if self.end_time is not None else time.time()
+        return (end_time - self.start_time) * 1000
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def add_event(self, name: str, **attributes: Any) -> None:
+        self.events.append({"name": name, "time": time.time(), "attributes": attributes})
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "attributes": self.attributes,
+            "events": self.events,
+        }
+
+
+class SpanProcessor:
+    """Receives spans when they start and end. Subclasses override what they need."""
+
+    def enabled(self) -> bool:
+        """Whether the processor takes part; checked once, when tracing is first used."""
+        return True
+
+    def on_start(self, span: Span) -> None:
+        pass
+
+    def on_end(self, span: Span) -> None:
+        pass
+
+
+class JsonLinesExporter(SpanProcessor):
+    """Writes finished spans as JSON lines from a background thread."""
+
+    def __init__(self, stream_factory: Callable[[], Any]):
+        self._queue: "queue.SimpleQueue[Optional[Dict[str, Any]]]" = queue.SimpleQueue()
+        self._stream_factory = stream_factory
+        self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def on_end(self, span: Span) -> None:
+        self._queue.put(span.to_dict())
+
+    def _run(self) -> None:
+        stream = self._stream_factory()
+        while True:
+            record = self._queue.get()
+            if record is None:
+                break
+            stream.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+            if self._queue.empty():
+                stream.flush()
+        stream.flush()
+
+    def shutdown(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout=5)
+
+
+class OpenTelemetryExporter(SpanProcessor):
+    """Mirrors spans onto the OpenTelemetry API."""
+
+    def __init__(self) -> None:
+        from opentelemetry import trace
+
+        self._trace = trace
+        self._tracer = trace.get_tracer("agent")
+
+    def on_start(self, span: Span) -> None:
+        parent = _spans_by_id.get(span.parent_id) if span.parent_id else None
+        context = None
+        if parent is not None and parent.handle is not None:
+            context = self._trace.set_span_in_context(parent.handle)
+        span.handle = self._tracer.start_span(
+            span.name, context=context, start_time=int(span.start_time * 1e9)
+        )
+
+    def on_end(self, span: Span) -> None:
+        otel_span = span.handle
+        if otel_span is None:
+            return
+        for key, value in span.attributes.items():
+            if isinstance(value, (str, bool, int, float)):
+                otel_span.set_attribute(key, value)
+        for event in span.events:
+            otel_span.add_event(
+                event["name"],
+                {k: v for k, v in event["attributes"].items() if isinstance(v, (str, bool, int, float))},
+                timestamp=int(event["time"] * 1e9),
+            )
+        if span.status != "ok":
+            otel_span.set_status(self._trace.Status(self._trace.StatusCode.ERROR))
+        otel_span.end(end_time=int(span.end_time * 1e9))
+
+
+_processors: List[SpanProcessor] = []
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("agent_current_span", default=None)
+# Open spans by id, so OpenTelemetry parents can be found across threads
+_spans_by_id: Dict[str, Span] = {}
+
+
+def add_span_processor(processor: SpanProcessor) -> None:
+    """Register a processor that receives every span from now on."""
+    _processors.append(processor)
+
+
+def tracing_enabled() -> bool:
+    _configure_once()
+    return bool(_processors)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def start_span(name: str, **attributes: Any) -> Optional[Span]:
+    """Start a span under the current one without making it current.
+
+    Returns None when tracing is disabled. Must be finished with end_span().
+    """
+    if not tracing_enabled():
+        return None
+    new_span = Span(name, _current_span.get(), attributes)
+    _spans_by_id[new_span.span_id] = new_span
+    for processor in _processors:
+        processor.on_start(new_span)
+    return new_span
+
+
+def end_span(ended: Optional[Span], error: Optional[BaseException] = None) -> None:
+    """Finish a span started with start_span()."""
+    if ended is None:
+        return
+    if error is not None:
+        ended.status = "error"
+        ended.set_attribute("error", f"{type(error).__name__}: {error}")
+    ended.end_time = time.time()
+    _spans_by_id.pop(ended.span_id, None)
+    for processor in _processors:
+        processor.on_end(ended)
+
+
+@contextmanager
+def span(name: str, **attributes: Any) -> Iterator[Optional[Span]]:
+    """Trace a block of code. Yields None (and costs nothing) when tracing is disabled."""
+    new_span = start_span(name, **attributes)
+    if new_span is None:
+        yield None
+        return
+
+    token = _current_span.set(new_span)
+    error = None
+    try:
+        yield new_span
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        _current_span.reset(token)
+        end_span(new_span, error)
+
+
+def add_span_event(message: str, **attributes: Any) -> None:
+    """Record an event on the current span (and on the debug log)."""
+    logger.debug("%s %s", message, attributes if attributes else "")
+    active = _current_span.get()
+    if active is not None:
+        active.add_event(message, **attributes)
+
+
+def set_span_attributes(**attributes: Any) -> None:
+    """Set attributes on the current span, if any."""
+    active = _current_span.get()
+    if active is not None:
+        active.attributes.update(attributes)
+
+
+def _branch_id(state: Any) -> Optional[str]:
+    if not isinstance(state, dict):
+        return None
+    for key in ("sub_topic_id", "id"):
+        if state.get(key) is not None:
+            return str(state[key])
+    return None
+
+
+def traced_node(fn: F) -> F:
+    """Wrap a graph node (or routing function) in a span named after it.
+
+    The wrapper keeps the signature and type hints, which LangGraph inspects to
+    derive input schemas and to decide whether to pass the config.
+    """
+
+    @functools.wraps(fn)
+    def wrapper(state: Any, config: Any = None, *args: Any, **kwargs: Any) -> Any:
+        if not tracing_enabled():
+            return fn(state, config, *args, **kwargs) if config is not None else fn(state, *args, **kwargs)
+        configurable = (config or {}).get("configurable", {}) if isinstance(config, dict) else {}
+        attributes = {"node": fn.__name__}
+        if configurable.get("thread_id"):
+            attributes["thread_id"] = str(configurable["thread_id"])
+        branch_id = _branch_id(state)
+        if branch_id is not None:
+            attributes["branch_id"] = branch_id
+        with span(f"node.{fn.__name__}", **attributes):
+            if config is not None:
+                return fn(state, config, *args, **kwargs)
+            return fn(state, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def propagate_context(fn: F) -> F:
+    """Bind fn to a copy of the current context so spans nest correctly in worker threads."""
+    context = contextvars.copy_context()
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return context.copy().run(fn, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+class LLMTracingCallbackHandler(BaseCallbackHandler):
+    """LangChain callback handler that records one span per chat model call."""
+
+    def __init__(self) -> None:
+        self._spans: Dict[Any, Span] = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: Any, *, run_id: Any, **kwargs: Any) -> None:
+        if not tracing_enabled():
+            return
+        params = kwargs.get("invocation_params") or {}
+        metadata = kwargs.get("metadata") or {}
+        model = params.get("model") or params.get("model_name") or metadata.get("ls_model_name", "unknown")
+        started = start_span("llm.call", model=str(model).replace("models/", ""))
+        with self._lock:
+            self._spans[run_id] = started
+
+    def on_llm_end(self, response: Any, *, run_id: Any, **kwargs: Any) -> None:
+        with self._lock:
+            started = self._spans.pop(run_id, None)
+        if started is None:
+            return
+        started.attributes.update(_usage_from_llm_result(response))
+        end_span(started)
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any, **kwargs: Any) -> None:
+        with self._lock:
+            started = self._spans.pop(run_id, None)
+        end_span(started, error)
+
+
+def _usage_from_llm_result(response: Any) -> Dict[str, int]:
+    try:
+        message = response.generations[0][0].message
+        usage = message.usage_metadata or {}
+        return {
+            "input_tokens": int(usage.get("input_tokens", 0)),
+            "output_tokens": int(usage.get("output_tokens", 0)),
+        }
+    except (AttributeError, IndexError, TypeError):
+        return {}
+
+
+def record_search_usage(response: Any) -> None:
+    """Copy token usage of a google-genai response onto the current span."""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return
+    set_span_attributes(
+        input_tokens=getattr(usage, "prompt_token_count", None) or 0,
+        output_tokens=getattr(usage, "candidates_token_count", None) or 0,
+    )
+
+
+def _configure_from_env() -> None:
+    exporter = os.getenv("TRACING_EXPORTER", "none").lower()
+    if exporter == "console":
+        add_span_processor(JsonLinesExporter(lambda: sys.stderr))
+    elif exporter == "file":
+        path = os.getenv("TRACING_FILE", "traces.jsonl")
+        add_span_processor(JsonLinesExporter(lambda: open(path, "a", encoding="utf-8")))
+    elif exporter == "otel":
+        try:
+            add_span_processor(OpenTelemetryExporter())
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otel but opentelemetry-api is not installed; tracing disabled")
+
+
+_env_configured = False
+_configure_lock = threading.Lock()
+
+
+def _configure_once() -> None:
+    """Add the exporter from the environment the first time tracing is used."""
+    global _env_configured
+    if _env_configured:
+        return
+    with _configure_lock:
+        if not _env_configured:
+            _configure_from_env()
+            _processors[:] = [processor for processor in _processors if processor.enabled()]
+            _env_configured = True
+
+# Every LangChain chat model call made while a handler is installed gets an llm.call
+# span. The context var default is used in every thread, including LangGraph's
+# worker threads, so nodes do not have to pass callbacks explicitly.
+_llm_tracing_handler = LLMTracingCallbackHandler()
+_llm_tracing_var: contextvars.ContextVar[Optional[BaseCallbackHandler]] = contextvars.ContextVar(
+    "agent_llm_tracing", default=_llm_tracing_handler
+)
+register_configure_hook(_llm_tracing_var, inheritable=True)
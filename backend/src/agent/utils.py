@@ -1,4 +1,8 @@
-from typing import Any, Dict, List
+import hashlib
+import re
+import unicodedata
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
 from langchain_core.messages import AnyMessage, AIMessage, HumanMessage
 
 
@@ -19,12 +23,24 @@ def get_research_topic(messages: List[AnyMessage]) -> str:
     return research_topic
 
 
+SHORT_URL_PREFIX = "https://vertexaisearch.cloud.google.com/id/"
+
+# Compact citation token "[S<branch id>-<index>]" standing for the source with short url
+# SHORT_URL_PREFIX + "<branch id>-<index>" in intermediate texts
+_CITATION_TOKEN_RE = re.compile(r"\[S([0-9][0-9-]*)\]")
+
+
+def citation_token(short_url: str) -> str:
+    """Compact citation token of a short url, e.g. "[S3-12]" for ".../id/3-12"."""
+    return f"[S{short_url[len(SHORT_URL_PREFIX):]}]"
+
+
 def resolve_urls(urls_to_resolve: List[Any], id: int) -> Dict[str, str]:
     """
     Create a map of the vertex ai search urls (very long) to a short url with a unique id for each url.
     Ensures each original URL gets a consistent shortened form while maintaining uniqueness.
     """
-    prefix = f"https://vertexaisearch.cloud.google.com/id/"
+    prefix = SHORT_URL_PREFIX
     urls = [site.web.uri for site in urls_to_resolve]
 
     # Create a dictionary that maps each unique URL to its first occurrence index
@@ -36,6 +52,27 @@ def resolve_urls(urls_to_resolve: List[Any], id: int) -> Dict[str, str]:
     return resolved_map
 
 
+def rebase_citation_ids(text: str, sources: List[Dict[str, Any]], old_id: Any, new_id: Any) -> tuple[str, List[Dict[str, Any]]]:
+    """
+    Move short urls created with resolve_urls() (and their citation tokens) under id
+    prefix old_id to new_id.
+
+    Used when research is reused in another run (or branch), so its short urls cannot
+    collide with the ones of the branch that now owns it.
+    """
+    old_prefix = f"{SHORT_URL_PREFIX}{old_id}-"
+    new_prefix = f"{SHORT_URL_PREFIX}{new_id}-"
+    if old_prefix == new_prefix:
+        return text, sources
+    rebased_sources = [
+        {**source, "short_url": source["short_url"].replace(old_prefix, new_prefix, 1)}
+        if source.get("short_url", "").startswith(old_prefix) else source
+        for source in sources
+    ]
+    text = text.replace(old_prefix, new_prefix).replace(f"[S{old_id}-", f"[S{new_id}-")
+    return text, rebased_sources
+
+
 def insert_citation_markers(text, citations_list):
     """
     Inserts citation markers into a text string based on start and end indices.
@@ -164,3 +201,423 @@ def get_citations(response, resolved_urls_map):
                     pass
         citations.append(citation)
     return citations
+
+
+def cite_grounded_response(response, id, compact_markers: bool = False) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Resolve the citations of a grounded Gemini response and insert their markers.
+
+    Produces the same text and cited segments as resolve_urls(), get_citations() and
+    insert_citation_markers() combined, in a single pass: the segment of every
+    grounding chunk is built once, and the cited text is assembled from slices of
+    the original text joined together instead of rebuilding the whole string for
+    each citation.
+
+    Args:
+        response: Gemini response with `candidates[0].grounding_metadata`.
+        id: Branch id used in the short urls (see resolve_urls).
+        compact_markers: Mark citations with citation tokens ("[S<id>-<index>]")
+            instead of markdown links to the short urls.
+
+    Returns:
+        tuple: (text with citation markers, list of cited segments in support order)
+    """
+    text = response.text or ""
+    metadata = response.candidates[0].grounding_metadata
+    chunks = metadata.grounding_chunks
+
+    # Short url and segment per chunk index; None where the chunk yields no segment
+    resolved_map: Dict[str, str] = {}
+    for idx, chunk in enumerate(chunks):
+        resolved_map.setdefault(chunk.web.uri, f"{SHORT_URL_PREFIX}{id}-{idx}")
+    chunk_segments: List[Any] = []
+    for chunk in chunks:
+        try:
+            chunk_segments.append({
+                "label": chunk.web.title.split(".")[:-1][0],
+                "short_url": resolved_map.get(chunk.web.uri),
+                "value": chunk.web.uri,
+            })
+        except (IndexError, AttributeError):
+            chunk_segments.append(None)
+
+    citations = []
+    sources_gathered = []
+    for support in getattr(metadata, "grounding_supports", None) or []:
+        segment = getattr(support, "segment", None)
+        if segment is None or segment.end_index is None:
+            continue
+        segments = []
+        for ind in getattr(support, "grounding_chunk_indices", None) or []:
+            try:
+                chunk_segment = chunk_segments[ind]
+            except (IndexError, TypeError):
+                continue
+            if chunk_segment is not None:
+                segments.append(dict(chunk_segment))
+        sources_gathered.extend(segments)
+        citations.append({
+            "start_index": segment.start_index if segment.start_index is not None else 0,
+            "end_index": segment.end_index,
+            "segments": segments,
+        })
+
+    if not citations:
+        return text, sources_gathered
+    if any(citation["end_index"] < 0 for citation in citations):
+        # Negative offsets count from the end of the partially marked-up text
+        return insert_citation_markers(text, citations), sources_gathered
+
+    # Same order as insert_citation_markers processes the citations in
+    ordered = sorted(citations, key=lambda c: (c["end_index"], c["start_index"]), reverse=True)
+    text_length = len(text)
+    tail = ""  # Markers of citations ending past the text, in the order they end up in
+    in_text = []
+    for citation in ordered:
+        if compact_markers:
+            marker = "".join(f" {citation_token(s['short_url'])}" for s in citation["segments"])
+        else:
+            marker = "".join(f" [{s['label']}]({s['short_url']})" for s in citation["segments"])
+        end_idx = citation["end_index"]
+        if end_idx > text_length:
+            offset = end_idx - text_length
+            tail = tail[:offset] + marker + tail[offset:]
+        else:
+            in_text.append((end_idx, marker))
+
+    # Markers inserted later at the same offset land before the earlier ones
+    pieces = []
+    position = 0
+    for end_idx, marker in reversed(in_text):
+        pieces.append(text[position:end_idx])
+        pieces.append(marker)
+        position = end_idx
+    pieces.append(text[position:])
+    pieces.append(tail)
+    return "".join(pieces), sources_gathered
+
+
+_SECTION_HEADING_RE = re.compile(r"^(#{1,2})\s+(.+?)\s*#*\s*$", re.MULTILINE)
+
+
+_HEADING_NUMBER_RE = re.compile(r"^(?:第[0-9]+[章節]|[0-9]+(?:\.[0-9]+)*(?:[.)、](?![0-9])|(?=\s)))\s*")
+
+
+def _normalize_heading(title: str) -> str:
+    """
+    Normalize a heading for comparison: NFKC, markdown markers, emphasis, a leading
+    section number ("2.", "2.1", "第2章"), whitespace and case are ignored.
+    """
+    title = unicodedata.normalize("NFKC", re.sub(r"[#*_`]", "", title)).strip()
+    title = _HEADING_NUMBER_RE.sub("", title)
+    return re.sub(r"\s+", " ", title).strip().casefold()
+
+
+def split_report_sections(report: str) -> List[Dict[str, str]]:
+    """
+    Split a markdown report into top-level sections.
+
+    A section starts at a level 1 or level 2 heading and runs until the next one.
+    Text before the first heading is returned as a section with an empty title.
+    Each section keeps its raw text (heading included), so joining the "text"
+    values of the returned list reproduces the original report exactly. "level"
+    is the heading level (0 for the text before the first heading).
+    """
+    sections = []
+    matches = list(_SECTION_HEADING_RE.finditer(report))
+    if not matches or matches[0].start() > 0:
+        end = matches[0].start() if matches else len(report)
+        sections.append({"title": "", "heading": "", "level": 0, "text": report[:end]})
+    for idx, match in enumerate(matches):
+        end = matches[idx + 1].start() if idx + 1 < len(matches) else len(report)
+        sections.append(
+            {
+                "title": match.group(2),
+                "heading": match.group(0).strip(),
+                "level": len(match.group(1)),
+                "text": report[match.start():end],
+            }
+        )
+    return sections
+
+
+def match_section_revisions(
+    sections: List[Dict[str, Any]], section_revisions: List[Dict[str, str]]
+) -> Tuple[Dict[int, List[str]], List[str]]:
+    """
+    Map critique section revisions onto the indices of the report sections they target.
+
+    Only level 2 sections are targets (the level 1 heading is the report title), and
+    titles must be equal after _normalize_heading(). Returns the instructions per
+    section index and the revisions that match no section, as "title: instruction"
+    lines for the caller to apply report-wide.
+    """
+    indices_by_title: Dict[str, int] = {}
+    for idx, section in enumerate(sections):
+        title = _normalize_heading(section["title"])
+        if title and section.get("level", 2) >= 2:
+            indices_by_title.setdefault(title, idx)
+    targets: Dict[int, List[str]] = {}
+    unmatched: List[str] = []
+    for revision in section_revisions:
+        instruction = revision.get("instruction", "")
+        match_idx = indices_by_title.get(_normalize_heading(revision.get("section_title", "")))
+        if match_idx is not None:
+            targets.setdefault(match_idx, []).append(instruction)
+        elif instruction:
+            title = revision.get("section_title", "").strip()
+            unmatched.append(f"{title}: {instruction}" if title else instruction)
+    return targets, unmatched
+
+
+def dedupe_sources(sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Remove repeated source segments (the same short url cited by several supports),
+    keeping the first occurrence and the original order.
+    """
+    seen = set()
+    unique_sources = []
+    for source in sources:
+        key = source.get("short_url") or source.get("value")
+        if key in seen:
+            continue
+        seen.add(key)
+        unique_sources.append(source)
+    return unique_sources
+
+
+_TRACKING_PARAM_PREFIXES = ("utm_",)
+_TRACKING_PARAMS = {"gclid", "fbclid", "yclid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    Canonical form of a URL for deduplication.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking parameters
+    and trailing slashes, and sorts the remaining query parameters.
+    """
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and not (scheme == "http" and parts.port == 80 or scheme == "https" and parts.port == 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key.lower() not in _TRACKING_PARAMS and not key.lower().startswith(_TRACKING_PARAM_PREFIXES)
+    )
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def source_id_for(url: str) -> str:
+    """Stable compact id of a source, derived from its canonical URL."""
+    return "s" + hashlib.sha1(canonicalize_url(url).encode("utf-8")).hexdigest()[:10]
+
+
+def compact_sources(sources: List[Dict[str, Any]]) -> Tuple[List[Dict[str, str]], Dict[str, Dict[str, str]]]:
+    """
+    Split citation segments into compact references and a source registry.
+
+    Each segment ({label, short_url, value}) becomes {short_url, source_id}; the label
+    and full URL are stored once per canonical URL in the registry, however many
+    segments and branches cite it. Segments that are already compact pass through.
+    """
+    refs: List[Dict[str, str]] = []
+    registry: Dict[str, Dict[str, str]] = {}
+    seen = set()
+    for source in sources:
+        short_url = source.get("short_url")
+        if short_url in seen:
+            continue
+        seen.add(short_url)
+        if "source_id" in source:
+            refs.append(source)
+            continue
+        source_id = source_id_for(source["value"])
+        registry.setdefault(source_id, {"label": source.get("label", ""), "value": source["value"]})
+        refs.append({"short_url": short_url, "source_id": source_id})
+    return refs, registry
+
+
+def expand_sources(refs: List[Dict[str, Any]], registry: Dict[str, Dict[str, str]]) -> List[Dict[str, Any]]:
+    """
+    Turn compact source references back into {label, short_url, value} segments.
+
+    References whose source is missing from the registry are skipped; full segments
+    pass through unchanged.
+    """
+    expanded = []
+    for ref in refs:
+        if "source_id" not in ref:
+            expanded.append(ref)
+            continue
+        source = registry.get(ref["source_id"])
+        if source is not None:
+            expanded.append({"label": source["label"], "short_url": ref["short_url"], "value": source["value"]})
+    return expanded
+
+
+def expand_short_urls(text: str, sources: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Replace the short urls of sources in text with their original urls, in one pass.
+
+    All short urls are matched by a single compiled pattern (longest first, and not
+    followed by another digit, so ".../id/0-1" never matches inside ".../id/0-12").
+    Returns the expanded text and the sources whose short url occurred in it, in the
+    order of sources, first occurrence of each short url only.
+    """
+    by_short_url: Dict[str, Dict[str, Any]] = {}
+    for source in sources:
+        if source.get("short_url"):
+            by_short_url.setdefault(source["short_url"], source)
+    if not by_short_url:
+        return text, []
+
+    # Short urls share SHORT_URL_PREFIX, so factor it out of the alternation
+    prefixed = sorted((u for u in by_short_url if u.startswith(SHORT_URL_PREFIX)), key=len, reverse=True)
+    others = sorted((u for u in by_short_url if not u.startswith(SHORT_URL_PREFIX)), key=len, reverse=True)
+    alternatives = []
+    if prefixed:
+        suffixes = "|".join(re.escape(u[len(SHORT_URL_PREFIX):]) for u in prefixed)
+        alternatives.append(f"{re.escape(SHORT_URL_PREFIX)}(?:{suffixes})")
+    alternatives.extend(re.escape(u) for u in others)
+    pattern = re.compile(f"(?:{'|'.join(alternatives)})(?![0-9])")
+
+    used = set()
+
+    def substitute(match: "re.Match[str]") -> str:
+        used.add(match.group(0))
+        return by_short_url[match.group(0)]["value"]
+
+    expanded = pattern.sub(substitute, text)
+    return expanded, [source for short_url, source in by_short_url.items() if short_url in used]
+
+
+def expand_citation_tokens(text: str, sources: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Replace citation tokens in text with markdown links to the original urls, in one pass.
+
+    Tokens of unknown sources are left as they are. Returns the expanded text and the
+    sources cited in it, in the order of sources.
+    """
+    by_token = {}
+    for source in sources:
+        if source.get("short_url", "").startswith(SHORT_URL_PREFIX):
+            by_token.setdefault(source["short_url"][len(SHORT_URL_PREFIX):], source)
+    used = set()
+
+    def substitute(match: "re.Match[str]") -> str:
+        source = by_token.get(match.group(1))
+        if source is None:
+            return match.group(0)
+        used.add(match.group(1))
+        return f"[{source['label']}]({source['value']})"
+
+    expanded = _CITATION_TOKEN_RE.sub(substitute, text)
+    return expanded, [source for key, source in by_token.items() if key in used]
+
+
+def expand_citations(text: str, sources: List[Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Restore real links for both citation tokens and short urls in a final report.
+
+    Returns the expanded text and the cited sources in the order of sources, each once.
+    """
+    text, token_sources = expand_citation_tokens(text, sources)
+    text, url_sources = expand_short_urls(text, sources)
+    cited = {source["short_url"] for source in token_sources + url_sources}
+    return text, dedupe_sources([source for source in sources if source.get("short_url") in cited])
+
+
+def merge_research_texts(
+    texts: List[str],
+    not_found_marker: str = "該当する情報は見つかりませんでした",
+    sources: Optional[List[List[Any]]] = None,
+) -> str:
+    """
+    Merge the results of several searches on the same sub-topic into one text.
+
+    Paragraphs that repeat (after whitespace normalization) are kept only once, and
+    "not found" results are dropped when at least one other search found something.
+    A result is "not found" when it is empty or starts with not_found_marker and,
+    if sources (the sources of each text) is given, has no sources. Partial answers
+    that only mention the marker for one aspect are kept.
+    """
+    def is_not_found(index: int, text: str) -> bool:
+        if sources is not None and sources[index]:
+            return False
+        return not text or text.strip().startswith(not_found_marker)
+
+    found_texts = [text for index, text in enumerate(texts) if not is_not_found(index, text)]
+    if not found_texts:
+        return texts[0] if texts else ""
+
+    seen = set()
+    merged_paragraphs = []
+    for text in found_texts:
+        for paragraph in re.split(r"\n\s*\n", text.strip()):
+            key = re.sub(r"\s+", " ", paragraph).strip()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            merged_paragraphs.append(paragraph.strip())
+    return "\n\n".join(merged_paragraphs)
+
+
+def char_ngram_similarity(a: str, b: str, n: int = 2) -> float:
+    """
+    Jaccard similarity of the character n-grams of two strings (1.0 for identical strings).
+
+    Works without word segmentation, which makes it suitable for Japanese text.
+    """
+    if a == b:
+        return 1.0
+    grams_a = {a[i:i + n] for i in range(max(1, len(a) - n + 1))}
+    grams_b = {b[i:i + n] for i in range(max(1, len(b) - n + 1))}
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+_QUERY_NOISE_RE = re.compile(r"[\s\W_]+")
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalize a search query for near-duplicate detection: NFKC, case folding, and
+    whitespace and punctuation removed ("日本 少子化、対策" -> "日本少子化対策").
+    """
+    return _QUERY_NOISE_RE.sub("", unicodedata.normalize("NFKC", query).casefold())
+
+
+def dedupe_queries(
+    queries: List[str], executed: List[str], threshold: float = 0.7
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Drop queries that nearly duplicate an executed query or an earlier query of the list.
+
+    Queries are compared by char_ngram_similarity() of their normalized text. Returns
+    the kept queries in order and, for each dropped one, {query, duplicate_of,
+    similarity, executed} where executed tells whether the match had already run.
+    """
+    # (normalized query, query, already executed) of everything a query may duplicate
+    candidates = [(normalize_query(query), query, True) for query in executed]
+    kept: List[str] = []
+    dropped: List[Dict[str, Any]] = []
+    for query in queries:
+        key = normalize_query(query)
+        best = None
+        for other_key, other, was_executed in candidates:
+            similarity = char_ngram_similarity(key, other_key)
+            if similarity >= threshold and (best is None or similarity > best["similarity"]):
+                best = {"query": query, "duplicate_of": other, "similarity": round(similarity, 3), "executed": was_executed}
+        if best is not None:
+            dropped.append(best)
+            continue
+        kept.append(query)
+        candidates.append((key, query, False))
+    return kept, dropped
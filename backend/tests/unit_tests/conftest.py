@@ -0,0 +1,7 @@
+import os
+
+# Importing any agent module imports agent.graph, which refuses to load without an
+# API key; unit tests never call the API
+os.environ.setdefault("GEMINI_API_KEY", "test")
+for name in ("CHECKPOINT_DB_PATH", "LANGSERVE_GRAPHS", "BLOB_STORE_DIR", "TRACING_EXPORTER"):
+    os.environ.pop(name, None)
@@ -0,0 +1,51 @@
+import json
+
+from agent.cache import SubTopicCache
+
+SOURCES = [{"label": "a", "short_url": "https://vertexaisearch.cloud.google.com/id/0-0", "value": "https://a.example"}]
+QUESTION = "日本のEV市場の現状と今後の展望"
+QUERIES = ["日本 EV 販売台数 推移", "日本 EV 補助金 動向"]
+
+
+def _lookup(cache, topic_name="市場概要", question=QUESTION, queries=QUERIES):
+    return cache.lookup(topic_name, question, queries, max_age_hours=24, min_similarity=0.85, min_context_similarity=0.4)
+
+
+def _store(tmp_path):
+    cache = SubTopicCache(str(tmp_path / "cache.json"))
+    cache.store("市場概要", QUESTION, QUERIES, 0, "本文", SOURCES, max_age_hours=24)
+    return cache
+
+
+def test_sub_topic_cache_is_keyed_on_topic_and_date_bucket(tmp_path):
+    _store(tmp_path)
+    (key, entry), = json.loads((tmp_path / "cache.json").read_text(encoding="utf-8")).items()
+    assert key == f"市場概要|{entry['date_bucket']}"
+
+
+def test_sub_topic_cache_reuses_topics_of_a_related_question(tmp_path):
+    cache = SubTopicCache(str(_store(tmp_path).cache_file))
+    hit = _lookup(cache, "市場概要", "日本のEV市場の今後の見通し", ["日本 EV 充電 インフラ"])
+    assert hit["text"] == "本文"
+    assert hit["similarity"] == 1.0
+    assert hit["context_similarity"] >= 0.4
+
+
+def test_sub_topic_cache_reuses_topics_with_the_same_planned_queries(tmp_path):
+    hit = _lookup(_store(tmp_path), "市場概要", "電気自動車の国内普及について", ["日本 EV 販売台数の推移", "日本 EV 補助金 動向"])
+    assert hit is not None
+    assert hit["context_similarity"] == 1.0
+
+
+def test_sub_topic_cache_does_not_share_generic_topics_between_unrelated_questions(tmp_path):
+    assert _lookup(_store(tmp_path), "市場概要", "欧州の半導体産業の競争環境", ["欧州 半導体 市場規模"]) is None
+
+
+def test_sub_topic_cache_skips_entries_outside_the_date_buckets(tmp_path):
+    cache = _store(tmp_path)
+    entries = json.loads((tmp_path / "cache.json").read_text(encoding="utf-8"))
+    for entry in entries.values():
+        entry["date_bucket"] = "2000-01-01"
+    (tmp_path / "cache.json").write_text(json.dumps(entries, ensure_ascii=False), encoding="utf-8")
+    cache._loaded_mtime = None
+    assert _lookup(cache) is None
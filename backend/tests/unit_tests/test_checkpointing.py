@@ -0,0 +1,33 @@
+import time
+
+from agent import checkpointing
+from agent.checkpointing import create_checkpointer
+
+
+def test_checkpoint_db_path_is_ignored_under_the_langgraph_server(monkeypatch, tmp_path):
+    monkeypatch.setenv("CHECKPOINT_DB_PATH", str(tmp_path / "checkpoints.sqlite"))
+    monkeypatch.setenv("LANGSERVE_GRAPHS", '{"agent": "./src/agent/graph.py:graph"}')
+    assert create_checkpointer() is None
+    assert not (tmp_path / "checkpoints.sqlite").exists()
+
+
+def _put(checkpointer, thread_id):
+    config = {"configurable": {"thread_id": thread_id, "checkpoint_ns": ""}}
+    checkpoint = {"v": 1, "id": f"{thread_id}-{time.time_ns()}", "ts": "", "channel_values": {}, "channel_versions": {}}
+    checkpointer.put(config, checkpoint, {}, {})
+
+
+def test_put_prunes_stale_threads_once_the_interval_has_passed(monkeypatch, tmp_path):
+    monkeypatch.setenv("CHECKPOINT_TTL_HOURS", "1")
+    checkpointer = create_checkpointer(str(tmp_path / "checkpoints.sqlite"))
+    _put(checkpointer, "old")
+    checkpointer.conn.execute("UPDATE checkpoint_threads SET updated_at = ?", (time.time() - 7200,))
+    checkpointer.conn.commit()
+
+    _put(checkpointer, "new")
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "old"}}) is not None
+
+    monkeypatch.setattr(checkpointing.time, "time", lambda now=time.time(): now + 3601)
+    _put(checkpointer, "new")
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "old"}}) is None
+    assert checkpointer.get_tuple({"configurable": {"thread_id": "new"}}) is not None
@@ -0,0 +1,123 @@
+import random
+import re
+from types import SimpleNamespace
+
+import pytest
+
+from agent.utils import SHORT_URL_PREFIX, cite_grounded_response, citation_token, expand_citations
+from benchmarks.citation_benchmark import legacy_cite, synthetic_response
+
+
+def _response(text, supports, chunks):
+    """A grounded response with supports given as (start, end, chunk indices)."""
+    metadata = SimpleNamespace(
+        grounding_chunks=[SimpleNamespace(web=SimpleNamespace(uri=uri, title=title)) for uri, title in chunks],
+        grounding_supports=[
+            SimpleNamespace(segment=SimpleNamespace(start_index=start, end_index=end), grounding_chunk_indices=indices)
+            for start, end, indices in supports
+        ],
+    )
+    return SimpleNamespace(text=text, candidates=[SimpleNamespace(grounding_metadata=metadata)])
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matches_legacy_pipeline_on_random_responses(seed):
+    # Offsets past the end of the text, shared end offsets, duplicate urls, bad
+    # chunk indices and titles without a dot, as the API can produce them
+    rng = random.Random(seed)
+    for case in range(500):
+        response = synthetic_response(
+            rng,
+            text_chars=rng.randint(0, 400),
+            supports=rng.randint(0, 25),
+            chunks=rng.randint(1, 8),
+            overflow=rng.choice([0.0, 0.0, 0.3, 0.8]),
+            messy=rng.random() < 0.5,
+        )
+        branch_id = rng.choice([0, 7, "3-1"])
+        assert cite_grounded_response(response, branch_id) == legacy_cite(response, branch_id), f"case {case}"
+
+
+def test_matches_legacy_pipeline_on_large_response():
+    response = synthetic_response(random.Random(0), text_chars=50_000, supports=2000, chunks=200, overflow=0.1)
+    assert cite_grounded_response(response, 0) == legacy_cite(response, 0)
+
+
+def test_markers_follow_the_cited_segments():
+    response = _response(
+        "東京は晴れ。大阪は雨。",
+        [(0, 6, [0]), (6, 11, [1, 0])],
+        [("https://a.example/1", "a.example.com"), ("https://b.example/2", "b.example.com")],
+    )
+    text, sources = cite_grounded_response(response, 3)
+    assert text == (
+        f"東京は晴れ。 [a]({SHORT_URL_PREFIX}3-0)"
+        f"大阪は雨。 [b]({SHORT_URL_PREFIX}3-1) [a]({SHORT_URL_PREFIX}3-0)"
+    )
+    assert [source["short_url"] for source in sources] == [
+        f"{SHORT_URL_PREFIX}3-0",
+        f"{SHORT_URL_PREFIX}3-1",
+        f"{SHORT_URL_PREFIX}3-0",
+    ]
+
+
+def test_duplicate_urls_share_the_first_short_url():
+    response = _response(
+        "abc",
+        [(0, 3, [0, 1])],
+        [("https://same.example", "same.example.com"), ("https://same.example", "same.example.com")],
+    )
+    _, sources = cite_grounded_response(response, 0)
+    assert {source["short_url"] for source in sources} == {f"{SHORT_URL_PREFIX}0-0"}
+
+
+def test_compact_markers_use_citation_tokens():
+    response = _response("abc", [(0, 3, [0])], [("https://a.example", "a.example.com")])
+    text, _ = cite_grounded_response(response, "2-1", compact_markers=True)
+    assert text == "abc [S2-1-0]"
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_removing_markers_restores_text_within_bounds(seed):
+    # Supports that end inside the text only add markers; the text itself is untouched
+    rng = random.Random(seed)
+    for _ in range(200):
+        response = synthetic_response(rng, text_chars=rng.randint(1, 300), supports=rng.randint(0, 20), chunks=4)
+        text, _ = cite_grounded_response(response, 0)
+        stripped = re.sub(r" \[[^\]]*\]\(" + re.escape(SHORT_URL_PREFIX) + r"0-\d+\)", "", text)
+        assert stripped == response.text
+
+
+def test_response_without_supports_is_returned_unchanged():
+    response = _response("plain text", [], [("https://a.example", "a.example.com")])
+    assert cite_grounded_response(response, 0) == ("plain text", [])
+
+
+def _segment(key, url, label="src"):
+    return {"label": label, "short_url": f"{SHORT_URL_PREFIX}{key}", "value": url}
+
+
+def test_expand_citations_restores_tokens_and_short_urls():
+    sources = [_segment("0-1", "https://a.example/1", "a"), _segment("0-12", "https://b.example/12", "b")]
+    text = f"事実A {citation_token(sources[0]['short_url'])}。事実B [b]({SHORT_URL_PREFIX}0-12)"
+    expanded, cited = expand_citations(text, sources)
+    assert expanded == "事実A [a](https://a.example/1)。事実B [b](https://b.example/12)"
+    assert cited == sources
+
+
+def test_expand_citations_does_not_match_inside_longer_short_urls():
+    sources = [_segment("0-1", "https://a.example/1"), _segment("0-12", "https://b.example/12")]
+    expanded, cited = expand_citations(f"[x]({SHORT_URL_PREFIX}0-12)", sources)
+    assert expanded == "[x](https://b.example/12)"
+    assert cited == [sources[1]]
+
+
+def test_expand_citations_keeps_unknown_tokens_and_cites_each_source_once():
+    sources = [_segment("3-0", "https://a.example"), _segment("3-0", "https://a.example")]
+    expanded, cited = expand_citations("A [S3-0] B [S3-0] C [S9-9]", sources)
+    assert expanded == "A [src](https://a.example) B [src](https://a.example) C [S9-9]"
+    assert cited == [sources[0]]
+
+
+def test_expand_citations_without_citations():
+    assert expand_citations("本文のみ", [_segment("0-0", "https://a.example")]) == ("本文のみ", [])
@@ -0,0 +1,80 @@
+from agent.quality import score_draft_report, score_loop_novelty
+
+SUB_TOPICS = [{"topic_name": "市場規模"}, {"topic_name": "主要企業"}]
+
+
+def _report(sections, citations_per_section=4, body_chars=400):
+    parts = ["# レポート"]
+    for title in sections:
+        cited = " ".join(f"[src](https://example.com/{title}/{i})" for i in range(citations_per_section))
+        parts.append(f"## {title}\n{'本文' * (body_chars // 2)} {cited}")
+    return "\n\n".join(parts)
+
+
+def test_complete_report_scores_high():
+    score = score_draft_report(_report(["市場規模の推移", "主要企業の動向"]), SUB_TOPICS, min_length=500)
+    assert score.section_coverage == 1.0
+    assert score.citation_density == 1.0
+    assert score.empty_results == 1.0
+    assert score.total > 0.9
+
+
+def test_empty_report_scores_zero_on_content():
+    score = score_draft_report("", SUB_TOPICS)
+    assert score.citation_density == 0.0
+    assert score.section_coverage == 0.0
+    assert score.length == 0.0
+    assert score.total <= 0.75
+
+
+def test_uncovered_sub_topic_caps_the_total():
+    score = score_draft_report(_report(["市場規模の推移"]), SUB_TOPICS, min_length=100)
+    assert score.section_coverage == 0.5
+    assert score.total <= 0.75
+
+
+def test_empty_result_markers_cap_the_total():
+    report = _report(["市場規模の推移", "主要企業の動向"]) + "\n\n該当する情報は見つかりませんでした"
+    score = score_draft_report(report, SUB_TOPICS, min_length=100)
+    assert score.empty_results == 0.75
+    assert score.total <= 0.75
+
+
+def test_citation_tokens_count_as_citations():
+    linked = score_draft_report("本文" * 500 + " [a](https://example.com/1)" * 4)
+    tokens = score_draft_report("本文" * 500 + " [S0-1]" * 4)
+    assert tokens.citation_density == linked.citation_density > 0
+
+
+def test_without_sub_topics_coverage_is_complete():
+    assert score_draft_report("短い本文").section_coverage == 1.0
+
+
+def test_repeated_loop_has_no_novelty():
+    texts = ["再生可能エネルギーの導入量は2023年に過去最高となった。"]
+    novelty = score_loop_novelty(texts, texts, ["a", "b"], ["a", "b"])
+    assert novelty.new_text == 0.0
+    assert novelty.new_sources == 0.0
+    assert novelty.total == 0.0
+
+
+def test_new_content_and_sources_are_novel():
+    novelty = score_loop_novelty(
+        ["再生可能エネルギーの導入量は2023年に過去最高となった。"],
+        ["洋上風力の入札は北海道沖で進んでいる。"],
+        ["a"],
+        ["b", "c"],
+    )
+    assert novelty.new_text > 0.9
+    assert novelty.new_sources == 1.0
+    assert novelty.total == round((novelty.new_text + novelty.new_sources) / 2, 3)
+
+
+def test_citations_and_whitespace_do_not_count_as_new_text():
+    previous = ["太陽光発電の 導入が進んだ [a](https://example.com/1)"]
+    new = ["太陽光発電の導入が\n進んだ [S2-0] [b](https://example.com/2)"]
+    assert score_loop_novelty(previous, new, [], []).new_text == 0.0
+
+
+def test_empty_loop_has_no_novelty():
+    assert score_loop_novelty(["既存の本文"], [], ["a"], []).total == 0.0
@@ -0,0 +1,62 @@
+import threading
+
+from agent.configuration import Configuration
+from agent.quorum import fold_late_results, run_with_quorum
+from agent.state import merge_late_branches
+
+
+def _configuration(**values):
+    return Configuration(**{"research_quorum_fraction": 0.5, "late_result_policy": "fold", **values})
+
+
+def _quorum_with_straggler(release):
+    def branch(payload):
+        if payload["slow"]:
+            release.wait(5)
+        return {"results": [payload["name"]]}
+
+    payloads = [{"name": "fast", "slow": False}, {"name": "slow", "slow": True}]
+    return run_with_quorum(branch, payloads, ["fast", "slow"], _configuration())
+
+
+def test_quorum_returns_finished_branches_and_records_stragglers():
+    release = threading.Event()
+    updates, metadata, pending = _quorum_with_straggler(release)
+    release.set()
+    assert updates == [{"results": ["fast"]}]
+    assert metadata == {"late_branches": [{"branch": "slow", "policy": "fold"}]}
+    assert [(branch["branch"], branch["payload"]["name"]) for branch in pending] == [("slow", "slow")]
+
+
+def test_fold_keeps_running_branches_pending_until_they_finish():
+    release = threading.Event()
+    _, _, pending = _quorum_with_straggler(release)
+    state = {"pending_late_branches": pending}
+    assert fold_late_results(state) == ([], [])
+
+    release.set()
+    for _ in range(100):
+        updates, settled = fold_late_results(state)
+        if settled:
+            break
+        threading.Event().wait(0.01)
+    assert updates == [{"results": ["slow"]}]
+    assert merge_late_branches(pending, settled) == []
+
+
+def test_fold_reruns_branches_without_a_future():
+    # As after resuming from a checkpoint in another process
+    pending = [{"key": "unknown", "branch": "slow", "payload": {"name": "slow"}}]
+    updates, settled = fold_late_results({"pending_late_branches": pending}, lambda payload: {"results": [payload["name"]]})
+    assert updates == [{"results": ["slow"]}]
+    assert settled == [{"key": "unknown", "settled": True}]
+
+
+def test_final_fold_drops_what_is_left():
+    release = threading.Event()
+    _, _, pending = _quorum_with_straggler(release)
+    pending = pending + [{"key": "unknown", "branch": "other", "payload": {}}]
+    updates, settled = fold_late_results({"pending_late_branches": pending}, lambda payload: {}, final=True)
+    release.set()
+    assert updates == []
+    assert merge_late_branches(pending, settled) == []
@@ -0,0 +1,68 @@
+from agent.state import merge_late_branches, merge_run_metadata, merge_source_registry, merge_sources
+from agent.utils import compact_sources, expand_sources
+
+
+def _source(short_url, value="https://example.com/a", label="example"):
+    return {"label": label, "short_url": short_url, "value": value}
+
+
+def test_merge_sources_skips_short_urls_already_present():
+    left = [_source("s/0-0"), _source("s/0-1")]
+    right = [_source("s/0-1"), _source("s/1-0"), _source("s/1-0")]
+    assert [s["short_url"] for s in merge_sources(left, right)] == ["s/0-0", "s/0-1", "s/1-0"]
+
+
+def test_merge_sources_handles_missing_sides():
+    assert merge_sources(None, None) == []
+    assert merge_sources(None, [_source("s/0-0")]) == [_source("s/0-0")]
+    assert merge_sources([_source("s/0-0")], None) == [_source("s/0-0")]
+
+
+def test_merge_sources_does_not_mutate_its_inputs():
+    left = [_source("s/0-0")]
+    merge_sources(left, [_source("s/0-1")])
+    assert left == [_source("s/0-0")]
+
+
+def test_merge_source_registry_keeps_registered_entries():
+    left = {"s1": {"label": "first", "value": "https://a"}}
+    right = {"s1": {"label": "second", "value": "https://a"}, "s2": {"label": "b", "value": "https://b"}}
+    assert merge_source_registry(left, right) == {
+        "s1": {"label": "first", "value": "https://a"},
+        "s2": {"label": "b", "value": "https://b"},
+    }
+
+
+def test_compact_sources_round_trip():
+    sources = [
+        _source("s/0-0", "https://example.com/a?utm_source=x"),
+        _source("s/1-0", "https://EXAMPLE.com/a/"),
+        _source("s/1-1", "https://example.com/b", "other"),
+    ]
+    refs, registry = compact_sources(sources)
+    # Both spellings of the same page share one registry entry
+    assert len(registry) == 2
+    assert refs[0]["source_id"] == refs[1]["source_id"]
+    expanded = expand_sources(refs, registry)
+    assert [s["short_url"] for s in expanded] == ["s/0-0", "s/1-0", "s/1-1"]
+    assert expanded[2] == sources[2]
+
+
+def test_merge_run_metadata_concatenates_lists_and_replaces_other_values():
+    left = {"late_branches": [{"branch": "a"}], "mode": "x"}
+    right = {"late_branches": [{"branch": "b"}], "mode": "y", "loops": 2}
+    assert merge_run_metadata(left, right) == {
+        "late_branches": [{"branch": "a"}, {"branch": "b"}],
+        "mode": "y",
+        "loops": 2,
+    }
+    assert merge_run_metadata(None, None) == {}
+
+
+def test_merge_late_branches_adds_and_settles_branches():
+    pending = merge_late_branches(None, [{"key": "k1", "branch": "a"}, {"key": "k2", "branch": "b"}])
+    pending = merge_late_branches(pending, [{"key": "k1", "branch": "a"}])
+    assert [branch["key"] for branch in pending] == ["k1", "k2"]
+    pending = merge_late_branches(pending, [{"key": "k1", "settled": True}])
+    assert pending == [{"key": "k2", "branch": "b"}]
+    assert merge_late_branches(pending, [{"key": "k2", "settled": True}]) == []
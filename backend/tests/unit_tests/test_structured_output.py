@@ -0,0 +1,167 @@
+import pytest
+from langchain_core.exceptions import OutputParserException
+from langchain_core.messages import AIMessage
+from pydantic import BaseModel
+
+from agent.structured_output import (
+    coerce_to_schema,
+    parse_json_tolerant,
+    repair_structured_output,
+    structured_output,
+)
+from agent.tools_and_schemas import CritiqueAssessment, Reflection, SearchQueryList, StructuredResearchPlan
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        '{"query": ["a", "b"], "rationale": "r"}',
+        '```json\n{"query": ["a", "b"], "rationale": "r"}\n```',
+        'Here is the plan: {"query": ["a", "b"], "rationale": "r"} Hope it helps.',
+        '{"query": ["a", "b",], "rationale": "r",}',
+        "{'query': ['a', 'b'], 'rationale': 'r'}",
+        '{"query": ["a", "b"], "rationale": "r',
+    ],
+)
+def test_parse_json_tolerant_fixes_common_defects(text):
+    parsed = parse_json_tolerant(text)
+    assert parsed["query"] == ["a", "b"]
+    assert parsed["rationale"].startswith("r")
+
+
+def test_parse_json_tolerant_rejects_prose():
+    with pytest.raises(ValueError):
+        parse_json_tolerant("I could not find anything.")
+
+
+def test_coerce_to_schema_matches_keys_and_coerces_values():
+    reflection = coerce_to_schema(
+        {"isSufficient": "いいえ", "Knowledge_Gap": ["価格", "供給"], "follow_up_queries": "- 価格 推移\n- 供給 量"},
+        Reflection,
+    )
+    assert reflection.is_sufficient is False
+    assert reflection.knowledge_gap == "価格\n供給"
+    assert reflection.follow_up_queries == ["価格 推移", "供給 量"]
+
+
+def test_coerce_to_schema_unwraps_nested_output():
+    plan = coerce_to_schema(
+        {
+            "StructuredResearchPlan": {
+                "researchQuestion": "q",
+                "sub_topics": [{"topic_name": "t", "search_queries": "- a\n- b"}],
+                "estimated_depth": "basic",
+            }
+        },
+        StructuredResearchPlan,
+    )
+    assert plan.research_question == "q"
+    assert plan.sub_topics[0].topic_name == "t"
+    assert plan.sub_topics[0].search_queries == ["a", "b"]
+
+
+def test_coerce_to_schema_fills_only_fields_with_defaults():
+    critique = coerce_to_schema(
+        {
+            "overall_quality": "good",
+            "strengths": ["s"],
+            "weaknesses": ["w"],
+            "specific_suggestions": ["x"],
+            "should_revise": "no",
+        },
+        CritiqueAssessment,
+    )
+    assert critique.section_revisions == []
+
+
+@pytest.mark.parametrize(
+    "data, schema",
+    [
+        # No sub-topics would dispatch no research and end the enhanced graph silently
+        ({"research_question": "q"}, StructuredResearchPlan),
+        ({"research_question": "q", "sub_topics": [], "estimated_depth": "basic"}, StructuredResearchPlan),
+        # No queries would end the simple graph the same way
+        ({"rationale": "r"}, SearchQueryList),
+        ({"query": "", "rationale": "r"}, SearchQueryList),
+        # A missing decision must not silently become False
+        ({"knowledge_gap": "g", "follow_up_queries": ["a"]}, Reflection),
+        ({"is_sufficient": None, "knowledge_gap": "g", "follow_up_queries": ["a"]}, Reflection),
+        # Nested models follow the same rules
+        ({"research_question": "q", "sub_topics": [{"topic_name": "t"}], "estimated_depth": "basic"}, StructuredResearchPlan),
+    ],
+)
+def test_coerce_to_schema_rejects_missing_required_fields_and_empty_lists(data, schema):
+    with pytest.raises(ValueError):
+        coerce_to_schema(data, schema)
+
+
+class _Queries(BaseModel):
+    query: list[str]
+
+
+def test_coerce_to_schema_reads_a_bare_list_for_a_single_required_list_field():
+    assert coerce_to_schema(["a", "b"], _Queries).query == ["a", "b"]
+    with pytest.raises(ValueError):
+        coerce_to_schema(["a", "b"], SearchQueryList)
+
+
+def test_coerce_to_schema_rejects_unrelated_output():
+    with pytest.raises(ValueError):
+        coerce_to_schema({"answer": "x"}, Reflection)
+
+
+def test_repair_structured_output_reads_tool_calls_and_text():
+    args = {"is_sufficient": "true", "knowledge_gap": "", "follow_up_queries": "- a"}
+    tool_call = AIMessage(content="", tool_calls=[{"name": "Reflection", "args": args, "id": "1"}])
+    assert repair_structured_output(tool_call, Reflection).is_sufficient is True
+    text = AIMessage(content='```json\n{"is_sufficient": false, "knowledge_gap": "g", "follow_up_queries": ["a",]}\n```')
+    assert repair_structured_output(text, Reflection).knowledge_gap == "g"
+
+
+class _FakeStructuredLLM:
+    """Returns the queued include_raw outputs of with_structured_output() in order."""
+
+    def __init__(self, outputs):
+        self.outputs = list(outputs)
+        self.calls = 0
+
+    def with_structured_output(self, schema, include_raw=False):
+        assert include_raw
+        return self
+
+    def invoke(self, input, config=None, **kwargs):
+        self.calls += 1
+        return self.outputs.pop(0)
+
+
+def _failed(content):
+    return {"raw": AIMessage(content=content), "parsed": None, "parsing_error": ValueError("bad output")}
+
+
+def test_structured_output_returns_valid_output_without_repair():
+    valid = SearchQueryList(query=["a"], rationale="r")
+    llm = _FakeStructuredLLM([{"raw": AIMessage(content=""), "parsed": valid, "parsing_error": None}])
+    assert structured_output(llm, SearchQueryList).invoke("prompt") == valid
+    assert llm.calls == 1
+
+
+def test_structured_output_repairs_locally_before_retrying():
+    llm = _FakeStructuredLLM([_failed('{"query": ["a", "b",], "rationale": "r"')])
+    assert structured_output(llm, SearchQueryList).invoke("prompt").query == ["a", "b"]
+    assert llm.calls == 1
+
+
+def test_structured_output_retries_output_missing_required_fields():
+    valid = SearchQueryList(query=["a"], rationale="r")
+    llm = _FakeStructuredLLM(
+        [_failed('{"rationale": "r"}'), {"raw": AIMessage(content=""), "parsed": valid, "parsing_error": None}]
+    )
+    assert structured_output(llm, SearchQueryList).invoke("prompt") == valid
+    assert llm.calls == 2
+
+
+def test_structured_output_retries_unrepairable_output_then_fails():
+    llm = _FakeStructuredLLM([_failed("no json"), _failed("still no json")])
+    with pytest.raises(OutputParserException):
+        structured_output(llm, SearchQueryList, max_retries=1).invoke("prompt")
+    assert llm.calls == 2
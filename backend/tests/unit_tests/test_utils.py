@@ -0,0 +1,74 @@
+from agent.utils import dedupe_queries, match_section_revisions, normalize_query, split_report_sections
+
+
+def test_normalize_query_ignores_case_width_and_punctuation():
+    assert normalize_query("日本 少子化、対策") == "日本少子化対策"
+    assert normalize_query("ＥＶ  Market,  2024") == normalize_query("ev market 2024")
+
+
+def test_dedupe_queries_drops_duplicates_of_executed_queries():
+    kept, dropped = dedupe_queries(["少子化 対策 日本", "欧州の再生可能エネルギー政策"], ["日本 少子化 対策"])
+    assert kept == ["欧州の再生可能エネルギー政策"]
+    assert dropped == [
+        {"query": "少子化 対策 日本", "duplicate_of": "日本 少子化 対策", "similarity": dropped[0]["similarity"], "executed": True}
+    ]
+    assert dropped[0]["similarity"] >= 0.7
+
+
+def test_dedupe_queries_drops_duplicates_within_the_batch():
+    kept, dropped = dedupe_queries(["EV市場 2024 動向", "ev市場2024動向", "EV市場 2024 価格"], [])
+    assert kept == ["EV市場 2024 動向", "EV市場 2024 価格"]
+    assert [(d["query"], d["duplicate_of"], d["executed"]) for d in dropped] == [
+        ("ev市場2024動向", "EV市場 2024 動向", False)
+    ]
+
+
+def test_dedupe_queries_keeps_queries_that_differ_in_substance():
+    executed = ["少子化対策 日本", "洋上風力 事業者 比較"]
+    queries = ["少子化対策 韓国", "洋上風力 主要 事業者 比較"]
+    kept, dropped = dedupe_queries(queries, executed)
+    assert kept == queries
+    assert dropped == []
+
+
+def test_dedupe_queries_threshold():
+    assert dedupe_queries(["少子化 対策 日本"], ["日本 少子化 対策"], threshold=0.8)[0] == ["少子化 対策 日本"]
+    assert dedupe_queries(["少子化対策 韓国"], ["少子化対策 日本"], threshold=0.5)[0] == []
+
+
+REPORT = "前置き\n\n# 市場レポート\n概要\n\n## ２．市場規模\n本文A\n\n## 2030年の展望\n本文B\n"
+
+
+def test_split_report_sections_records_heading_levels():
+    sections = split_report_sections(REPORT)
+    assert [(section["title"], section["level"]) for section in sections] == [
+        ("", 0),
+        ("市場レポート", 1),
+        ("２．市場規模", 2),
+        ("2030年の展望", 2),
+    ]
+    assert "".join(section["text"] for section in sections) == REPORT
+
+
+def test_match_section_revisions_matches_normalized_level_2_titles():
+    targets, unmatched = match_section_revisions(
+        split_report_sections(REPORT),
+        [
+            {"section_title": "2.1 市場規模", "instruction": "数値を更新"},
+            {"section_title": "2030年の展望", "instruction": "出典を追加"},
+        ],
+    )
+    assert targets == {2: ["数値を更新"], 3: ["出典を追加"]}
+    assert unmatched == []
+
+
+def test_match_section_revisions_does_not_target_the_title_or_substrings():
+    targets, unmatched = match_section_revisions(
+        split_report_sections(REPORT),
+        [
+            {"section_title": "市場レポート", "instruction": "構成を見直す"},
+            {"section_title": "市場", "instruction": "用語を統一"},
+        ],
+    )
+    assert targets == {}
+    assert unmatched == ["市場レポート: 構成を見直す", "市場: 用語を統一"]
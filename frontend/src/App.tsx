@@ -47,16 +47,24 @@ export default function App() {
           title: "📋 Research Planning",
           data: `Created structured research plan with ${event.enhanced_planner.structured_plan?.sub_topics?.length || 0} sub-topics for comprehensive investigation.`,
         };
-      } else if (event.focused_researcher) {
-        const sources = event.focused_researcher.sources_gathered || [];
+      } else if (event.focused_researcher || event.quorum_research) {
+        // quorum_research runs the focused researchers itself when a quorum is configured
+        const update = event.focused_researcher || event.quorum_research;
+        const sources = update.sources_gathered || [];
+        const registry = update.source_registry || {};
+        const numLate = update.run_metadata?.late_branches?.length || 0;
         const numSources = sources.length;
         const uniqueLabels = [
-          ...new Set(sources.map((s: any) => s.label).filter(Boolean)),
+          ...new Set(
+            sources
+              .map((s: any) => s.label ?? registry[s.source_id]?.label)
+              .filter(Boolean)
+          ),
         ];
         const exampleLabels = uniqueLabels.slice(0, 2).join(", ");
         processedEvent = {
           title: "🔍 Parallel Research",
-          data: `Completed focused research - gathered ${numSources} sources${exampleLabels ? ` from ${exampleLabels}` : ''}.`,
+          data: `Completed focused research - gathered ${numSources} sources${exampleLabels ? ` from ${exampleLabels}` : ''}.${numLate ? ` Continued at quorum without ${numLate} slower branches.` : ''}`,
         };
       } else if (event.aggregate_research_results) {
         processedEvent = {
@@ -134,11 +142,18 @@ export default function App() {
           title: "Generating Search Queries",
           data: event.generate_query?.search_query?.join(", ") || "",
         };
-      } else if (event.web_research) {
-        const sources = event.web_research.sources_gathered || [];
+      } else if (event.web_research || event.quorum_web_research) {
+        // quorum_web_research runs the web research branches itself when a quorum is configured
+        const update = event.web_research || event.quorum_web_research;
+        const sources = update.sources_gathered || [];
+        const registry = update.source_registry || {};
         const numSources = sources.length;
         const uniqueLabels = [
-          ...new Set(sources.map((s: any) => s.label).filter(Boolean)),
+          ...new Set(
+            sources
+              .map((s: any) => s.label ?? registry[s.source_id]?.label)
+              .filter(Boolean)
+          ),
         ];
         const exampleLabels = uniqueLabels.slice(0, 3).join(", ");
         processedEvent = {